@@ -0,0 +1,111 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of yapl.utilities.ArtifactCache with downloads by yapl.utilities.RangedDownloader
+  from a local yapl.distribution.ArtifactServer.  An artifact put in the cache is hard
+  linked to its destination, so a later download to the same destination after a miss,
+  e.g., the ETag changed, must not change the cache entry.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+from yapl.utilities.ArtifactCache import ArtifactCache
+from yapl.utilities.RangedDownloader import RangedDownloader
+from yapl.distribution.ArtifactServer import ArtifactServer
+
+Trace.configureTrace("*=warning")
+
+Bucket = "testbucket"
+Key = "3.1.2/icp-docker.bin"
+OldETag = '"etag-1"'
+
+OldContent = "old artifact\n" * 1000
+NewContent = "new artifact!\n" * 1000
+
+
+class ArtifactCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.cache = ArtifactCache(os.path.join(self.tempDir,"cache"),maxSize=1024 * 1024)
+    self.destPath = os.path.join(self.tempDir,"icp-docker.bin")
+
+    # The new version of the artifact is served, the old one is in the cache.
+    self.servedPath = os.path.join(self.tempDir,"served.bin")
+    with open(self.servedPath,'wb') as servedFile:
+      servedFile.write(NewContent)
+    #endWith
+    self.server = ArtifactServer({Key: self.servedPath},port=0,bindAddress='127.0.0.1')
+    self.server.start()
+    self.url = "%s/%s" % (self.server.getURL('127.0.0.1'),Key)
+
+    with open(self.destPath,'wb') as destFile:
+      destFile.write(OldContent)
+    #endWith
+    self.cache.put(Bucket,Key,OldETag,self.destPath)
+  #endDef
+
+
+  def tearDown(self):
+    self.server.stop()
+    shutil.rmtree(self.tempDir)
+  #endDef
+
+
+  def _read(self, path):
+    with open(path,'rb') as readFile:
+      return readFile.read()
+    #endWith
+  #endDef
+
+
+  def _checkCacheEntry(self):
+    """
+      Check the cache entry of the old ETag still has the old content.
+    """
+    hitPath = os.path.join(self.tempDir,"hit.bin")
+    self.assertTrue(self.cache.get(Bucket,Key,OldETag,hitPath))
+    self.assertEqual(self._read(hitPath),OldContent)
+  #endDef
+
+
+  def testPutLinks(self):
+    self.assertEqual(os.stat(self.destPath).st_nlink,2)
+    self._checkCacheEntry()
+  #endDef
+
+
+  def testRangedDownloadAfterMiss(self):
+    self.assertFalse(self.cache.get(Bucket,Key,'"etag-2"',self.destPath))
+    downloader = RangedDownloader(chunkSize=1024,maxConnections=4)
+    downloader.download(self.url,self.destPath)
+    self.assertEqual(self._read(self.destPath),NewContent)
+    self._checkCacheEntry()
+  #endDef
+
+
+  def testSingleDownloadAfterMiss(self):
+    downloader = RangedDownloader(chunkSize=len(NewContent),maxConnections=1)
+    downloader.download(self.url,self.destPath)
+    self.assertEqual(self._read(self.destPath),NewContent)
+    self._checkCacheEntry()
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -0,0 +1,91 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the artifact source wait of yapl.distribution.ArtifactDistribution with an
+  in-memory cluster coordinator.  A node whose parent published NoSource must go to S3
+  right away rather than wait for the source timeout.  A node that does not wait for its
+  source, e.g., on an artifact cache hit, must still get its children once the boot node
+  publishes the tree.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+from yapl.coordination.InMemoryCoordinator import InMemoryCoordinator
+from yapl.distribution.ArtifactDistribution import ArtifactDistribution
+
+Trace.configureTrace("*=warning")
+
+# The source timeout of a cluster node, nodeinit ArtifactSourceTimeout.
+SourceTimeout = 1800
+
+
+class ArtifactDistributionTest(unittest.TestCase):
+
+  def setUp(self):
+    self.coordinator = InMemoryCoordinator(minSleepTime=0.01,maxSleepTime=0.01)
+    self.distribution = ArtifactDistribution(self.coordinator,"teststack",fanOut=2)
+    self.hosts = ["node%02d" % i for i in range(6)]
+  #endDef
+
+
+  def testSource(self):
+    children, keys = self.distribution.publishTree("boot",self.hosts)
+    self.assertEqual(children,["node00","node01"])
+    self.assertEqual(self.distribution.getChildren("node00"),["node02","node03"])
+    self.distribution.publishSource("http://boot:8089",children)
+    self.assertEqual(self.distribution.waitForSource("node01",SourceTimeout),"http://boot:8089")
+  #endDef
+
+
+  def testNoSource(self):
+    children, keys = self.distribution.publishTree("boot",self.hosts)
+    self.distribution.publishNoSource(children)
+    self.assertTrue(self.distribution.getSourceKey("node00") in keys)
+
+    startTime = time.time()
+    for child in children:
+      self.assertEqual(self.distribution.waitForSource(child,SourceTimeout),None)
+    #endFor
+    self.assertTrue(time.time() - startTime < 1)
+  #endDef
+
+
+  def testChildrenBeforeTree(self):
+    # The boot node publishes the tree after this node starts to wait for its children.
+    publisher = threading.Timer(0.2,self.distribution.publishTree,["boot",self.hosts])
+    publisher.start()
+    try:
+      self.assertEqual(self.distribution.getChildren("node00",timeout=SourceTimeout),["node02","node03"])
+    finally:
+      publisher.join()
+    #endTry
+
+    # A leaf has no children key, the tree key tells it has no children.
+    startTime = time.time()
+    self.assertEqual(self.distribution.getChildren("node05",timeout=SourceTimeout),[])
+    self.assertTrue(time.time() - startTime < 1)
+  #endDef
+
+
+  def testNoTree(self):
+    self.assertEqual(self.distribution.getChildren("node00",timeout=0.05),[])
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
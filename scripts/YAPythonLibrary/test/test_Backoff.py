@@ -0,0 +1,187 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Tests of yapl.utilities.Backoff and a simulation of N cluster nodes that wait for the
+  same coordination key, e.g., nodeinit getBootNodePublicKey(), the way the waits of
+  yapl.coordination.ClusterCoordinator poll: get the value, and if it is not there yet,
+  back off and poll again until the deadline.
+
+  The simulation runs on a simulated clock, so it takes no time.  All of the nodes start
+  polling at the same time, the worst case.  The service throttles the calls over
+  RateLimit in any one second of the simulated clock; a throttled poll counts as one with
+  no progress.  The report compares the old fixed GetParameterSleepTime polling with the
+  jittered exponential backoff from GetParameterMinSleepTime to GetParameterSleepTime
+  used by nodeinit.
+
+  The jittered polls are on average half of the ceiling apart, so the backoff makes more
+  calls in total than the fixed polling.  It spreads them, so far fewer are throttled, and 
+  the nodes get the value sooner after it is published.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+  or run this module to print the report of the total number of API calls for N nodes:
+    python YAPythonLibrary/test/test_Backoff.py report
+"""
+
+import os
+import sys
+import heapq
+import random
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+from yapl.utilities.Backoff import Backoff
+
+# The polling settings of nodeinit.
+GetParameterSleepTime = 60
+GetParameterMaxTryCount = 100
+GetParameterMinSleepTime = 5
+
+# Calls per second the simulated service serves before it throttles.
+RateLimit = 40
+
+# Seconds after the start of the nodes that the key is published.
+DefaultPublishTime = 600
+
+
+def getFixedBackoff():
+  """
+    Return the Backoff of the old fixed interval polling.
+  """
+  return Backoff(initialDelay=GetParameterSleepTime,maxDelay=GetParameterSleepTime,multiplier=1,jitter=False)
+#endDef
+
+
+def getJitteredBackoff():
+  """
+    Return the Backoff nodeinit uses through the cluster coordinator.
+  """
+  return Backoff(initialDelay=GetParameterMinSleepTime,maxDelay=GetParameterSleepTime,multiplier=2,jitter=True)
+#endDef
+
+
+def simulate(nodeCount, backoffFactory, publishTime=DefaultPublishTime, rateLimit=RateLimit, seed=1):
+  """
+    Simulate nodeCount nodes that wait for a key published at publishTime seconds and return
+    a dictionary with the total number of calls, the number of throttled calls, the peak
+    calls in one second, the number of nodes that timed out and the seconds after publishTime
+    until the last node got the value.
+  """
+  random.seed(seed)
+  timeout = GetParameterMaxTryCount * GetParameterSleepTime
+
+  # Heap of (time of the next poll, node, backoff of the node)
+  polls = [(0.0,node,backoffFactory()) for node in range(nodeCount)]
+  heapq.heapify(polls)
+
+  callsPerSecond = {}
+  calls = 0
+  throttled = 0
+  timedOut = 0
+  lastDone = publishTime
+  while (polls):
+    now, node, backoff = heapq.heappop(polls)
+    second = int(now)
+    callsPerSecond[second] = callsPerSecond.get(second,0) + 1
+    calls += 1
+    if (callsPerSecond[second] > rateLimit):
+      throttled += 1
+    elif (now >= publishTime):
+      lastDone = max(lastDone,now)
+      continue
+    #endIf
+
+    # Same as Backoff.sleep(): the last delay is cut short at the deadline, after it the wait gives up.
+    if (now >= timeout):
+      timedOut += 1
+      continue
+    #endIf
+    heapq.heappush(polls,(min(now + backoff.nextDelay(),timeout),node,backoff))
+  #endWhile
+
+  return { 'calls': calls,
+           'throttled': throttled,
+           'peak': max(callsPerSecond.values()),
+           'timedOut': timedOut,
+           'latency': lastDone - publishTime
+         }
+#endDef
+
+
+def report(nodeCounts=(10,100,500), publishTime=DefaultPublishTime):
+  """
+    Print the total number of API calls of N nodes for the fixed and the jittered backoff polling.
+  """
+  print("Key published after %d seconds, the service throttles over %d calls per second." % (publishTime,RateLimit))
+  print("%6s  %-9s %7s %10s %9s %12s" % ("nodes","polling","calls","throttled","peak/s","latency (s)"))
+  for nodeCount in nodeCounts:
+    for name, factory in [("fixed",getFixedBackoff),("backoff",getJitteredBackoff)]:
+      result = simulate(nodeCount,factory,publishTime=publishTime)
+      print("%6d  %-9s %7d %10d %9d %12.1f" % (nodeCount,name,result['calls'],result['throttled'],result['peak'],result['latency']))
+    #endFor
+  #endFor
+#endDef
+
+
+class BackoffTest(unittest.TestCase):
+
+  def testDelays(self):
+    backoff = Backoff(initialDelay=5,maxDelay=60,multiplier=2,jitter=False)
+    self.assertEqual([backoff.nextDelay() for i in range(6)],[5,10,20,40,60,60])
+    backoff.reset()
+    self.assertEqual(backoff.nextDelay(),5)
+  #endDef
+
+
+  def testLongPollDoesNotOverflow(self):
+    backoff = Backoff(initialDelay=0.5,maxDelay=3600,multiplier=2.5,jitter=False)
+    backoff.attempt = 100000
+    self.assertEqual(backoff.nextDelay(),3600)
+
+    backoff = Backoff(initialDelay=0,maxDelay=60,multiplier=2.0,jitter=False)
+    backoff.attempt = 100000
+    self.assertEqual(backoff.nextDelay(),0)
+  #endDef
+
+
+  def testJitterWithinBound(self):
+    backoff = Backoff(initialDelay=5,maxDelay=60,multiplier=2,jitter=True)
+    for bound in [5,10,20,40,60,60]:
+      delay = backoff.nextDelay()
+      self.assertTrue(0 <= delay <= bound)
+    #endFor
+  #endDef
+
+
+  def testSimulatedCalls(self):
+    for nodeCount in [10,100,500]:
+      fixed = simulate(nodeCount,getFixedBackoff)
+      jittered = simulate(nodeCount,getJitteredBackoff)
+
+      # The fixed polling has every node poll in the same second.
+      self.assertEqual(fixed['peak'],nodeCount)
+      self.assertEqual(jittered['timedOut'],0)
+
+      # The jitter spreads the polls, mostly the short delays at the start are throttled.
+      self.assertTrue(jittered['throttled'] <= fixed['throttled'] // 5,"throttled: %d" % jittered['throttled'])
+
+      # Each node makes a few polls early on, then polls on average every GetParameterSleepTime / 2.
+      maxPollsPerNode = 1 + 4 + (DefaultPublishTime + GetParameterSleepTime) // (GetParameterSleepTime / 2)
+      self.assertTrue(jittered['calls'] <= nodeCount * maxPollsPerNode,"calls: %d" % jittered['calls'])
+      self.assertTrue(jittered['latency'] <= GetParameterSleepTime)
+    #endFor
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  if (sys.argv[1:] == ['report']):
+    report()
+  else:
+    unittest.main()
+  #endIf
+#endIf
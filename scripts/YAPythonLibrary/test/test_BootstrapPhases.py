@@ -0,0 +1,178 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Harness that runs the bootstrap phase graph, Bootstrap.getBootstrapPhases(), with fake
+  phases.  The action of each phase is replaced by a sleep of the duration the phase takes
+  in a typical deployment, scaled down by TimeScale.  The graph is run one phase at a time,
+  the way the bootstrap steps used to run, and with BootstrapPhaseMaxWorkers workers.  The
+  wall time of the concurrent run goes down to the critical path time of the graph.
+
+  The harness also checks the ordering constraints of the graph, e.g., the PKI key and
+  certificate are fetched into the cluster directory only after it has been extracted from
+  the inception image.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+  or run this module to print the report:
+    python YAPythonLibrary/test/test_BootstrapPhases.py report
+"""
+
+import os
+import sys
+import time
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+sys.path.insert(0,os.path.join(ScriptsHome,"aws-icp-bootstrap"))
+
+import bootstrap
+from bootstrap import Bootstrap, BootstrapPhaseMaxWorkers
+import yapl.utilities.Trace as Trace
+from yapl.utilities.PhaseScheduler import PhaseScheduler
+
+# The scheduler traces every phase, only the warnings are of interest here.
+Trace.configureTrace("*=warning")
+
+# Seconds of the harness per minute of a deployment.
+TimeScale = 0.05
+
+# Typical duration of the phases in minutes.  The other phases take PhaseDefaultDuration.
+PhaseDurations = { 'configureSSH': 0.5,
+                   'fetchICPArchive': 12,
+                   'fetchDockerBinary': 1,
+                   'fetchPKIKey': 0.1,
+                   'fetchPKICert': 0.1,
+                   'syncClusterNodesReady': 4,
+                   'sshKeyScan': 0.5,
+                   'setVMMaxMapCount': 1,
+                   'installDocker': 5,
+                   'createConfigFile': 0.5,
+                   'loadICPImages': 15,
+                   'extractInceptionCluster': 1,
+                   'configurePKI': 1,
+                   'configureInception': 0.5,
+                   'syncClusterNodesImagesLoaded': 12,
+                   'installICP': 40,
+                   'installKubectl': 1,
+                   'configureEFS': 2,
+                   'installCloudctl': 1,
+                   'getClusterCACert': 0.2,
+                   'installHelm': 2
+                 }
+PhaseDefaultDuration = 0.2
+
+
+def getFakeAction(phase):
+  """
+    Return an action that sleeps for the scaled duration of the given phase and returns
+    a value for each of the outputs of the phase.
+  """
+  duration = PhaseDurations.get(phase.name,PhaseDefaultDuration) * TimeScale
+  outputs = dict([(output,"fake-%s" % output) for output in phase.outputs])
+
+  def action(**inputs):
+    time.sleep(duration)
+    return outputs
+  #endDef
+
+  return action
+#endDef
+
+
+def runPhases(maxWorkers, pki=True, streamImages=False):
+  """
+    Run the bootstrap phases with fake actions on the given number of workers and return
+    the scheduler.
+  """
+  instance = Bootstrap()
+  instance.securityPath = None
+  instance.preInstallPath = None
+  instance.postInstallPath = "post-install"
+  instance.commandSetsPath = "commandsets"
+  instance.streamImages = streamImages
+  instance.peerDistribution = True
+  instance.icpHome = "/opt/icp/fake"
+
+  names = ['ClusterPKIBucketName','ClusterPKIRootPath']
+  savedNames = list(bootstrap.StackParameterNames)
+  savedParameters = dict(bootstrap.StackParameters)
+  bootstrap.StackParameterNames.extend(names)
+  bootstrap.StackParameters.update(dict([(name,"fake" if pki else "") for name in names]))
+  try:
+    phases = instance.getBootstrapPhases()
+  finally:
+    bootstrap.StackParameterNames[:] = savedNames
+    bootstrap.StackParameters.clear()
+    bootstrap.StackParameters.update(savedParameters)
+  #endTry
+
+  for phase in phases:
+    phase.action = getFakeAction(phase)
+  #endFor
+
+  scheduler = PhaseScheduler(phases,maxWorkers=maxWorkers)
+  scheduler.run()
+  return scheduler
+#endDef
+
+
+def report():
+  """
+    Print the wall time of the sequential and the concurrent runs and the critical path.
+  """
+  sequential = runPhases(1)
+  concurrent = runPhases(BootstrapPhaseMaxWorkers)
+  path, pathTime = concurrent.getCriticalPath()
+  print("Phases: %d" % len(concurrent.phases))
+  print("Sequential wall time: %.2f minutes" % ((sequential.endTime - sequential.startTime) / TimeScale))
+  print("Concurrent wall time: %.2f minutes with %d workers" % ((concurrent.endTime - concurrent.startTime) / TimeScale,BootstrapPhaseMaxWorkers))
+  print("Critical path time:   %.2f minutes" % (pathTime / TimeScale))
+  print("Critical path: %s" % " > ".join(path))
+#endDef
+
+
+class BootstrapPhasesTest(unittest.TestCase):
+
+  def testWallTimeGoesDown(self):
+    sequential = runPhases(1)
+    concurrent = runPhases(BootstrapPhaseMaxWorkers)
+
+    sequentialTime = sequential.endTime - sequential.startTime
+    concurrentTime = concurrent.endTime - concurrent.startTime
+    path, pathTime = concurrent.getCriticalPath()
+    totalTime = sum([PhaseDurations.get(phase.name,PhaseDefaultDuration) for phase in concurrent.phases]) * TimeScale
+
+    # One phase at a time takes the sum of the phase times, the graph takes its critical path.
+    self.assertTrue(sequentialTime >= totalTime)
+    self.assertTrue(concurrentTime < 0.8 * sequentialTime,"%.2f not less than %.2f" % (concurrentTime,sequentialTime))
+    self.assertTrue(concurrentTime < pathTime + 0.25 * (sequentialTime - pathTime))
+    self.assertTrue(pathTime < totalTime)
+    self.assertEqual(path[-1],'processCommandSets')
+  #endDef
+
+
+  def testPKIAfterExtraction(self):
+    scheduler = runPhases(BootstrapPhaseMaxWorkers)
+    extracted = scheduler.getPhase('extractInceptionCluster')
+    for name in ['fetchPKIKey','fetchPKICert','configurePKI']:
+      self.assertTrue(scheduler.getPhase(name).startTime >= extracted.endTime,"%s started before the extraction." % name)
+    #endFor
+    self.assertTrue(scheduler.getPhase('configureInception').startTime >= scheduler.getPhase('configurePKI').endTime)
+
+    scheduler = runPhases(BootstrapPhaseMaxWorkers,pki=False,streamImages=True)
+    self.assertEqual(scheduler.getPhase('fetchPKIKey'),None)
+    self.assertTrue(scheduler.getPhase('configurePKI').startTime >= scheduler.getPhase('extractInceptionCluster').endTime)
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  if (sys.argv[1:] == ['report']):
+    report()
+  else:
+    unittest.main()
+  #endIf
+#endIf
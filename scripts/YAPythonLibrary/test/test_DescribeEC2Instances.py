@@ -0,0 +1,136 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the batched EC2 instance discovery of Bootstrap._describeEC2Instances() with
+  a stubbed EC2 client.  The number of DescribeInstances calls must be the number of
+  chunks of DescribeInstancesChunkSize instance IDs, not the number of instances.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+sys.path.insert(0,os.path.join(ScriptsHome,"aws-icp-bootstrap"))
+
+import botocore.session
+from botocore.stub import Stubber
+
+from bootstrap import Bootstrap, DescribeInstancesChunkSize
+
+
+def getInstance(instanceId):
+  """
+    Return the description of an EC2 instance as returned by describe_instances().
+    The first instance is the boot node, the others are worker nodes.
+  """
+  index = int(instanceId.split('-')[-1],16)
+  role = 'boot' if index == 0 else 'worker'
+  return { 'InstanceId': instanceId,
+           'PrivateIpAddress': "10.0.%d.%d" % (index // 250,index % 250 + 1),
+           'PrivateDnsName': "ip-10-0-%d-%d.ec2.internal" % (index // 250,index % 250 + 1),
+           'Tags': [ { 'Key': 'ICPRole', 'Value': role } ]
+         }
+#endDef
+
+
+class DescribeEC2InstancesTest(unittest.TestCase):
+
+  def setUp(self):
+    session = botocore.session.get_session()
+    self.ec2Client = session.create_client('ec2',region_name='us-east-1',
+                                           aws_access_key_id='testing',
+                                           aws_secret_access_key='testing')
+    self.stubber = Stubber(self.ec2Client)
+    self.callCount = 0
+    self.ec2Client.meta.events.register('before-parameter-build.ec2.DescribeInstances',self._countCall)
+    self.bootstrap = Bootstrap()
+  #endDef
+
+
+  def _countCall(self, **kwargs):
+    self.callCount += 1
+  #endDef
+
+
+  def _addResponses(self, instanceIds, pageSize=None):
+    """
+      Queue the stubbed responses for the chunks of the given instance IDs.  With a pageSize
+      each chunk is returned in pages of pageSize reservations.  Return the number of calls.
+    """
+    calls = 0
+    for i in range(0,len(instanceIds),DescribeInstancesChunkSize):
+      chunk = instanceIds[i:i+DescribeInstancesChunkSize]
+      chunkPageSize = pageSize or len(chunk)
+      for j in range(0,len(chunk),chunkPageSize):
+        page = chunk[j:j+chunkPageSize]
+        response = { 'Reservations': [ { 'Instances': [getInstance(iid)] } for iid in page ] }
+        expectedParams = { 'InstanceIds': chunk }
+        if (j > 0):
+          expectedParams['NextToken'] = "token-%d" % j
+        #endIf
+        if (j + chunkPageSize < len(chunk)):
+          response['NextToken'] = "token-%d" % (j + chunkPageSize)
+        #endIf
+        self.stubber.add_response('describe_instances',response,expectedParams)
+        calls += 1
+      #endFor
+    #endFor
+    return calls
+  #endDef
+
+
+  def testCallsPerChunk(self):
+    for instanceCount in [1, DescribeInstancesChunkSize, DescribeInstancesChunkSize + 1, 350]:
+      instanceIds = ["i-%017x" % i for i in range(instanceCount)]
+      expectedCalls = self._addResponses(instanceIds)
+      self.callCount = 0
+      with self.stubber:
+        instances = self.bootstrap._describeEC2Instances(instanceIds,ec2Client=self.ec2Client)
+        self.stubber.assert_no_pending_responses()
+      #endWith
+      self.assertEqual(sorted(instances.keys()),instanceIds)
+      self.assertEqual(self.callCount,expectedCalls)
+      self.assertEqual(self.callCount,(instanceCount + DescribeInstancesChunkSize - 1) // DescribeInstancesChunkSize)
+    #endFor
+  #endDef
+
+
+  def testPaginatedChunk(self):
+    instanceIds = ["i-%017x" % i for i in range(DescribeInstancesChunkSize + 10)]
+    expectedCalls = self._addResponses(instanceIds,pageSize=40)
+    with self.stubber:
+      instances = self.bootstrap._describeEC2Instances(instanceIds,ec2Client=self.ec2Client)
+      self.stubber.assert_no_pending_responses()
+    #endWith
+    self.assertEqual(sorted(instances.keys()),instanceIds)
+    self.assertEqual(self.callCount,expectedCalls)
+  #endDef
+
+
+  def testGetHosts(self):
+    instanceIds = ["i-%017x" % i for i in range(150)]
+    expectedCalls = self._addResponses(instanceIds)
+    self.bootstrap._getStackEC2Instances = lambda stackIds: instanceIds
+    self.bootstrap.ec2Client = self.ec2Client
+    with self.stubber:
+      self.bootstrap._getHosts(['stack'])
+      self.stubber.assert_no_pending_responses()
+    #endWith
+    self.assertEqual(self.bootstrap.bootHost.instanceId,instanceIds[0])
+    self.assertEqual([host.instanceId for host in self.bootstrap.hosts['worker']],instanceIds[1:])
+    self.assertEqual(self.callCount,expectedCalls)
+    self.assertEqual(self.callCount,2)
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -0,0 +1,176 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the streaming load of yapl.docker.ImageArchiveLoader with a fake docker engine
+  API over a gzip compressed tar of docker save tar files, the layout of the ICP install
+  archive.  Each docker save tar file must be sent to the load API as it is read, the
+  images the engine reports must be returned and the tee file must be a byte for byte
+  copy of the archive.  A wrong SHA-256 must remove the tee file.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tarfile
+import tempfile
+import unittest
+from StringIO import StringIO
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+from yapl.docker.ImageArchiveLoader import ImageArchiveLoader
+from yapl.distribution.ArtifactServer import ArtifactServer
+from yapl.exceptions.ICPExceptions import ICPInstallationException
+
+Trace.configureTrace("*=warning")
+
+Key = "3.1.2/icp-install-archive.tgz"
+
+# The repo tags of the images of each docker save tar file of the archive.
+Images = [ ("images/icp-inception.tar", ['icp-inception:3.1.2']),
+           ("images/icp-platform.tar", ['icp-platform-api:3.1.2','icp-router:3.1.2']) ]
+
+
+class FakeDockerAPI(object):
+
+  def __init__(self):
+    self.loads = []
+  #endDef
+
+  def load_image(self, data):
+    """
+      Read the whole request body, a docker save tar stream, and report its images the way
+      the docker engine does.
+    """
+    body = ''.join(data)
+    archive = tarfile.open(fileobj=StringIO(body),mode='r:')
+    manifest = json.load(archive.extractfile('manifest.json'))
+    self.loads.append(len(body))
+    return iter([{'stream': "Loaded image: %s\n" % repoTag} for entry in manifest for repoTag in entry['RepoTags']])
+  #endDef
+
+#endClass
+
+
+class FakeDockerClient(object):
+
+  def __init__(self):
+    self.api = FakeDockerAPI()
+  #endDef
+
+#endClass
+
+
+def addMember(archive, name, data):
+  """
+    Add a regular file with the given name and data to the given tar archive.
+  """
+  tarInfo = tarfile.TarInfo(name)
+  tarInfo.size = len(data)
+  archive.addfile(tarInfo,StringIO(data))
+#endDef
+
+
+def getDockerSaveData(repoTags):
+  """
+    Return the data of a docker save tar file with an image for each of the given repo tags.
+  """
+  data = StringIO()
+  archive = tarfile.open(fileobj=data,mode='w:')
+  manifest = []
+  for repoTag in repoTags:
+    configId = hashlib.sha256(repoTag).hexdigest()
+    addMember(archive,"%s/layer.tar" % configId,os.urandom(4096))
+    addMember(archive,"%s.json" % configId,"{}")
+    manifest.append({'Config': "%s.json" % configId, 'RepoTags': [repoTag], 'Layers': ["%s/layer.tar" % configId]})
+  #endFor
+  addMember(archive,"manifest.json",json.dumps(manifest))
+  archive.close()
+  return data.getvalue()
+#endDef
+
+
+class ImageArchiveLoaderTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.dockerClient = FakeDockerClient()
+    # A small buffer so each docker save tar file is sent in several chunks.
+    self.loader = ImageArchiveLoader(self.dockerClient,bufferSize=1024)
+    self.teePath = os.path.join(self.tempDir,"icp-install-archive.tgz.part")
+
+    data = StringIO()
+    archive = tarfile.open(fileobj=data,mode='w:gz')
+    for name, repoTags in Images:
+      addMember(archive,name,getDockerSaveData(repoTags))
+    #endFor
+    archive.close()
+    self.archiveData = data.getvalue()
+    self.sha256 = hashlib.sha256(self.archiveData).hexdigest()
+  #endDef
+
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+  #endDef
+
+
+  def _read(self, path):
+    with open(path,'rb') as readFile:
+      return readFile.read()
+    #endWith
+  #endDef
+
+
+  def _checkResult(self, result):
+    self.assertEqual(result['images'],['icp-inception:3.1.2','icp-platform-api:3.1.2','icp-router:3.1.2'])
+    self.assertEqual(result['bytes'],len(self.archiveData))
+    self.assertTrue(result['timeToFirstImage'] <= result['wallTime'])
+    self.assertEqual(len(self.dockerClient.api.loads),len(Images))
+  #endDef
+
+
+  def testLoadFromStream(self):
+    result = self.loader.loadFromStream(StringIO(self.archiveData),teePath=self.teePath,sha256=self.sha256)
+    self._checkResult(result)
+    self.assertEqual(self._read(self.teePath),self.archiveData)
+  #endDef
+
+
+  def testChecksumMismatch(self):
+    self.assertRaises(ICPInstallationException,self.loader.loadFromStream,StringIO(self.archiveData),
+                      teePath=self.teePath,sha256="0" * 64)
+    self.assertFalse(os.path.exists(self.teePath))
+  #endDef
+
+
+  def testLoadFromURL(self):
+    servedPath = os.path.join(self.tempDir,"served.tgz")
+    with open(servedPath,'wb') as servedFile:
+      servedFile.write(self.archiveData)
+    #endWith
+    server = ArtifactServer({Key: servedPath},port=0,bindAddress='127.0.0.1')
+    server.start()
+    try:
+      result = self.loader.loadFromURL("%s/%s" % (server.getURL('127.0.0.1'),Key),teePath=self.teePath,sha256=self.sha256)
+    finally:
+      server.stop()
+    #endTry
+    self._checkResult(result)
+    self.assertEqual(self._read(self.teePath),self.archiveData)
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -0,0 +1,190 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the comparison of an archive of docker save tar files, the layout of the ICP
+  install archive, with the local images by yapl.docker.ImageIndex with a fake docker
+  client.  A docker save tar file whose images are all present must be reported present
+  and its missing tags added, any other tar file must be reported missing so it is loaded.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import json
+import shutil
+import tarfile
+import tempfile
+import unittest
+from StringIO import StringIO
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+from yapl.docker.ImageIndex import ImageIndex
+
+Trace.configureTrace("*=warning")
+
+InceptionId = "a" * 64
+PlatformId = "b" * 64
+
+
+class FakeImage(object):
+
+  def __init__(self, imageId, tags):
+    self.id = "sha256:%s" % imageId
+    self.tags = tags
+    self.attrs = {}
+  #endDef
+
+#endClass
+
+
+class FakeImages(object):
+
+  def __init__(self):
+    self.images = []
+  #endDef
+
+  def list(self):
+    return list(self.images)
+  #endDef
+
+#endClass
+
+
+class FakeDockerAPI(object):
+
+  def __init__(self, images):
+    self.images = images
+  #endDef
+
+  def tag(self, imageId, repository, tag=None):
+    for image in self.images.images:
+      if (image.id == imageId):
+        image.tags.append("%s:%s" % (repository,tag))
+      #endIf
+    #endFor
+  #endDef
+
+#endClass
+
+
+class FakeDockerClient(object):
+
+  def __init__(self):
+    self.images = FakeImages()
+    self.api = FakeDockerAPI(self.images)
+  #endDef
+
+#endClass
+
+
+def addMember(archive, name, data):
+  """
+    Add a regular file with the given name and data to the given tar archive.
+  """
+  tarInfo = tarfile.TarInfo(name)
+  tarInfo.size = len(data)
+  archive.addfile(tarInfo,StringIO(data))
+#endDef
+
+
+def getDockerSaveData(configId, repoTags, withManifest=True):
+  """
+    Return the data of a docker save tar file of one image, manifest.json last.
+  """
+  data = StringIO()
+  archive = tarfile.open(fileobj=data,mode='w:')
+  addMember(archive,"%s/layer.tar" % configId,"layer")
+  addMember(archive,"%s.json" % configId,"{}")
+  if (withManifest):
+    manifest = [{'Config': "%s.json" % configId, 'RepoTags': repoTags, 'Layers': ["%s/layer.tar" % configId]}]
+    addMember(archive,"manifest.json",json.dumps(manifest))
+  #endIf
+  archive.close()
+  return data.getvalue()
+#endDef
+
+
+class ImageIndexTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.dockerClient = FakeDockerClient()
+    self.imageIndex = ImageIndex(self.dockerClient)
+    self.archivePath = os.path.join(self.tempDir,"icp-install-archive.tgz")
+  #endDef
+
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+  #endDef
+
+
+  def _writeArchive(self, withManifest=True):
+    with open(self.archivePath,'wb') as archiveFile:
+      archive = tarfile.open(fileobj=archiveFile,mode='w:gz')
+      addMember(archive,"images/icp-inception.tar",getDockerSaveData(InceptionId,['icp-inception:3.1.2','icp-inception:latest']))
+      addMember(archive,"images/icp-platform.tar",getDockerSaveData(PlatformId,['icp-platform-api:3.1.2'],withManifest))
+      addMember(archive,"images/README","Not images.")
+      archive.close()
+    #endWith
+  #endDef
+
+
+  def testNoLocalImages(self):
+    # Nothing can be present, the archive is not read.
+    self.assertEqual(self.imageIndex.compareArchiveMembers(os.path.join(self.tempDir,"missing.tgz")),([],None))
+  #endDef
+
+
+  def testSomePresent(self):
+    self._writeArchive()
+    inception = FakeImage(InceptionId,['icp-inception:3.1.2'])
+    self.dockerClient.images.images.append(inception)
+
+    present, missing = self.imageIndex.compareArchiveMembers(self.archivePath)
+    self.assertEqual(present,["images/icp-inception.tar"])
+    self.assertEqual(missing,["images/icp-platform.tar"])
+    self.assertEqual(inception.tags,['icp-inception:3.1.2','icp-inception:latest'])
+  #endDef
+
+
+  def testAllPresent(self):
+    self._writeArchive()
+    self.dockerClient.images.images.append(FakeImage(InceptionId,['icp-inception:3.1.2','icp-inception:latest']))
+    self.dockerClient.images.images.append(FakeImage(PlatformId,['icp-platform-api:3.1.2']))
+    self.assertEqual(self.imageIndex.compareArchiveMembers(self.archivePath),(["images/icp-inception.tar","images/icp-platform.tar"],[]))
+  #endDef
+
+
+  def testNoManifest(self):
+    self._writeArchive(withManifest=False)
+    self.dockerClient.images.images.append(FakeImage(InceptionId,['icp-inception:3.1.2','icp-inception:latest']))
+    self.dockerClient.images.images.append(FakeImage(PlatformId,['icp-platform-api:3.1.2']))
+    self.assertEqual(self.imageIndex.compareArchiveMembers(self.archivePath),(["images/icp-inception.tar"],["images/icp-platform.tar"]))
+  #endDef
+
+
+  def testUnreadableArchive(self):
+    self._writeArchive()
+    with open(self.archivePath,'rb') as archiveFile:
+      data = archiveFile.read()
+    #endWith
+    with open(self.archivePath,'wb') as archiveFile:
+      archiveFile.write(data[:len(data) / 2])
+    #endWith
+    self.dockerClient.images.images.append(FakeImage(InceptionId,['icp-inception:3.1.2']))
+    self.assertEqual(self.imageIndex.compareArchiveMembers(self.archivePath),([],None))
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -0,0 +1,263 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of yapl.docker.IndexedImageLoader with a fake docker engine API that reads the
+  load request streams.
+
+  The archives are built in the two layouts the loader indexes: a docker save archive
+  and an archive of docker save tar files, the layout of the ICP install archive.  In the
+  nested layout the images of all of the docker save archives are loaded one request per
+  image, a layer shared by two images is streamed once and an image in two of the docker
+  save archives is loaded once with all of its tags.  An archive with some other layout
+  must be rejected from the head of the compressed stream, before it is decompressed to
+  the work file.  An archive that can not be indexed or decompressed must be rejected
+  with nothing loaded and nothing left behind.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import json
+import shutil
+import tarfile
+import tempfile
+import threading
+import unittest
+from StringIO import StringIO
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+from yapl.docker.IndexedImageLoader import IndexedImageLoader, DockerSaveLayout, NestedLayout
+from yapl.exceptions.Exceptions import InvalidArgumentException
+
+Trace.configureTrace("*=warning")
+
+
+def getId(name):
+  """
+    Return a 64 hex digit ID made from the given short name.
+  """
+  return (name.encode('hex') * 64)[:64]
+#endDef
+
+
+# Images as (config name, repo tags, layer names).  Image A is in both docker save archives.
+ImageA = ('a', ['icp-inception:3.1.2'], ['base', 'inception'])
+ImageATagged = ('a', ['ibmcom/icp-inception-amd64:3.1.2-ee'], ['base', 'inception'])
+ImageB = ('b', ['icp-platform-api:3.1.2'], ['base', 'platform'])
+ImageC = ('c', ['icp-router:3.1.2'], ['router'])
+
+
+class FakeDockerAPI(object):
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.loads = {}
+  #endDef
+
+  def load_image(self, data):
+    """
+      Record the members of the load request by the repo tags of its manifest.
+    """
+    archive = tarfile.open(fileobj=StringIO(''.join(data)),mode='r:')
+    members = dict([(member.name,archive.extractfile(member).read()) for member in archive if member.isfile()])
+    manifest = json.loads(members.pop('manifest.json'))
+    with self.lock:
+      self.loads[manifest[0]['RepoTags'][0]] = members
+    #endWith
+    return []
+  #endDef
+
+#endClass
+
+
+class FakeDockerClient(object):
+
+  def __init__(self):
+    self.api = FakeDockerAPI()
+  #endDef
+
+#endClass
+
+
+def addMember(archive, name, data):
+  """
+    Add a regular file with the given name and data to the given tar archive.
+  """
+  tarInfo = tarfile.TarInfo(name)
+  tarInfo.size = len(data)
+  archive.addfile(tarInfo,StringIO(data))
+#endDef
+
+
+def getLayerName(layer):
+  return "%s/layer.tar" % getId(layer)
+#endDef
+
+
+def getConfigName(config):
+  return "%s.json" % getId(config)
+#endDef
+
+
+def addDockerSaveMembers(archive, images, withManifest=True):
+  """
+    Add the members of a docker save archive of the given images to the given tar archive.
+  """
+  layers = []
+  for config, repoTags, imageLayers in images:
+    for layer in imageLayers:
+      if (layer not in layers):
+        layers.append(layer)
+        addMember(archive,"%s/VERSION" % getId(layer),"1.0")
+        addMember(archive,getLayerName(layer),"layer %s" % layer)
+      #endIf
+    #endFor
+    addMember(archive,getConfigName(config),'{"config": "%s"}' % config)
+  #endFor
+
+  if (withManifest):
+    manifest = [{'Config': getConfigName(config), 'RepoTags': repoTags, 'Layers': [getLayerName(layer) for layer in imageLayers]}
+                for config, repoTags, imageLayers in images]
+    addMember(archive,"manifest.json",json.dumps(manifest))
+  #endIf
+#endDef
+
+
+def getDockerSaveData(images, withManifest=True):
+  """
+    Return the data of a docker save tar file of the given images.
+  """
+  data = StringIO()
+  archive = tarfile.open(fileobj=data,mode='w:')
+  addDockerSaveMembers(archive,images,withManifest)
+  archive.close()
+  return data.getvalue()
+#endDef
+
+
+class IndexedImageLoaderTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.dockerClient = FakeDockerClient()
+    self.loader = IndexedImageLoader(self.dockerClient,maxWorkers=2)
+    self.archivePath = os.path.join(self.tempDir,"icp-install-archive.tgz")
+    self.workPath = os.path.join(self.tempDir,"icp-install-archive.tar")
+  #endDef
+
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+  #endDef
+
+
+  def _writeNestedArchive(self, withManifest=True):
+    """
+      Write an archive of two docker save tar files, the layout of the ICP install archive.
+    """
+    with open(self.archivePath,'wb') as archiveFile:
+      archive = tarfile.open(fileobj=archiveFile,mode='w:gz')
+      addMember(archive,"ibm-cloud-private-x86_64/icp-inception.tar",getDockerSaveData([ImageA]))
+      addMember(archive,"ibm-cloud-private-x86_64/icp-platform.tar",getDockerSaveData([ImageB,ImageATagged,ImageC],withManifest))
+      archive.close()
+    #endWith
+  #endDef
+
+
+  def testDockerSaveArchive(self):
+    with open(self.archivePath,'wb') as archiveFile:
+      archive = tarfile.open(fileobj=archiveFile,mode='w:gz')
+      addDockerSaveMembers(archive,[ImageC])
+      archive.close()
+    #endWith
+
+    self.assertEqual(self.loader.getArchiveLayout(self.archivePath),DockerSaveLayout)
+    results = self.loader.loadImages(self.archivePath,self.workPath)
+    self.assertEqual([result['image'] for result in results],['icp-router:3.1.2'])
+    self.assertEqual(self.dockerClient.api.loads,{'icp-router:3.1.2': {getConfigName('c'): '{"config": "c"}', getLayerName('router'): "layer router"}})
+    self.assertEqual(os.listdir(self.tempDir),["icp-install-archive.tgz"])
+  #endDef
+
+
+  def testArchiveOfDockerSaveFiles(self):
+    self._writeNestedArchive()
+
+    self.assertEqual(self.loader.getArchiveLayout(self.archivePath),NestedLayout)
+    results = self.loader.loadImages(self.archivePath,self.workPath)
+
+    # Image A is loaded once with the tags it has in both docker save archives.
+    self.assertEqual([result['image'] for result in results],['icp-inception:3.1.2','icp-platform-api:3.1.2','icp-router:3.1.2'])
+    self.assertEqual(self.loader.manifest[0]['RepoTags'],['icp-inception:3.1.2','ibmcom/icp-inception-amd64:3.1.2-ee'])
+
+    # The base layer is owned by image A, image B leaves its data out.
+    loads = self.dockerClient.api.loads
+    self.assertEqual(sorted(loads.keys()),['icp-inception:3.1.2','icp-platform-api:3.1.2','icp-router:3.1.2'])
+    self.assertEqual(loads['icp-inception:3.1.2'],{getConfigName('a'): '{"config": "a"}',
+                                                   getLayerName('base'): "layer base",
+                                                   getLayerName('inception'): "layer inception"})
+    self.assertEqual(loads['icp-platform-api:3.1.2'],{getConfigName('b'): '{"config": "b"}',
+                                                      getLayerName('platform'): "layer platform"})
+    self.assertEqual(loads['icp-router:3.1.2'],{getConfigName('c'): '{"config": "c"}',
+                                                getLayerName('router'): "layer router"})
+    self.assertFalse(os.path.exists(self.workPath))
+  #endDef
+
+
+  def testNestedArchiveWithoutManifest(self):
+    self._writeNestedArchive(withManifest=False)
+    self.assertRaises(InvalidArgumentException,self.loader.loadImages,self.archivePath,self.workPath)
+    self.assertFalse(os.path.exists(self.workPath))
+    self.assertEqual(self.dockerClient.api.loads,{})
+  #endDef
+
+
+  def testOtherLayout(self):
+    with open(self.archivePath,'wb') as archiveFile:
+      archive = tarfile.open(fileobj=archiveFile,mode='w:gz')
+      addMember(archive,"README.txt","Not images.")
+      addMember(archive,"icp-inception.tar",getDockerSaveData([ImageA]))
+      archive.close()
+    #endWith
+
+    self.assertEqual(self.loader.getArchiveLayout(self.archivePath),None)
+    self.loader._decompress = lambda archivePath, workPath: self.fail("The archive must not be decompressed.")
+    self.assertRaises(InvalidArgumentException,self.loader.loadImages,self.archivePath,self.workPath)
+    self.assertFalse(os.path.exists(self.workPath))
+    self.assertEqual(self.dockerClient.api.loads,{})
+  #endDef
+
+
+  def testDecompressionFailure(self):
+    with open(self.archivePath,'wb') as archiveFile:
+      archive = tarfile.open(fileobj=archiveFile,mode='w:gz')
+      addDockerSaveMembers(archive,[ImageC])
+      archive.close()
+    #endWith
+
+    # A work path the decompression can not write, as with a full file system.
+    workPath = os.path.join(self.tempDir,"missing","images.tar")
+    self.assertRaises(InvalidArgumentException,self.loader.loadImages,self.archivePath,workPath)
+
+    truncatedPath = os.path.join(self.tempDir,"truncated.tgz")
+    with open(truncatedPath,'wb') as truncatedFile:
+      with open(self.archivePath,'rb') as archiveFile:
+        truncatedFile.write(archiveFile.read()[:-16])
+      #endWith
+    #endWith
+    self.assertRaises(InvalidArgumentException,self.loader.loadImages,truncatedPath,self.workPath)
+    self.assertFalse(os.path.exists(self.workPath))
+    self.assertEqual(self.dockerClient.api.loads,{})
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -0,0 +1,166 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the incremental export of yapl.aws.LogExporter with an in-memory S3 bucket in
+  place of the S3Helper.  The objects of a log in the bucket, the log object and its part
+  objects, must always concatenate to the log, also after a failed export.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+import yapl.aws.LogExporter as LogExporterModule
+from yapl.aws.LogExporter import LogExporter
+
+# A failed export is traced as an error, it is expected here.
+Trace.configureTrace("*=off")
+
+KeyPrefix = "logs/teststack/boot/boot.example.com"
+
+
+class FakeS3Helper(object):
+  """
+    S3Helper with the objects of one bucket in a dictionary.  The keys in failKeys fail
+    to upload and delete_objects() fails while failDelete is True.
+  """
+
+  def __init__(self, region=None):
+    self.objects = {}
+    self.failKeys = set()
+    self.failDelete = False
+  #endDef
+
+  def bucketExists(self, bucketName):
+    return True
+  #endDef
+
+  def put_object(self, Bucket=None, Key=None, Body=None, **kwargs):
+    if (Key in self.failKeys):
+      raise Exception("Upload of: %s failed." % Key)
+    #endIf
+    self.objects[Key] = Body.read()
+  #endDef
+
+  def delete_objects(self, Bucket=None, Delete=None):
+    if (self.failDelete):
+      raise Exception("Delete failed.")
+    #endIf
+    for deleteObject in Delete['Objects']:
+      self.objects.pop(deleteObject['Key'],None)
+    #endFor
+  #endDef
+
+#endClass
+
+
+class LogExporterTest(unittest.TestCase):
+
+  def setUp(self):
+    self.logsDirectory = tempfile.mkdtemp()
+    self.logPath = os.path.join(self.logsDirectory,"a.log")
+    self.savedS3Helper = LogExporterModule.S3Helper
+    LogExporterModule.S3Helper = FakeS3Helper
+    self.exporter = LogExporter(region='us-east-1',bucket='testbucket',keyPrefix='logs/teststack',role='boot',
+                                fqdn='boot.example.com',incremental=True)
+    self.s3 = self.exporter.s3Helper
+  #endDef
+
+
+  def tearDown(self):
+    LogExporterModule.S3Helper = self.savedS3Helper
+    shutil.rmtree(self.logsDirectory)
+  #endDef
+
+
+  def _append(self, line):
+    with open(self.logPath,'a') as logFile:
+      logFile.write(line)
+    #endWith
+  #endDef
+
+
+  def _export(self):
+    """
+      Export the logs and return the action of the export of a.log.
+    """
+    report = self.exporter.exportLogs(self.logsDirectory)
+    return report[0]['action']
+  #endDef
+
+
+  def _getExported(self):
+    """
+      Return the log as the concatenation of its objects in the bucket.
+    """
+    keys = sorted([key for key in self.s3.objects if key.startswith("%s/a.log" % KeyPrefix)])
+    return ''.join([self.s3.objects[key] for key in keys])
+  #endDef
+
+
+  def testAppend(self):
+    self._append("line1\n")
+    self.assertEqual(self._export(),'full')
+    self._append("line2\n")
+    self.assertEqual(self._export(),'append')
+    self.assertEqual(self._export(),'skipped')
+    self.assertEqual(sorted(self.s3.objects),["%s/a.log" % KeyPrefix,"%s/a.log.part-0001" % KeyPrefix])
+    self.assertEqual(self._getExported(),"line1\nline2\n")
+  #endDef
+
+
+  def testFailedAppend(self):
+    self._append("line1\n")
+    self._export()
+    self._append("line2\n")
+    self._export()
+
+    # The upload of the second part fails, the log is exported whole the next time.
+    self._append("line3\n")
+    self.s3.failKeys.add("%s/a.log.part-0002" % KeyPrefix)
+    report = self.exporter.exportLogs(self.logsDirectory)
+    self.assertTrue(report[0]['error'])
+    self.s3.failKeys.clear()
+
+    self.assertEqual(self._export(),'full')
+    self.assertEqual(sorted(self.s3.objects),["%s/a.log" % KeyPrefix])
+    self.assertEqual(self._getExported(),"line1\nline2\nline3\n")
+  #endDef
+
+
+  def testFailedPartDelete(self):
+    self._append("line1\n")
+    self._export()
+    self._append("line2\n")
+    self._export()
+
+    # The log is rewritten, the export of it whole can not delete its part.
+    with open(self.logPath,'w') as logFile:
+      logFile.write("rewritten\n")
+    #endWith
+    self.s3.failDelete = True
+    self.assertEqual(self._export(),'full')
+    self.s3.failDelete = False
+
+    self._append("line2\n")
+    self.assertEqual(self._export(),'full')
+    self.assertEqual(sorted(self.s3.objects),["%s/a.log" % KeyPrefix])
+    self.assertEqual(self._getExported(),"rewritten\nline2\n")
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -0,0 +1,226 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of yapl.utilities.RangedDownloader with downloads from a local
+  yapl.distribution.ArtifactServer.  An object of several chunks is downloaded over
+  several connections and checked byte for byte and with its SHA-256.  A download is
+  resumed from a sidecar with some of the ranges completed, only the other ranges are
+  fetched.  A download with the wrong SHA-256 is rejected and leaves nothing behind.
+  A range that gets a 503 is retried.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+  or run this module to print the report of the download throughput by the number of
+  connections:
+    python YAPythonLibrary/test/test_RangedDownloader.py report
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+
+import yapl.utilities.Trace as Trace
+from yapl.utilities.RangedDownloader import RangedDownloader, PartsFileSuffix
+from yapl.distribution.ArtifactServer import ArtifactServer, ArtifactRequestHandler
+from yapl.exceptions.Exceptions import FileTransferException
+
+# The retries are traced as warnings, they are expected here.
+Trace.configureTrace("*=error")
+
+Key = "3.1.2/icp-install-archive.tgz"
+ChunkSize = 64 * 1024
+
+# Seven full chunks and a short last one.
+ObjectSize = 7 * ChunkSize + 1234
+
+
+class FakeProgress(object):
+  """
+    TransferProgress that adds up the bytes it is given.
+  """
+
+  def __init__(self):
+    self.total = None
+    self.byteCount = 0
+    self.lock = threading.Lock()
+  #endDef
+
+  def setTotal(self, total):
+    self.total = total
+  #endDef
+
+  def update(self, byteCount):
+    with self.lock:
+      self.byteCount += byteCount
+    #endWith
+  #endDef
+
+#endClass
+
+
+class RangedDownloaderTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.content = os.urandom(ObjectSize)
+    self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    servedPath = os.path.join(self.tempDir,"served.tgz")
+    with open(servedPath,'wb') as servedFile:
+      servedFile.write(self.content)
+    #endWith
+    self.server = ArtifactServer({Key: servedPath},port=0,bindAddress='127.0.0.1')
+    self.server.start()
+    self.url = "%s/%s" % (self.server.getURL('127.0.0.1'),Key)
+    self.destPath = os.path.join(self.tempDir,"icp-install-archive.tgz")
+    self.partsPath = "%s%s" % (self.destPath,PartsFileSuffix)
+    self.savedGET = ArtifactRequestHandler.do_GET
+  #endDef
+
+
+  def tearDown(self):
+    ArtifactRequestHandler.do_GET = self.savedGET
+    self.server.stop()
+    shutil.rmtree(self.tempDir)
+  #endDef
+
+
+  def _read(self, path):
+    with open(path,'rb') as readFile:
+      return readFile.read()
+    #endWith
+  #endDef
+
+
+  def testRangedDownload(self):
+    downloader = RangedDownloader(chunkSize=ChunkSize,maxConnections=4)
+    progress = FakeProgress()
+    self.assertEqual(downloader.download(self.url,self.destPath,sha256=self.sha256,progress=progress),ObjectSize)
+    self.assertEqual(self._read(self.destPath),self.content)
+    self.assertFalse(os.path.exists(self.partsPath))
+    self.assertEqual((progress.total,progress.byteCount),(ObjectSize,ObjectSize))
+    self.assertEqual((downloader.resumedBytes,downloader.retryCount),(0,0))
+  #endDef
+
+
+  def testResume(self):
+    downloader = RangedDownloader(chunkSize=ChunkSize,maxConnections=4)
+    size, rangesSupported, etag = downloader.probe(self.url)
+    self.assertEqual((size,rangesSupported),(ObjectSize,True))
+
+    # An interrupted download: the first and third ranges are on disk and recorded.
+    completed = [0, 2 * ChunkSize]
+    with open(self.destPath,'wb') as destFile:
+      destFile.truncate(ObjectSize)
+      for first in completed:
+        destFile.seek(first)
+        destFile.write(self.content[first:first + ChunkSize])
+      #endFor
+    #endWith
+    with open(self.partsPath,'w') as partsFile:
+      json.dump({'size': ObjectSize, 'etag': etag, 'chunkSize': ChunkSize, 'completed': completed},partsFile)
+    #endWith
+
+    progress = FakeProgress()
+    self.assertEqual(downloader.download(self.url,self.destPath,sha256=self.sha256,progress=progress),ObjectSize)
+    self.assertEqual(self._read(self.destPath),self.content)
+    self.assertFalse(os.path.exists(self.partsPath))
+    self.assertEqual(downloader.resumedBytes,2 * ChunkSize)
+    self.assertEqual((progress.total,progress.byteCount),(ObjectSize - 2 * ChunkSize,ObjectSize - 2 * ChunkSize))
+  #endDef
+
+
+  def testChecksumMismatch(self):
+    downloader = RangedDownloader(chunkSize=ChunkSize,maxConnections=4)
+    self.assertRaises(FileTransferException,downloader.download,self.url,self.destPath,sha256="0" * 64)
+    self.assertFalse(os.path.exists(self.destPath))
+    self.assertFalse(os.path.exists(self.partsPath))
+
+    downloader = RangedDownloader(chunkSize=ObjectSize,maxConnections=1)
+    self.assertRaises(FileTransferException,downloader.download,self.url,self.destPath,sha256="0" * 64)
+    self.assertFalse(os.path.exists(self.destPath))
+  #endDef
+
+
+  def testRetry(self):
+    # The first GET of each of two ranges after the first one gets a 503.
+    failures = set([ChunkSize, 4 * ChunkSize])
+    lock = threading.Lock()
+    savedGET = self.savedGET
+
+    def flakyGET(handler):
+      rangeHeader = handler.headers.get('Range','')
+      with lock:
+        first = int(rangeHeader[len('bytes='):].split('-')[0] or 0) if rangeHeader else 0
+        fail = first in failures
+        failures.discard(first)
+      #endWith
+      if (fail):
+        handler.send_error(503,"Slow down")
+      else:
+        savedGET(handler)
+      #endIf
+    #endDef
+    ArtifactRequestHandler.do_GET = flakyGET
+
+    downloader = RangedDownloader(chunkSize=ChunkSize,maxConnections=4,retryDelay=0.01,maxRetryDelay=0.05)
+    self.assertEqual(downloader.download(self.url,self.destPath,sha256=self.sha256),ObjectSize)
+    self.assertEqual(self._read(self.destPath),self.content)
+    self.assertEqual(downloader.retryCount,2)
+  #endDef
+
+#endClass
+
+
+def report(size=256 * 1024 * 1024, chunkSize=16 * 1024 * 1024, connectionCounts=(1,2,4,8)):
+  """
+    Print the wall time and throughput of a download from a local ArtifactServer by the number of connections.
+  """
+  tempDir = tempfile.mkdtemp()
+  try:
+    servedPath = os.path.join(tempDir,"served.tgz")
+    with open(servedPath,'wb') as servedFile:
+      for i in range(0,size,chunkSize):
+        servedFile.write(os.urandom(min(chunkSize,size - i)))
+      #endFor
+    #endWith
+    server = ArtifactServer({Key: servedPath},port=0,bindAddress='127.0.0.1')
+    server.start()
+    try:
+      url = "%s/%s" % (server.getURL('127.0.0.1'),Key)
+      print("Object: %d MB, chunk size: %d MB" % (size / (1024 * 1024),chunkSize / (1024 * 1024)))
+      print("%11s %10s %8s" % ("connections","time (s)","MB/s"))
+      for connections in connectionCounts:
+        destPath = os.path.join(tempDir,"download-%d.tgz" % connections)
+        startTime = time.time()
+        RangedDownloader(chunkSize=chunkSize,maxConnections=connections).download(url,destPath)
+        wallTime = time.time() - startTime
+        print("%11d %10.2f %8.1f" % (connections,wallTime,size / (1024.0 * 1024.0) / wallTime))
+        os.remove(destPath)
+      #endFor
+    finally:
+      server.stop()
+    #endTry
+  finally:
+    shutil.rmtree(tempDir)
+  #endTry
+#endDef
+
+
+if __name__ == '__main__':
+  if (sys.argv[1:] == ['report']):
+    report()
+  else:
+    unittest.main()
+  #endIf
+#endIf
@@ -0,0 +1,233 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the EC2 instance discovery of Bootstrap._getStackEC2Instances() and
+  Bootstrap._getAutoScalingGroupEC2Instances() with stubbed CloudFormation and
+  AutoScaling clients.  All of the pages of the resources of a stack must be seen, the
+  auto-scaling groups of all of the stacks must be resolved in batches of
+  AutoScalingGroupChunkSize names, and the instances must be merged in the order of the
+  stacks and of the resources in each stack, whatever order the stacks are listed in.
+
+  The stacks are listed concurrently, so the stubbed responses of one Stubber, which are
+  returned in the order of the calls, can not be used for list_stack_resources() with
+  more than one worker.  The concurrent test answers list_stack_resources() by stack name
+  from a before-call handler instead, the way the Stubber does.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import time
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+sys.path.insert(0,os.path.join(ScriptsHome,"aws-icp-bootstrap"))
+
+import botocore.session
+from botocore.stub import Stubber
+from botocore.awsrequest import AWSResponse
+
+from bootstrap import Bootstrap, AutoScalingGroupChunkSize
+
+
+def getInstanceResource(instanceId):
+  return { 'LogicalResourceId': "Instance%s" % instanceId[-4:],
+           'PhysicalResourceId': instanceId,
+           'ResourceType': 'AWS::EC2::Instance',
+           'ResourceStatus': 'CREATE_COMPLETE',
+           'LastUpdatedTimestamp': '2026-10-18T00:00:00Z'
+         }
+#endDef
+
+
+def getASGResource(asgName):
+  return { 'LogicalResourceId': "ASG%s" % asgName[-4:],
+           'PhysicalResourceId': asgName,
+           'ResourceType': 'AWS::AutoScaling::AutoScalingGroup',
+           'ResourceStatus': 'CREATE_COMPLETE',
+           'LastUpdatedTimestamp': '2026-10-18T00:00:00Z'
+         }
+#endDef
+
+
+def getOtherResource(name):
+  return { 'LogicalResourceId': name,
+           'PhysicalResourceId': name,
+           'ResourceType': 'AWS::EC2::SecurityGroup',
+           'ResourceStatus': 'CREATE_COMPLETE',
+           'LastUpdatedTimestamp': '2026-10-18T00:00:00Z'
+         }
+#endDef
+
+
+def getASG(asgName, instanceIds):
+  return { 'AutoScalingGroupName': asgName,
+           'MinSize': len(instanceIds),
+           'MaxSize': len(instanceIds),
+           'DesiredCapacity': len(instanceIds),
+           'DefaultCooldown': 300,
+           'AvailabilityZones': ['us-east-1a'],
+           'HealthCheckType': 'EC2',
+           'CreatedTime': '2026-10-18T00:00:00Z',
+           'Instances': [ { 'InstanceId': instanceId,
+                            'AvailabilityZone': 'us-east-1a',
+                            'LifecycleState': 'InService',
+                            'HealthStatus': 'Healthy',
+                            'ProtectedFromScaleIn': False
+                          } for instanceId in instanceIds ]
+         }
+#endDef
+
+
+def getASGInstanceIds(asgName, count=2):
+  return ["i-%s%02d" % (asgName.split('-')[-1],i) for i in range(count)]
+#endDef
+
+
+class StackEC2InstancesTest(unittest.TestCase):
+
+  def setUp(self):
+    session = botocore.session.get_session()
+    self.cfnClient = session.create_client('cloudformation',region_name='us-east-1',
+                                           aws_access_key_id='testing',
+                                           aws_secret_access_key='testing')
+    self.asgClient = session.create_client('autoscaling',region_name='us-east-1',
+                                           aws_access_key_id='testing',
+                                           aws_secret_access_key='testing')
+    self.cfnStubber = Stubber(self.cfnClient)
+    self.asgStubber = Stubber(self.asgClient)
+    self.callCounts = {}
+    self.cfnClient.meta.events.register('before-parameter-build.cloudformation.ListStackResources',self._countCall)
+    self.asgClient.meta.events.register('before-parameter-build.autoscaling.DescribeAutoScalingGroups',self._countCall)
+    self.bootstrap = Bootstrap()
+  #endDef
+
+
+  def _countCall(self, event_name=None, **kwargs):
+    operation = event_name.split('.')[-1]
+    self.callCounts[operation] = self.callCounts.get(operation,0) + 1
+  #endDef
+
+
+  def _addASGResponses(self, asgNames, pageSize=None):
+    """
+      Queue the stubbed describe_auto_scaling_groups() responses for the chunks of the given
+      auto-scaling group names.  With a pageSize each chunk is returned in pages of pageSize groups.
+    """
+    for i in range(0,len(asgNames),AutoScalingGroupChunkSize):
+      chunk = asgNames[i:i+AutoScalingGroupChunkSize]
+      chunkPageSize = pageSize or len(chunk)
+      for j in range(0,len(chunk),chunkPageSize):
+        response = { 'AutoScalingGroups': [ getASG(asgName,getASGInstanceIds(asgName)) for asgName in chunk[j:j+chunkPageSize] ] }
+        expectedParams = { 'AutoScalingGroupNames': chunk }
+        if (j > 0):
+          expectedParams['NextToken'] = "token-%d" % j
+        #endIf
+        if (j + chunkPageSize < len(chunk)):
+          response['NextToken'] = "token-%d" % (j + chunkPageSize)
+        #endIf
+        self.asgStubber.add_response('describe_auto_scaling_groups',response,expectedParams)
+      #endFor
+    #endFor
+  #endDef
+
+
+  def testAutoScalingGroupBatches(self):
+    asgNames = ["asg-%04d" % i for i in range(2 * AutoScalingGroupChunkSize + 20)]
+    self._addASGResponses(asgNames,pageSize=30)
+    with self.asgStubber:
+      result = self.bootstrap._getAutoScalingGroupEC2Instances(asgNames,asgClient=self.asgClient)
+      self.asgStubber.assert_no_pending_responses()
+    #endWith
+    self.assertEqual(sorted(result.keys()),asgNames)
+    self.assertEqual(result["asg-0077"],getASGInstanceIds("asg-0077"))
+    # Chunks of 50, 50 and 20 names in pages of 30 groups.
+    self.assertEqual(self.callCounts['DescribeAutoScalingGroups'],2 + 2 + 1)
+  #endDef
+
+
+  def testMissingAutoScalingGroup(self):
+    self.asgStubber.add_response('describe_auto_scaling_groups',{'AutoScalingGroups': [getASG("asg-0001",["i-1"])]},
+                                 {'AutoScalingGroupNames': ["asg-0001","asg-0002"]})
+    with self.asgStubber:
+      result = self.bootstrap._getAutoScalingGroupEC2Instances(["asg-0001","asg-0002"],asgClient=self.asgClient)
+    #endWith
+    self.assertEqual(result,{"asg-0001": ["i-1"], "asg-0002": []})
+  #endDef
+
+
+  def testPagedStackResources(self):
+    # The boot stack has two pages of resources, the second one with an auto-scaling group.
+    self.cfnStubber.add_response('list_stack_resources',
+                                 {'StackResourceSummaries': [getInstanceResource("i-boot"),getOtherResource("SecurityGroup")],
+                                  'NextToken': "token-1"},
+                                 {'StackName': "boot-stack"})
+    self.cfnStubber.add_response('list_stack_resources',
+                                 {'StackResourceSummaries': [getASGResource("asg-master"),getInstanceResource("i-proxy")]},
+                                 {'StackName': "boot-stack", 'NextToken': "token-1"})
+    self.cfnStubber.add_response('list_stack_resources',
+                                 {'StackResourceSummaries': [getASGResource("asg-worker"),getASGResource("asg-master")]},
+                                 {'StackName': "worker-stack"})
+    self.asgStubber.add_response('describe_auto_scaling_groups',
+                                 {'AutoScalingGroups': [getASG("asg-worker",getASGInstanceIds("asg-worker",3)),
+                                                        getASG("asg-master",getASGInstanceIds("asg-master"))]},
+                                 {'AutoScalingGroupNames': ["asg-master","asg-worker"]})
+
+    with self.cfnStubber:
+      with self.asgStubber:
+        result = self.bootstrap._getStackEC2Instances(["boot-stack","worker-stack"],cfnClient=self.cfnClient,
+                                                      asgClient=self.asgClient,maxWorkers=1)
+        self.cfnStubber.assert_no_pending_responses()
+        self.asgStubber.assert_no_pending_responses()
+      #endWith
+    #endWith
+
+    self.assertEqual(result,["i-boot"] + getASGInstanceIds("asg-master") + ["i-proxy"] +
+                            getASGInstanceIds("asg-worker",3) + getASGInstanceIds("asg-master"))
+    self.assertEqual(self.callCounts,{'ListStackResources': 3, 'DescribeAutoScalingGroups': 1})
+  #endDef
+
+
+  def testConcurrentMergeOrder(self):
+    stackIds = ["stack-%d" % i for i in range(6)]
+    stackResources = {}
+    for i, stackId in enumerate(stackIds):
+      stackResources[stackId] = [getInstanceResource("i-%d000" % i),getASGResource("asg-%d" % i),getInstanceResource("i-%d001" % i)]
+    #endFor
+
+    def listStackResources(params=None, **kwargs):
+      """
+        Answer list_stack_resources() by stack name, the first stacks last.
+      """
+      stackId = params['body']['StackName']
+      time.sleep(0.02 * (len(stackIds) - stackIds.index(stackId)))
+      return (AWSResponse(None,200,{},None),{'StackResourceSummaries': stackResources[stackId]})
+    #endDef
+    self.cfnClient.meta.events.register('before-call.cloudformation.ListStackResources',listStackResources)
+
+    asgNames = ["asg-%d" % i for i in range(len(stackIds))]
+    self._addASGResponses(asgNames)
+    with self.asgStubber:
+      result = self.bootstrap._getStackEC2Instances(stackIds,cfnClient=self.cfnClient,asgClient=self.asgClient,
+                                                    maxWorkers=len(stackIds))
+      self.asgStubber.assert_no_pending_responses()
+    #endWith
+
+    expected = []
+    for i in range(len(stackIds)):
+      expected.extend(["i-%d000" % i] + getASGInstanceIds("asg-%d" % i) + ["i-%d001" % i])
+    #endFor
+    self.assertEqual(result,expected)
+    self.assertEqual(self.callCounts,{'ListStackResources': len(stackIds), 'DescribeAutoScalingGroups': 1})
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
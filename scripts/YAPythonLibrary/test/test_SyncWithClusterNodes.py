@@ -0,0 +1,157 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Test of the SSM readiness polling of Bootstrap.syncWithClusterNodes() with a stubbed
+  SSM client.  The SSM calls of each pass of the barrier are counted: a pass gets the
+  states of the hosts that are not ready in get_parameters() batches of 10 names and
+  acknowledges the hosts that became ready with one put_parameter() each.  A throttled
+  pass backs off and the barrier goes on.
+
+  Run from the scripts directory:
+    python -m unittest discover -s YAPythonLibrary/test -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+
+ScriptsHome = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.join(ScriptsHome,"YAPythonLibrary"))
+sys.path.insert(0,os.path.join(ScriptsHome,"aws-icp-bootstrap"))
+
+import botocore.session
+from botocore.stub import Stubber, ANY
+
+from bootstrap import Bootstrap, Host
+import yapl.utilities.Trace as Trace
+from yapl.coordination.SSMCoordinator import SSMCoordinator, ParameterNamesChunkSize
+
+# The barrier traces every host that is ready, only the warnings are of interest here.
+Trace.configureTrace("*=warning")
+
+HostCount = 25
+
+
+class SyncWithClusterNodesTest(unittest.TestCase):
+
+  def setUp(self):
+    session = botocore.session.get_session()
+    self.ssmClient = session.create_client('ssm',region_name='us-east-1',
+                                           aws_access_key_id='testing',
+                                           aws_secret_access_key='testing')
+    self.stubber = Stubber(self.ssmClient)
+    self.calls = []
+    self.ssmClient.meta.events.register('before-parameter-build.ssm.GetParameters',self._countGet)
+    self.ssmClient.meta.events.register('before-parameter-build.ssm.PutParameter',self._countPut)
+
+    self.bootstrap = Bootstrap()
+    self.bootstrap.rootStackName = "teststack"
+    self.bootstrap.hosts['worker'] = [Host("10.0.1.%d" % i,"ip-10-0-1-%d.ec2.internal" % i,None,'worker',"i-%017x" % i) for i in range(HostCount)]
+    self.bootstrap.coordinator = SSMCoordinator(ssmClient=self.ssmClient,minSleepTime=0,maxSleepTime=0,timeout=60)
+    self.bootstrap.coordinator._poll = self._poll
+    self.keys = ["/teststack/%s" % host.private_dns_name for host in self.bootstrap.getClusterHosts()]
+  #endDef
+
+
+  def _poll(self, keys):
+    """
+      Mark the start of a pass of the barrier and poll.
+    """
+    self.calls.append('pass')
+    return SSMCoordinator._poll(self.bootstrap.coordinator,keys)
+  #endDef
+
+
+  def _countGet(self, **kwargs):
+    self.calls.append('get')
+  #endDef
+
+
+  def _countPut(self, **kwargs):
+    self.calls.append('put')
+  #endDef
+
+
+  def _getPasses(self):
+    """
+      Return a list with a dictionary of the number of get and put calls of each pass.
+    """
+    passes = []
+    for call in self.calls:
+      if (call == 'pass'):
+        passes.append({'get': 0, 'put': 0})
+      else:
+        passes[-1][call] += 1
+      #endIf
+    #endFor
+    return passes
+  #endDef
+
+
+  def _addPass(self, pending, ready):
+    """
+      Queue the stubbed responses of a pass over the given pending keys where the given keys
+      are ready.  The keys that are not ready have no parameter or a parameter in some other
+      state.
+    """
+    for i in range(0,len(pending),ParameterNamesChunkSize):
+      chunk = pending[i:i+ParameterNamesChunkSize]
+      parameters = []
+      invalidParameters = []
+      for index, key in enumerate(chunk):
+        if (key in ready):
+          parameters.append({'Name': key, 'Type': 'String', 'Value': 'READY'})
+        elif (index % 2):
+          parameters.append({'Name': key, 'Type': 'String', 'Value': 'INSTALLING'})
+        else:
+          invalidParameters.append(key)
+        #endIf
+      #endFor
+      response = {'Parameters': parameters}
+      if (invalidParameters):
+        response['InvalidParameters'] = invalidParameters
+      #endIf
+      self.stubber.add_response('get_parameters',response,{'Names': chunk})
+    #endFor
+
+    for key in pending:
+      if (key in ready):
+        self.stubber.add_response('put_parameter',{'Version': 2},
+                                  {'Name': key, 'Description': ANY, 'Value': 'ACK', 'Type': 'String', 'Overwrite': True})
+      #endIf
+    #endFor
+  #endDef
+
+
+  def testCallsPerPass(self):
+    firstReady = self.keys[:12]
+    pending = self.keys[12:]
+
+    self._addPass(self.keys,firstReady)
+    self._addPass(pending,[])
+    self.stubber.add_client_error('get_parameters',service_error_code='ThrottlingException',http_status_code=400)
+    self._addPass(pending,pending)
+
+    with self.stubber:
+      self.bootstrap.syncWithClusterNodes(desiredState='READY')
+      self.stubber.assert_no_pending_responses()
+    #endWith
+
+    passes = self._getPasses()
+    self.assertEqual(passes,[{'get': 3, 'put': 12},
+                             {'get': 2, 'put': 0},
+                             {'get': 1, 'put': 0},
+                             {'get': 2, 'put': 13}])
+    # Never more than one get per batch of pending hosts in a pass.
+    for passCalls in passes:
+      self.assertTrue(passCalls['get'] <= (HostCount + ParameterNamesChunkSize - 1) // ParameterNamesChunkSize)
+    #endFor
+  #endDef
+
+#endClass
+
+
+if __name__ == '__main__':
+  unittest.main()
+#endIf
@@ -2,23 +2,89 @@
 Created on Feb 1, 2019
 
 @author: Peter Van Sickel
+
+History:
+  18 OCT 2026 - Export the log files concurrently over the S3 client of the S3Helper, with a
+  multipart upload for the large files, and return a per file report of the export.
+  
+  18 OCT 2026 - Optional gzip or zstd compression of the log files as they are exported.
+  
+  18 OCT 2026 - Incremental export with an export manifest in the logs directory.  A log that
+  did not change is not exported again and only the bytes appended to a log are exported, as
+  a numbered part object.
+  
+  18 OCT 2026 - LogShipper, a background thread that exports the logs incrementally while a 
+  deployment runs.  The export manifest has the SHA-256 of the tail of each log rather than of
+  the whole log, so an export reads only the tail and the appended bytes of a log that grew.
 """
 
 
 import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+import tempfile
+from multiprocessing.pool import ThreadPool
 from yapl.aws.S3Helper import S3Helper
 from yapl.utilities.Trace import Trace,Level
 from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+
+# zstd compression needs the zstandard package, gzip is always available.
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+#endTry
 
 TR = Trace(__name__)
 
+# Number of log files uploaded at the same time.
+DefaultMaxWorkers = 8
+
+# Size in bytes above which a log file is uploaded with a multipart upload, the size of
+# the parts and the number of parts of one file uploaded at the same time.
+DefaultMultipartThreshold = 16 * 1024 * 1024
+DefaultMultipartChunkSize = 8 * 1024 * 1024
+MultipartMaxConcurrency = 4
+
+# Compression of the exported logs: the S3 key suffix and Content-Encoding of each kind.
+Compressions = {
+  'gzip': { 'suffix': '.gz', 'contentEncoding': 'gzip' },
+  'zstd': { 'suffix': '.zst', 'contentEncoding': 'zstd' }
+}
+GzipCompressLevel = 6
+ZstdCompressLevel = 3
+
+# The content of a log up to this size in bytes is kept in memory, a larger one is spooled to disk.
+SpoolSize = 16 * 1024 * 1024
+
+# Size in bytes of the reads from a log file.
+ReadBufferSize = 1024 * 1024
+
+# The export manifest is written in the logs directory.  It is not exported.
+ManifestFileName = ".log-export-manifest.json"
+
+# Size in bytes of the tail of a log that is hashed to tell an appended log from a rewritten one.
+TailSize = 64 * 1024
+
+# Seconds between the exports of a LogShipper, its ceiling on the average upload rate in bytes
+# per second and the number of log files it uploads at the same time.
+DefaultShipInterval = 60
+DefaultShipMaxRate = 1024 * 1024
+DefaultShipMaxWorkers = 2
+
 
 class LogExporter(object):
   """
     Helper for exporting log files to S3.
   """
 
-  def __init__(self,region=None, bucket=None, keyPrefix='logs', role=None, fqdn=None):
+  def __init__(self,region=None, bucket=None, keyPrefix='logs', role=None, fqdn=None,
+               maxWorkers=DefaultMaxWorkers, multipartThreshold=DefaultMultipartThreshold, compression=None,
+               incremental=False):
     """
       Constructor
       
@@ -34,6 +100,13 @@ class LogExporter(object):
       fqdn - fully qualified domain name of the node exporting the logs
              The FQDN provides uniqueness as there may be more than one node 
              with a given role.
+      maxWorkers - number of log files uploaded at the same time, 1 exports them one at a time
+      multipartThreshold - size in bytes above which a log file is uploaded in parts
+      compression - None to export the log files as they are, gzip or zstd to compress each
+             log file as it is exported.  The S3 key of a compressed log has a .gz or .zst
+             suffix and its Content-Encoding is set.  zstd needs the zstandard package.
+      incremental - True to export only the logs that changed since the previous export
+             and only the bytes appended to a log.  See exportLogs().
     """
     object.__init__(self)
     
@@ -59,6 +132,25 @@ class LogExporter(object):
     #endIf
     self.fqdn = fqdn
     
+    if (maxWorkers < 1):
+      raise InvalidArgumentException("The maximum number of workers must be at least 1, given: %s" % maxWorkers)
+    #endIf
+    self.maxWorkers = maxWorkers
+    self.multipartThreshold = multipartThreshold
+    
+    if (compression and compression not in Compressions):
+      raise InvalidArgumentException("The log compression must be one of: %s, given: %s" % (Compressions.keys(),compression))
+    #endIf
+    if (compression == 'zstd' and not zstandard):
+      raise InvalidArgumentException("The zstd log compression needs the zstandard Python package, which is not installed.")
+    #endIf
+    self.compression = compression
+    self.incremental = incremental
+    
+    # One export at a time, e.g., a LogShipper and the final export, share the export manifest.
+    self.exportLock = threading.Lock()
+    
+    # The S3 client of the S3Helper is shared by all of the upload threads.
     self.s3Helper = S3Helper(region=region)
     
     if (not self.s3Helper.bucketExists(bucket)):
@@ -68,7 +160,300 @@ class LogExporter(object):
   #endDef
   
   
-  def exportLogs(self, logsDirectoryPath):
+  def _getS3Key(self, fileName, part=None):
+    """
+      Return the S3 key of the log file with the given name or of the given numbered part of it.
+      
+      For example, logs/<stackname>/<role>/<fqdn>/bootstrap.log and, for part 2 of that log
+      with gzip compression, logs/<stackname>/<role>/<fqdn>/bootstrap.log.part-0002.gz
+    """
+    if (part):
+      fileName = "%s.part-%04d" % (fileName,part)
+    #endIf
+    s3Key = "%s/%s/%s/%s" % (self.keyPrefix,self.role,self.fqdn,fileName)
+    if (self.compression):
+      s3Key += Compressions[self.compression]['suffix']
+    #endIf
+    return s3Key
+  #endDef
+  
+  
+  def _getBody(self, bodyPath, offset, end):
+    """
+      Return a file object positioned at the start of the content of the log file at the given
+      path from the given offset up to the given end offset, compressed with the compression of
+      this exporter.  The caller closes it.
+      
+      A log may still be written to while it is exported, so the content is copied up to the
+      end offset, the size of the log when its export started.
+      
+      The compression runs on the upload thread of the file, so the compression of one log
+      overlaps the uploads of the others.  zlib and zstd release the GIL while they compress.
+      A compressed part is a complete gzip member or zstd frame, so the parts of a log can be
+      concatenated and decompressed as one stream.
+    """
+    contentFile = tempfile.SpooledTemporaryFile(max_size=SpoolSize)
+    try:
+      if (self.compression == 'gzip'):
+        writer = gzip.GzipFile(filename=os.path.basename(bodyPath),mode='wb',compresslevel=GzipCompressLevel,
+                               fileobj=contentFile,mtime=int(os.path.getmtime(bodyPath)))
+      elif (self.compression == 'zstd'):
+        writer = zstandard.ZstdCompressor(level=ZstdCompressLevel).stream_writer(contentFile)
+      else:
+        writer = None
+      #endIf
+      
+      with open(bodyPath,'rb') as bodyFile:
+        bodyFile.seek(offset)
+        remaining = end - offset
+        while (remaining > 0):
+          buf = bodyFile.read(min(ReadBufferSize,remaining))
+          if (not buf): break
+          if (writer):
+            writer.write(buf)
+          else:
+            contentFile.write(buf)
+          #endIf
+          remaining -= len(buf)
+        #endWhile
+      #endWith
+      
+      if (self.compression == 'gzip'):
+        writer.close()
+      elif (self.compression == 'zstd'):
+        writer.flush(zstandard.FLUSH_FRAME)
+      #endIf
+      contentFile.seek(0)
+    except:
+      contentFile.close()
+      raise
+    #endTry
+    return contentFile
+  #endDef
+  
+  
+  def _upload(self, bodyFile, s3Key):
+    """
+      Upload the content of the given file object to the given S3 key.  Content larger than
+      the multipartThreshold is uploaded with a multipart upload.
+      
+      Return a tuple with the bytes uploaded and True if it was a multipart upload.
+    """
+    bodyFile.seek(0,os.SEEK_END)
+    size = bodyFile.tell()
+    bodyFile.seek(0)
+    
+    extraArgs = {}
+    if (self.compression):
+      extraArgs = { 'ContentEncoding': Compressions[self.compression]['contentEncoding'], 'ContentType': 'text/plain' }
+    #endIf
+    
+    multipart = size > self.multipartThreshold
+    if (multipart):
+      config = { 'multipart_threshold': self.multipartThreshold,
+                 'multipart_chunksize': DefaultMultipartChunkSize,
+                 'max_concurrency': MultipartMaxConcurrency
+               }
+      self.s3Helper.upload_fileobj(Fileobj=bodyFile,Bucket=self.bucket,Key=s3Key,Config=config,ExtraArgs=extraArgs)
+    else:
+      self.s3Helper.put_object(Bucket=self.bucket,Key=s3Key,Body=bodyFile,**extraArgs)
+    #endIf
+    return (size,multipart)
+  #endDef
+  
+  
+  def _hashTail(self, bodyPath, end):
+    """
+      Return the SHA-256 hex digest of the TailSize bytes, or fewer at the start of the log,
+      that end at the given offset of the log file at the given path.
+    """
+    hasher = hashlib.sha256()
+    start = max(0,end - TailSize)
+    with open(bodyPath,'rb') as bodyFile:
+      bodyFile.seek(start)
+      hasher.update(bodyFile.read(end - start))
+    #endWith
+    return hasher.hexdigest()
+  #endDef
+  
+  
+  def _deleteParts(self, fileName, parts):
+    """
+      Delete the part objects of the log with the given name, e.g., after the log was rewritten
+      and exported whole again.  Return True if the parts were deleted.  A failure is logged
+      and False is returned, the parts are left behind.
+    """
+    methodName = "_deleteParts"
+    
+    keys = [{'Key': self._getS3Key(fileName,part)} for part in range(1,parts + 1)]
+    try:
+      for first in range(0,len(keys),1000):
+        self.s3Helper.delete_objects(Bucket=self.bucket,Delete={'Objects': keys[first:first + 1000], 'Quiet': True})
+      #endFor
+    except Exception as e:
+      TR.warning(methodName,"Unable to delete the %d part objects of log: %s: %s" % (parts,fileName,e))
+      return False
+    #endTry
+    return True
+  #endDef
+  
+  
+  def _getFullExportEntry(self, parts):
+    """
+      Return a manifest entry that makes the next export of a log a full export and that 
+      keeps the given number of part objects of the log, so the full export deletes them.
+    """
+    return { 'size': None, 'mtime': None, 'tailSha256': None, 'parts': parts }
+  #endDef
+  
+  
+  def _exportLog(self, args):
+    """
+      Export the log file at the given path.  The args is a tuple of the path of the log file
+      and its entry in the export manifest, None if it has none.
+      
+      Return a dictionary with the file path (path), the S3 key (key), the size of the file
+      (size), the bytes uploaded (bytes), the seconds the export took (seconds), True if it was
+      a multipart upload (multipart), what was exported (action), the error message of a failed
+      export (error), None if the export succeeded, and the new manifest entry of the log (entry).
+      
+      The entry of a failed export, or of a full export that could not delete the old part 
+      objects of the log, makes the next export a full export and keeps the number of part 
+      objects that may be in S3, so that export deletes them.
+      
+      The action is full when the whole log is uploaded, append when the bytes appended to the
+      log since the previous export are uploaded as a numbered part object and skipped when
+      the log did not change.
+      
+      With compression the bytes uploaded are the compressed bytes.
+    """
+    methodName = "_exportLog"
+    
+    bodyPath, entry = args
+    fileName = os.path.basename(bodyPath)
+    # The number of part objects the log may have in S3.
+    parts = 0
+    if (entry):
+      parts = entry['parts']
+    #endIf
+    result = { 'path': bodyPath, 'key': self._getS3Key(fileName), 'size': 0, 'bytes': 0, 'seconds': 0.0,
+               'multipart': False, 'action': 'full', 'error': None, 'entry': None }
+    startTime = time.time()
+    try:
+      # The log is exported up to its size now, it may still be written to.
+      stat = os.stat(bodyPath)
+      size = stat.st_size
+      result['size'] = size
+      newEntry = { 'size': size, 'mtime': stat.st_mtime, 'tailSha256': None, 'parts': 0 }
+      
+      offset = 0
+      if (self.incremental):
+        if (entry and entry['size'] == size and entry['mtime'] == stat.st_mtime):
+          result['action'] = 'skipped'
+          result['entry'] = entry
+          return result
+        #endIf
+        
+        newEntry['tailSha256'] = self._hashTail(bodyPath,size)
+        appended = (entry and entry.get('tailSha256') and size >= entry['size'] and 
+                    self._hashTail(bodyPath,entry['size']) == entry['tailSha256'])
+        if (appended and size == entry['size']):
+          # Touched, not changed.
+          newEntry['parts'] = entry['parts']
+          result['action'] = 'skipped'
+          result['entry'] = newEntry
+          return result
+        #endIf
+        
+        if (appended):
+          offset = entry['size']
+          newEntry['parts'] = entry['parts'] + 1
+          parts = newEntry['parts']
+          result['action'] = 'append'
+          result['key'] = self._getS3Key(fileName,newEntry['parts'])
+        #endIf
+      #endIf
+      
+      if (TR.isLoggable(Level.FINE)):
+        TR.fine(methodName,"Exporting log: %s bytes %d to %d to S3: %s:%s" % (bodyPath,offset,size,self.bucket,result['key']))
+      #endIf
+      
+      bodyFile = self._getBody(bodyPath,offset,size)
+      try:
+        result['bytes'], result['multipart'] = self._upload(bodyFile,result['key'])
+      finally:
+        bodyFile.close()
+      #endTry
+      
+      if (result['action'] == 'full' and parts and not self._deleteParts(fileName,parts)):
+        result['entry'] = self._getFullExportEntry(parts)
+      else:
+        result['entry'] = newEntry
+      #endIf
+    except Exception as e:
+      TR.error(methodName,"Export of log: %s to S3: %s:%s failed: %s" % (bodyPath,self.bucket,result['key'],e))
+      result['error'] = str(e)
+      # The log is exported whole the next time, which deletes the parts it may have.
+      result['entry'] = self._getFullExportEntry(parts)
+    #endTry
+    result['seconds'] = time.time() - startTime
+    return result
+  #endDef
+  
+  
+  def _getManifestScope(self):
+    """
+      Return the bucket, key prefix and compression the manifest entries are valid for.
+    """
+    return { 'bucket': self.bucket, 'keyPrefix': self._getS3Key(''), 'compression': self.compression }
+  #endDef
+  
+  
+  def _readManifest(self, logsDirectoryPath):
+    """
+      Return the dictionary of log file name to manifest entry of the given logs directory.
+      The dictionary is empty if there is no manifest, it cannot be read or it is for some
+      other bucket, key prefix or compression.
+    """
+    methodName = "_readManifest"
+    
+    manifestPath = os.path.join(logsDirectoryPath,ManifestFileName)
+    if (not os.path.exists(manifestPath)):
+      return {}
+    #endIf
+    
+    try:
+      with open(manifestPath,'r') as manifestFile:
+        manifest = json.load(manifestFile)
+      #endWith
+    except Exception as e:
+      TR.warning(methodName,"Ignoring the export manifest: %s that could not be read: %s" % (manifestPath,e))
+      return {}
+    #endTry
+    
+    if (manifest.get('scope') != self._getManifestScope()):
+      TR.info(methodName,"The export manifest: %s is for another bucket, key prefix or compression, exporting all logs." % manifestPath)
+      return {}
+    #endIf
+    return manifest.get('files') or {}
+  #endDef
+  
+  
+  def _writeManifest(self, logsDirectoryPath, files):
+    """
+      Write the export manifest of the given logs directory with the given dictionary of log
+      file name to manifest entry.
+    """
+    manifestPath = os.path.join(logsDirectoryPath,ManifestFileName)
+    tmpPath = "%s.tmp" % manifestPath
+    with open(tmpPath,'w') as manifestFile:
+      json.dump({'scope': self._getManifestScope(), 'files': files},manifestFile,indent=2)
+    #endWith
+    os.rename(tmpPath,manifestPath)
+  #endDef
+  
+  
+  def exportLogs(self, logsDirectoryPath, maxWorkers=None):
     """
       Export the deployment logs to the S3 bucket of this LogExporter.
       
@@ -76,35 +461,203 @@ class LogExporter(object):
       followed by the role and FQDN and ending with the log file name as the 
       last element of the S3 object key.
       
+      The log files are uploaded maxWorkers at a time over one S3 client.  With compression
+      each log file is compressed by the thread that uploads it.  A log file larger than the
+      multipartThreshold, after compression, is uploaded with a multipart upload.  A failed 
+      upload does not stop the export of the other log files.
+      
+      With incremental, the size, modification time and the SHA-256 of the last TailSize bytes
+      of each exported log are recorded in an export manifest, .log-export-manifest.json, in 
+      the logs directory.  A log with the size and modification time, or the size and tail,
+      it had at the previous export is skipped.  A log that grew and still has the tail it had
+      at its previous size gets the appended bytes exported as the next numbered part object,
+      <log>.part-0001, <log>.part-0002 and so on.  The log is the concatenation of the log
+      object and its parts.  Any other change exports the whole log again and deletes its parts.
+      Only the tail and the appended bytes of a log that grew are read, so the cost of an 
+      export does not grow with the size of the logs.
+      
+      Exports of this LogExporter run one at a time.  The given maxWorkers, by default the
+      maxWorkers of this LogExporter, is the number of log files uploaded at the same time.
+      
+      Return a list with the result of the export of each log file, see _exportLog(), 
+      ordered by file name.  The list is empty if there are no log files.
     """
     methodName = "exportLogs"
     
+    report = []
     if (not os.path.exists(logsDirectoryPath)):
       if (TR.isLoggable(Level.FINE)):
         TR.fine(methodName, "Logs directory: %s does not exist." % logsDirectoryPath)
       #endIf
     else:
-      logFileNames = os.listdir(logsDirectoryPath)
-      if (not logFileNames):
+      logFileNames = [fileName for fileName in os.listdir(logsDirectoryPath) if not fileName.startswith(ManifestFileName)]
+      bodyPaths = [os.path.join(logsDirectoryPath,fileName) for fileName in sorted(logFileNames)]
+      bodyPaths = [bodyPath for bodyPath in bodyPaths if os.path.isfile(bodyPath)]
+      if (not bodyPaths):
         if (TR.isLoggable(Level.FINE)):
           TR.fine(methodName,"No log files in %s" % logsDirectoryPath)
         #endIf
       else:
-        for fileName in logFileNames:
-          bodyPath = os.path.join(logsDirectoryPath,fileName)
-          if (os.path.isfile(bodyPath)):
-            s3Key = "%s/%s/%s/%s" % (self.keyPrefix,self.role,self.fqdn,fileName)
-            
-            if (TR.isLoggable(Level.FINE)):
-              TR.fine(methodName,"Exporting log: %s to S3: %s:%s" % (bodyPath,self.bucket,s3Key))
-            #endIf
-            with open(bodyPath, 'r') as bodyFile:
-              self.s3Helper.put_object(Bucket=self.bucket,Key=s3Key,Body=bodyFile)
-            #endWith
+        with self.exportLock:
+          startTime = time.time()
+          files = {}
+          if (self.incremental):
+            files = self._readManifest(logsDirectoryPath)
+          #endIf
+          
+          pool = ThreadPool(min(maxWorkers or self.maxWorkers,len(bodyPaths)))
+          try:
+            report = pool.map(self._exportLog,[(bodyPath,files.get(os.path.basename(bodyPath))) for bodyPath in bodyPaths],chunksize=1)
+          finally:
+            pool.close()
+            pool.join()
+          #endTry
+          
+          if (self.incremental):
+            for result in report:
+              fileName = os.path.basename(result['path'])
+              if (result['entry']):
+                files[fileName] = result['entry']
+              elif (fileName in files):
+                del files[fileName]
+              #endIf
+            #endFor
+            self._writeManifest(logsDirectoryPath,files)
           #endIf
-        #endFor
+        #endWith
+        
+        failed = [result for result in report if result['error']]
+        skipped = [result for result in report if result['action'] == 'skipped']
+        TR.info(methodName,"Exported %d of %d log files, %d unchanged, %d bytes of %d, from: %s in %.1f seconds." % 
+                (len(report)-len(failed)-len(skipped),len(report),len(skipped),sum([result['bytes'] for result in report]),
+                 sum([result['size'] for result in report]),logsDirectoryPath,time.time() - startTime))
+      #endIf
+    #endIf
+    return report
+  #endDef
+  
+#endClass
+
+
+class LogShipper(object):
+  """
+    Background thread that exports the logs of a deployment while it runs, so the logs of a
+    node that hangs or is terminated are in S3.
+  """
+  
+  def __init__(self, logExporter, logsDirectoryPaths, interval=DefaultShipInterval, maxRate=DefaultShipMaxRate,
+               maxWorkers=DefaultShipMaxWorkers):
+    """
+      Constructor
+      
+      logExporter        - an incremental LogExporter, the one used for the final export so the
+                           final export only exports what changed since the last shipment
+      logsDirectoryPaths - list of the paths of the logs directories to ship
+      interval           - seconds between shipments
+      maxRate            - ceiling in bytes per second of the average upload rate of the shipper
+      maxWorkers         - number of log files uploaded at the same time by a shipment
+    """
+    object.__init__(self)
+    
+    if (not logExporter):
+      raise MissingArgumentException("A log exporter must be provided.")
+    #endIf
+    
+    if (not logExporter.incremental):
+      raise InvalidArgumentException("The log exporter of a log shipper must be incremental.")
+    #endIf
+    
+    if (not logsDirectoryPaths):
+      raise MissingArgumentException("The paths of the logs directories to ship must be provided.")
+    #endIf
+    
+    if (interval <= 0 or maxRate <= 0):
+      raise InvalidArgumentException("The interval and maximum rate of a log shipper must be positive, given: %s, %s" % (interval,maxRate))
+    #endIf
+    
+    self.logExporter = logExporter
+    self.logsDirectoryPaths = logsDirectoryPaths
+    self.interval = interval
+    self.maxRate = maxRate
+    self.maxWorkers = maxWorkers
+    self.stopEvent = threading.Event()
+    self.thread = None
+    self.shipments = 0
+    self.byteCount = 0
+  #endDef
+  
+  
+  def ship(self):
+    """
+      Export the logs directories once.  Return the number of bytes uploaded.
+      A failure is logged, the next shipment tries again.
+    """
+    methodName = "ship"
+    
+    byteCount = 0
+    for logsDirectoryPath in self.logsDirectoryPaths:
+      if (self.stopEvent.is_set()): break
+      try:
+        report = self.logExporter.exportLogs(logsDirectoryPath,maxWorkers=self.maxWorkers)
+        byteCount += sum([result['bytes'] for result in report])
+      except Exception as e:
+        TR.warning(methodName,"Shipment of logs directory: %s failed: %s" % (logsDirectoryPath,e))
+      #endTry
+    #endFor
+    
+    self.shipments += 1
+    self.byteCount += byteCount
+    return byteCount
+  #endDef
+  
+  
+  def _run(self):
+    """
+      Body of the shipper thread.  A shipment that uploads more than maxRate bytes per second
+      of the interval pushes the next shipment out, so the average upload rate stays under
+      maxRate.
+    """
+    delay = self.interval
+    while (not self.stopEvent.wait(delay)):
+      startTime = time.time()
+      byteCount = self.ship()
+      elapsed = time.time() - startTime
+      delay = max(self.interval,float(byteCount) / self.maxRate - elapsed)
+    #endWhile
+  #endDef
+  
+  
+  def start(self):
+    """
+      Start shipping the logs on a daemon thread.
+    """
+    methodName = "start"
+    
+    self.stopEvent.clear()
+    self.thread = threading.Thread(target=self._run,name="LogShipper")
+    self.thread.daemon = True
+    self.thread.start()
+    TR.info(methodName,"Shipping logs from: %s every %d seconds." % (self.logsDirectoryPaths,self.interval))
+  #endDef
+  
+  
+  def stop(self, timeout=None):
+    """
+      Stop shipping and wait, up to the given timeout in seconds, for a shipment in progress
+      to complete.  The exports of the LogExporter run one at a time, so an export started
+      after this returns does not overlap a shipment.
+    """
+    methodName = "stop"
+    
+    if (self.thread):
+      self.stopEvent.set()
+      self.thread.join(timeout)
+      if (self.thread.is_alive()):
+        TR.warning(methodName,"The log shipper did not stop within %s seconds." % timeout)
       #endIf
+      self.thread = None
+      TR.info(methodName,"Stopped shipping logs after %d shipments of %d bytes." % (self.shipments,self.byteCount))
     #endIf
   #endDef
   
-#endClass
\ No newline at end of file
+#endClass
@@ -11,23 +11,45 @@ History:
   
   2-3 FEB 2019 - pvs - Added support for command helper to invoke S3 methods based on yaml 
   doc definition of the method and parameters.
+  
+  18 OCT 2026 - Added the transfer settings (Config), ExtraArgs and Callback to download_file()
+  and the sync command that mirrors an S3 prefix and a local directory with parallel transfers.
 """
 
 import os
+import math
+import hashlib
 import boto3
 from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from multiprocessing.pool import ThreadPool
 
 from yapl.utilities.Trace import Trace,Level
+from yapl.utilities.TransferProgress import TransferProgress
 from yapl.exceptions.Exceptions import MissingArgumentException
 from yapl.exceptions.Exceptions import InvalidArgumentException
 from yapl.exceptions.Exceptions import AccessDeniedException
+from yapl.exceptions.Exceptions import FileTransferException
 
 TR = Trace(__name__)
 
 S3ClientMethodRequiredArgs = {
-    'download_file': ["Bucket", "Key", "Filename"]
+    'download_file': ["Bucket", "Key", "Filename"],
+    'upload_file': ["Filename", "Bucket", "Key"],
+    'upload_fileobj': ["Fileobj", "Bucket", "Key"],
+    'sync': ["Bucket", "Directory"]
   }
-  
+
+# Default number of objects transferred at the same time by sync().
+DefaultSyncMaxWorkers = 8
+
+# Default part size of a multipart transfer, the boto3 TransferConfig default.
+DefaultMultipartChunkSize = 8 * 1024 * 1024
+
+MB = 1024 * 1024
+
+# Size in bytes of the reads from a local file to compute its ETag.
+ETagBufferSize = 1024 * 1024
 
 
 class S3Helper(object):
@@ -154,6 +176,67 @@ class S3Helper(object):
   #endDef
 
 
+  def _getTransferConfig(self, config):
+    """
+      Return a boto3 TransferConfig for the given transfer settings or None if no settings are given.
+      
+      The settings are either a TransferConfig or a dictionary of TransferConfig keyword
+      arguments, e.g., from a command doc:
+        Config:
+          max_concurrency: 20
+          multipart_threshold: 67108864
+          multipart_chunksize: 67108864
+    """
+    if (not config):
+      return None
+    #endIf
+    
+    if (isinstance(config,TransferConfig)):
+      return config
+    #endIf
+    
+    if (type(config) != type({})):
+      raise InvalidArgumentException("The transfer settings (Config) must be a dictionary of TransferConfig arguments, given: %s" % config)
+    #endIf
+    
+    try:
+      return TransferConfig(**config)
+    except TypeError as e:
+      raise InvalidArgumentException("Invalid transfer settings (Config): %s: %s" % (config,e))
+    #endTry
+  #endDef
+  
+  
+  def _getTransferArgs(self, **kwargs):
+    """
+      Return a dictionary with the Config, ExtraArgs and Callback keyword arguments of an S3 
+      client transfer method that are in the given kwargs.
+    """
+    transferArgs = {}
+    config = self._getTransferConfig(kwargs.get('Config'))
+    if (config):
+      transferArgs['Config'] = config
+    #endIf
+    
+    if (kwargs.get('ExtraArgs')):
+      transferArgs['ExtraArgs'] = kwargs.get('ExtraArgs')
+    #endIf
+    
+    if (kwargs.get('Callback')):
+      transferArgs['Callback'] = kwargs.get('Callback')
+    #endIf
+    return transferArgs
+  #endDef
+  
+
+  def delete_objects(self,**kwargs):
+    """
+      Very thin wrapper around S3 client delete_objects()
+    """
+    return self.s3Client.delete_objects(**kwargs)
+  #endDef
+
+
   def download_file(self, **kwargs):
     """
       Support for downloading a file from an S3 bucket and to a place in the local file system.
@@ -163,9 +246,13 @@ class S3Helper(object):
         Key      - S3 object key
         Filename - full path to the target file
       
-      WARNING: (PVS 04 FEB 2019) 
-        S3 client download_file() keyword arguments not supported (at this time)
-        kwargs: ExtraArgs, Callback, Config.  See S3 client doc for download_file().
+      S3 download_file optional arguments:
+        Config    - transfer settings, a dictionary of boto3 TransferConfig arguments, e.g.,
+                    max_concurrency, multipart_threshold and multipart_chunksize
+        ExtraArgs - dictionary of extra arguments of the S3 get_object request, e.g., VersionId
+        Callback  - callable called with the number of bytes of each chunk transferred,
+                    (Python callers only).  Without a Callback the progress of the download
+                    is reported with a yapl.utilities.TransferProgress.
         
       Additional kwargs
         mode    - file system mode bits for the copied object
@@ -186,9 +273,26 @@ class S3Helper(object):
       os.makedirs(dirName)
     #endIf
     
-    # TBD: If needed by some use-case, add support for kwargs here
+    transferArgs = self._getTransferArgs(**kwargs)
+    progress = None
+    if (not transferArgs.get('Callback')):
+      Bucket, Key = requiredArgs[0:2]
+      progress = TransferProgress("s3://%s/%s" % (Bucket,Key),totalBytes=self._getObjectSize(Bucket,Key))
+      transferArgs['Callback'] = progress
+    #endIf
     
-    self.s3Client.download_file(*requiredArgs)
+    try:
+      self.s3Client.download_file(*requiredArgs,**transferArgs)
+    except:
+      if (progress):
+        progress.finish(failed=True)
+      #endIf
+      raise
+    #endTry
+    
+    if (progress):
+      progress.finish()
+    #endIf
     
     mode = kwargs.get('mode')
     if (mode):
@@ -198,6 +302,315 @@ class S3Helper(object):
   #endDef
   
   
+  def upload_file(self, **kwargs):
+    """
+      Upload a file in the local file system to an S3 bucket.  A file larger than the
+      multipart threshold of the transfer settings is uploaded in parts, several at a time.
+      
+      S3 upload_file required arguments:
+        Filename - path to the file to upload
+        Bucket   - S3 bucket name
+        Key      - S3 object key
+        
+      S3 upload_file optional arguments:
+        Config, ExtraArgs, Callback - see download_file()
+    """
+    requiredArgs = self._getRequiredArgs('upload_file',**kwargs)
+    self.s3Client.upload_file(*requiredArgs,**self._getTransferArgs(**kwargs))
+  #endDef
+  
+  
+  def upload_fileobj(self, **kwargs):
+    """
+      Upload the content of a file object, e.g., a compressed copy of a file, to an S3 bucket.
+      The file object is read from its current position to its end.  Content larger than the
+      multipart threshold of the transfer settings is uploaded in parts.  (Python callers only)
+      
+      S3 upload_fileobj required arguments:
+        Fileobj  - file object to read the content from
+        Bucket   - S3 bucket name
+        Key      - S3 object key
+        
+      S3 upload_fileobj optional arguments:
+        Config, ExtraArgs, Callback - see download_file()
+    """
+    requiredArgs = self._getRequiredArgs('upload_fileobj',**kwargs)
+    self.s3Client.upload_fileobj(*requiredArgs,**self._getTransferArgs(**kwargs))
+  #endDef
+  
+  
+  def _getObjectSize(self, bucket, key):
+    """
+      Return the size in bytes of the given S3 object or None if it can not be gotten.
+    """
+    methodName = "_getObjectSize"
+    
+    try:
+      return self.s3Client.head_object(Bucket=bucket,Key=key).get('ContentLength')
+    except ClientError as e:
+      if (TR.isLoggable(Level.FINE)):
+        TR.fine(methodName,"Unable to get the size of object: %s in bucket: %s: %s" % (key,bucket,e))
+      #endIf
+      return None
+    #endTry
+  #endDef
+  
+  
+  def _getLocalETag(self, filePath, partSize=None):
+    """
+      Return the S3 ETag the file at the given path would have as an S3 object, without quotes.
+      
+      Without a part size the ETag is the MD5 hex digest of the file.  With a part size it is
+      the ETag of a multipart upload with that part size: the MD5 hex digest of the 
+      concatenated MD5 digests of the parts followed by a dash and the number of parts.
+    """
+    digests = []
+    fileHash = hashlib.md5()
+    partHash = hashlib.md5()
+    partBytes = 0
+    with open(filePath,'rb') as localFile:
+      while (True):
+        readSize = ETagBufferSize
+        if (partSize):
+          readSize = min(readSize,partSize - partBytes)
+        #endIf
+        buf = localFile.read(readSize)
+        if (not buf): break
+        fileHash.update(buf)
+        partHash.update(buf)
+        partBytes += len(buf)
+        if (partSize and partBytes == partSize):
+          digests.append(partHash.digest())
+          partHash = hashlib.md5()
+          partBytes = 0
+        #endIf
+      #endWhile
+    #endWith
+    
+    if (not partSize):
+      return fileHash.hexdigest()
+    #endIf
+    
+    if (partBytes or not digests):
+      digests.append(partHash.digest())
+    #endIf
+    return "%s-%d" % (hashlib.md5(''.join(digests)).hexdigest(),len(digests))
+  #endDef
+  
+  
+  def _isSame(self, filePath, size, etag, chunkSize):
+    """
+      Return True if the local file at the given path has the given size and S3 ETag.
+      
+      The ETag of a multipart object depends on its part size.  The part size of the given
+      transfer chunk size, the boto3 default and the part size of the number of parts in the 
+      ETag rounded up to a whole MB are tried.  An ETag that matches none of those, e.g., of an
+      object encrypted with a KMS key, is not the same and the object is transferred again.
+    """
+    if (not os.path.isfile(filePath) or os.path.getsize(filePath) != size):
+      return False
+    #endIf
+    
+    etag = etag.strip('"')
+    if (etag.find('-') < 0):
+      return self._getLocalETag(filePath) == etag
+    #endIf
+    
+    partCount = int(etag.split('-')[1])
+    partSizes = [chunkSize,DefaultMultipartChunkSize]
+    if (partCount > 0):
+      partSizes.append(int(math.ceil(float(size) / partCount / MB)) * MB)
+    #endIf
+    
+    tried = []
+    for partSize in partSizes:
+      if (partSize in tried): continue
+      tried.append(partSize)
+      if (int(math.ceil(float(size) / partSize)) != partCount): continue
+      if (self._getLocalETag(filePath,partSize) == etag):
+        return True
+      #endIf
+    #endFor
+    return False
+  #endDef
+  
+  
+  def _listObjects(self, bucket, prefix):
+    """
+      Return a dictionary of the objects in the given bucket under the given prefix.  The key
+      of the dictionary is the object key relative to the prefix and the value is a tuple with
+      the object key, size and ETag.
+    """
+    objects = {}
+    paginator = self.s3Client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket,Prefix=prefix):
+      for s3Object in page.get('Contents') or []:
+        key = s3Object['Key']
+        if (key.endswith('/')): continue
+        relativeKey = key[len(prefix):]
+        objects[relativeKey] = (key,s3Object['Size'],s3Object['ETag'])
+      #endFor
+    #endFor
+    return objects
+  #endDef
+  
+  
+  def _listFiles(self, directory):
+    """
+      Return a dictionary of the files under the given directory.  The key of the dictionary is
+      the file path relative to the directory with / separators and the value is the file path.
+    """
+    files = {}
+    for root, dirs, names in os.walk(directory):
+      for name in names:
+        filePath = os.path.join(root,name)
+        files[os.path.relpath(filePath,directory).replace(os.sep,'/')] = filePath
+      #endFor
+    #endFor
+    return files
+  #endDef
+  
+  
+  def sync(self, **kwargs):
+    """
+      Mirror the objects under an S3 prefix to a local directory or, with Direction: upload,
+      the files under a local directory to an S3 prefix.
+      
+      An object or file that is present at the destination with the same size and S3 ETag
+      is skipped.  The other objects are transferred at the same time, MaxWorkers at a time.
+      Nothing is deleted at the destination.
+      
+      Required arguments:
+        Bucket    - S3 bucket name
+        Directory - local directory, created if it does not exist
+        
+      Optional arguments:
+        Prefix     - S3 key prefix, by default the whole bucket
+        Direction  - download (default) or upload
+        MaxWorkers - number of objects transferred at the same time, default 8
+        Config     - transfer settings of each object, see download_file()
+        ExtraArgs  - extra arguments of each S3 request, see download_file()
+        mode       - file system mode bits for the downloaded files
+        
+      Return a dictionary with the number of objects transferred (transferred) and skipped 
+      (skipped) and the bytes transferred (bytes).  If the transfer of some objects fails,
+      the others are still transferred and a FileTransferException is raised at the end.
+    """
+    methodName = "sync"
+    
+    bucket, directory = self._getRequiredArgs('sync',**kwargs)
+    # The prefix is a directory of the bucket.
+    prefix = kwargs.get('Prefix') or ''
+    if (prefix and not prefix.endswith('/')):
+      prefix = "%s/" % prefix
+    #endIf
+    direction = kwargs.get('Direction') or 'download'
+    maxWorkers = kwargs.get('MaxWorkers') or DefaultSyncMaxWorkers
+    mode = kwargs.get('mode')
+    
+    if (direction not in ('download','upload')):
+      raise InvalidArgumentException("The sync Direction must be download or upload, given: %s" % direction)
+    #endIf
+    
+    transferArgs = self._getTransferArgs(**kwargs)
+    chunkSize = DefaultMultipartChunkSize
+    if (transferArgs.get('Config')):
+      chunkSize = transferArgs['Config'].multipart_chunksize
+    #endIf
+    
+    if (not os.path.exists(directory)):
+      os.makedirs(directory)
+    #endIf
+    
+    objects = self._listObjects(bucket,prefix)
+    files = self._listFiles(directory)
+    
+    transfers = []
+    skipped = 0
+    if (direction == 'download'):
+      for relativeKey, (key, size, etag) in objects.items():
+        filePath = os.path.join(directory,*relativeKey.split('/'))
+        if (self._isSame(filePath,size,etag,chunkSize)):
+          skipped += 1
+        else:
+          transfers.append((key,filePath,size))
+        #endIf
+      #endFor
+    else:
+      for relativePath, filePath in files.items():
+        key = prefix + relativePath
+        s3Object = objects.get(relativePath)
+        if (s3Object and self._isSame(filePath,s3Object[1],s3Object[2],chunkSize)):
+          skipped += 1
+        else:
+          transfers.append((key,filePath,os.path.getsize(filePath)))
+        #endIf
+      #endFor
+    #endIf
+    
+    TR.info(methodName,"Sync %s of bucket: %s prefix: %s and directory: %s, %d objects to transfer, %d up to date." % (direction,bucket,prefix,directory,len(transfers),skipped))
+    
+    def transfer(args):
+      key, filePath, size = args
+      try:
+        if (direction == 'download'):
+          if (not os.path.exists(os.path.dirname(filePath))):
+            try:
+              os.makedirs(os.path.dirname(filePath))
+            except OSError:
+              # Another worker created it.
+              pass
+            #endTry
+          #endIf
+          self.s3Client.download_file(bucket,key,filePath,**transferArgs)
+          if (mode):
+            os.chmod(filePath,mode)
+          #endIf
+        else:
+          self.s3Client.upload_file(filePath,bucket,key,**transferArgs)
+        #endIf
+        if (TR.isLoggable(Level.FINE)):
+          TR.fine(methodName,"Transferred: %s, %d bytes" % (key,size))
+        #endIf
+        return None
+      except Exception as e:
+        TR.error(methodName,"Transfer of: %s to/from: %s failed: %s" % (key,filePath,e))
+        return (key,e)
+      #endTry
+    #endDef
+    
+    # One progress report for all of the objects of the sync.
+    byteCount = sum([size for key, filePath, size in transfers])
+    progress = None
+    if (transfers and not transferArgs.get('Callback')):
+      progress = TransferProgress("sync %s of s3://%s/%s" % (direction,bucket,prefix),totalBytes=byteCount)
+      transferArgs['Callback'] = progress
+    #endIf
+    
+    errors = []
+    if (transfers):
+      pool = ThreadPool(min(maxWorkers,len(transfers)))
+      try:
+        errors = [error for error in pool.map(transfer,transfers,chunksize=1) if error]
+      finally:
+        pool.close()
+        pool.join()
+      #endTry
+    #endIf
+    
+    if (progress):
+      progress.finish(failed=bool(errors))
+    #endIf
+    
+    if (errors):
+      raise FileTransferException("Sync %s of bucket: %s prefix: %s failed for %d of %d objects: %s" % (direction,bucket,prefix,len(errors),len(transfers),[error[0] for error in errors]))
+    #endIf
+    
+    TR.info(methodName,"Sync %s of bucket: %s prefix: %s completed, %d objects, %d bytes transferred." % (direction,bucket,prefix,len(transfers),byteCount))
+    return { 'transferred': len(transfers), 'skipped': skipped, 'bytes': byteCount }
+  #endDef
+  
+  
   def invokeCommands(self, cmdDocs, start, **kwargs):
     """
       Process command docs to invoke each command in sequence that is of kind s3.  
@@ -0,0 +1,247 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Base class for the coordination of a deployment between the boot node and the
+  cluster nodes.
+
+  The coordination is done with a simple key-value store where the last write wins.
+  The keys are path-like strings, e.g., /<root-stack-name>/<node-fqdn>, the same
+  keys used for the SSM parameters.  A backend implements putValue(), getValues()
+  and deleteValues().  The waits, the barrier, the timeouts and the backoff between
+  polls are implemented here so they are the same for every backend.
+
+  The backoff between polls is a yapl.utilities.Backoff: exponential from minSleepTime
+  up to maxSleepTime with full jitter, so many nodes that start polling at the same
+  time do not poll in lockstep.  A barrier starts over from minSleepTime after a poll
+  that made progress.  A backend raises a CoordinationThrottledException when the
+  service it uses throttles a request.  A throttled poll counts as one that made no
+  progress and a throttled put is retried with backoff until the timeout.
+"""
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.utilities.Backoff import Backoff
+from yapl.exceptions.Exceptions import NotImplementedException
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.CoordinationExceptions import CoordinationTimeoutException
+from yapl.exceptions.CoordinationExceptions import CoordinationThrottledException
+
+TR = Trace(__name__)
+
+
+class ClusterCoordinator(object):
+  """
+    Publish states and wait on states published by other nodes of a deployment.
+  """
+
+  def __init__(self, minSleepTime=5, maxSleepTime=60, timeout=6000, multiplier=2, jitter=True):
+    """
+      Constructor
+
+      minSleepTime - upper bound in seconds of the first sleep between polls of a wait
+      maxSleepTime - ceiling in seconds of the sleep between polls of a wait
+      timeout      - default time in seconds a wait polls before it gives up
+      multiplier   - factor the sleep grows by after each poll with no progress
+      jitter       - True to sleep a random time up to the current bound (full jitter)
+    """
+    object.__init__(self)
+
+    self.minSleepTime = minSleepTime
+    self.maxSleepTime = maxSleepTime
+    self.timeout = timeout
+    self.multiplier = multiplier
+    self.jitter = jitter
+  #endDef
+
+
+  def putValue(self, key, value, description=""):
+    """
+      Put the given value to the given key.  Implemented by a backend.
+    """
+    raise NotImplementedException("putValue() is not implemented by: %s" % self.__class__.__name__)
+  #endDef
+
+
+  def getValues(self, keys):
+    """
+      Return a dictionary of the values of the given keys that exist.  Implemented by a backend.
+    """
+    raise NotImplementedException("getValues() is not implemented by: %s" % self.__class__.__name__)
+  #endDef
+
+
+  def deleteValues(self, keys):
+    """
+      Delete the given keys.  Keys that do not exist are ignored.  Implemented by a backend.
+    """
+    raise NotImplementedException("deleteValues() is not implemented by: %s" % self.__class__.__name__)
+  #endDef
+
+
+  def getValue(self, key):
+    """
+      Return the value of the given key or None if the key does not exist.
+    """
+    return self.getValues([key]).get(key)
+  #endDef
+
+
+  def publishState(self, key, state, description=""):
+    """
+      Put the given state to the given key.
+    """
+    methodName = "publishState"
+
+    if (not key):
+      raise MissingArgumentException("The key of the state to publish must be provided.")
+    #endIf
+
+    TR.info(methodName,"Publishing: %s to: %s" % (state,key))
+    self._putValue(key,state,description=description)
+  #endDef
+
+
+  def _getBackoff(self, timeout=None):
+    """
+      Return a new Backoff for a wait with the given timeout, by default the coordinator timeout.
+    """
+    if (timeout == None):
+      timeout = self.timeout
+    #endIf
+    return Backoff(initialDelay=self.minSleepTime,
+                   maxDelay=self.maxSleepTime,
+                   multiplier=self.multiplier,
+                   jitter=self.jitter,
+                   timeout=timeout)
+  #endDef
+
+
+  def _putValue(self, key, value, description=""):
+    """
+      Put the given value to the given key, backing off and retrying while the backend is throttled.
+    """
+    methodName = "_putValue"
+
+    backoff = self._getBackoff()
+    while (True):
+      try:
+        self.putValue(key,value,description=description)
+        return
+      except CoordinationThrottledException as e:
+        TR.warning(methodName,"Throttled putting: %s, backing off: %s" % (key,e))
+        if (not backoff.sleep()):
+          raise CoordinationTimeoutException("Timed out after %d seconds retrying the throttled put of: %s" % (self.timeout,key))
+        #endIf
+      #endTry
+    #endWhile
+  #endDef
+
+
+  def _poll(self, keys):
+    """
+      Return the values of the given keys or an empty dictionary if the backend was throttled.
+    """
+    methodName = "_poll"
+    try:
+      return self.getValues(keys)
+    except CoordinationThrottledException as e:
+      TR.warning(methodName,"Throttled getting %d values, backing off: %s" % (len(keys),e))
+      return {}
+    #endTry
+  #endDef
+
+
+  def waitForValue(self, key, expectedValue=None, timeout=None):
+    """
+      Return the value of the given key.
+
+      If an expectedValue is provided, wait until the key has that value, otherwise wait
+      until the key exists.  A CoordinationTimeoutException is raised if the wait takes
+      longer than the timeout in seconds.  The default timeout is the coordinator timeout.
+    """
+    methodName = "waitForValue"
+
+    if (timeout == None):
+      timeout = self.timeout
+    #endIf
+
+    backoff = self._getBackoff(timeout)
+    tryCount = 1
+    while (True):
+      value = self._poll([key]).get(key)
+      if (value != None and (expectedValue == None or value == expectedValue)):
+        if (TR.isLoggable(Level.FINE)):
+          TR.fine(methodName,"Try: %d, got value of: %s" % (tryCount,key))
+        #endIf
+        return value
+      #endIf
+
+      if (value != None and TR.isLoggable(Level.FINER)):
+        TR.finer(methodName,"For key: %s ignoring value: %s waiting on value: %s" % (key,value,expectedValue))
+      #endIf
+
+      if (not backoff.sleep()):
+        if (expectedValue == None):
+          raise CoordinationTimeoutException("Timed out after %d seconds waiting for: %s" % (timeout,key))
+        else:
+          raise CoordinationTimeoutException("Timed out after %d seconds waiting for: %s with expected value: %s" % (timeout,key,expectedValue))
+        #endIf
+      #endIf
+
+      tryCount += 1
+    #endWhile
+  #endDef
+
+
+  def waitForAll(self, keys, desiredState, ackValue=None, timeout=None):
+    """
+      Wait until all of the given keys have the desired state.
+
+      Each poll gets the values of the keys that are not yet in the desired state.  If
+      an ackValue is provided, the keys that reached the desired state in a poll are set
+      to the ackValue after the poll, so the node that published the state knows it was
+      received.  A CoordinationTimeoutException listing the keys that never reached the
+      desired state is raised if the wait takes longer than the timeout in seconds.
+    """
+    methodName = "waitForAll"
+
+    if (timeout == None):
+      timeout = self.timeout
+    #endIf
+
+    pending = list(keys)
+    backoff = self._getBackoff(timeout)
+    tryCount = 1
+    while (pending):
+      if (TR.isLoggable(Level.FINE)):
+        TR.fine(methodName,"Try: %d, waiting for %d of %d keys to reach state: %s" % (tryCount,len(pending),len(keys),desiredState))
+      #endIf
+
+      values = self._poll(pending)
+      ready = [key for key in pending if values.get(key) == desiredState]
+
+      for key in ready:
+        TR.info(methodName,"Key: %s is in desired state: %s" % (key,desiredState))
+        pending.remove(key)
+        if (ackValue != None):
+          self._putValue(key,ackValue,description="Acknowledged state: %s received." % desiredState)
+        #endIf
+      #endFor
+
+      if (not pending): break
+
+      if (ready):
+        backoff.reset()
+      #endIf
+
+      if (not backoff.sleep()):
+        raise CoordinationTimeoutException("Timed out after %d seconds waiting for state: %s of: %s" % (timeout,desiredState,pending))
+      #endIf
+
+      tryCount += 1
+    #endWhile
+
+    TR.info(methodName,"All %d keys reached state: %s" % (len(keys),desiredState))
+  #endDef
+
+#endClass
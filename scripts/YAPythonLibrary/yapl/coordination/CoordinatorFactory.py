@@ -0,0 +1,44 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Create the ClusterCoordinator for a coordination backend named on the command line
+  of the bootstrap and node initialization scripts.
+  
+  Backends:
+    ssm        - SSM Parameter Store parameters (default)
+    filesystem - files in a directory that is shared by all nodes, e.g., on EFS
+  
+  The in-memory backend is only useful within one process so it is not created here.
+"""
+
+from yapl.coordination.SSMCoordinator import SSMCoordinator
+from yapl.coordination.FileSystemCoordinator import FileSystemCoordinator
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+
+CoordinationBackends = ['ssm', 'filesystem']
+
+
+def createCoordinator(backend='ssm', region=None, path=None, **kwargs):
+  """
+    Return a ClusterCoordinator for the given backend.
+    
+    region - the AWS region name used by the ssm backend
+    path   - the coordination directory used by the filesystem backend
+    
+    The remaining keyword arguments are passed to the ClusterCoordinator constructor.
+  """
+  if (not backend or backend == 'ssm'):
+    return SSMCoordinator(region=region,**kwargs)
+  #endIf
+  
+  if (backend == 'filesystem'):
+    if (not path):
+      raise MissingArgumentException("The coordination path (--coordination-path) must be provided for the filesystem coordination backend.")
+    #endIf
+    return FileSystemCoordinator(path=path,**kwargs)
+  #endIf
+  
+  raise InvalidArgumentException("Unknown coordination backend: %s, expected one of: %s" % (backend,CoordinationBackends))
+#endDef
@@ -0,0 +1,136 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Cluster coordination with files in a directory, e.g., a directory on an EFS volume
+  that is mounted on the boot node and on all of the cluster nodes.
+  
+  Each coordination key is a file path relative to the coordination directory, e.g., 
+  the key /mystack/ip-10-0-1-20.ec2.internal is the file <path>/mystack/ip-10-0-1-20.ec2.internal.
+  The value is the content of the file.  A value is written to a temporary file that is 
+  renamed to the key file so a reader never sees a partial value.  The temporary file has
+  a unique name made by tempfile.mkstemp(), so writers on different hosts that share the
+  directory, and may have the same process ID, do not collide.
+"""
+
+import os
+import tempfile
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.coordination.ClusterCoordinator import ClusterCoordinator
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+
+TR = Trace(__name__)
+
+
+class FileSystemCoordinator(ClusterCoordinator):
+  """
+    ClusterCoordinator backed by files in a (shared) directory.
+  """
+
+  def __init__(self, path=None, **kwargs):
+    """
+      Constructor
+      
+      path - the coordination directory.  It is created if it does not exist.
+      
+      The remaining keyword arguments are passed to the ClusterCoordinator constructor.
+    """
+    ClusterCoordinator.__init__(self,**kwargs)
+    
+    if (not path):
+      raise MissingArgumentException("The path to the coordination directory must be provided.")
+    #endIf
+    
+    self.path = path
+    if (not os.path.exists(path)):
+      os.makedirs(path)
+    #endIf
+  #endDef
+
+
+  def _getFilePath(self, key):
+    """
+      Return the path of the file that holds the value of the given key.
+    """
+    relativePath = os.path.normpath(key.lstrip('/'))
+    if (relativePath.startswith('..') or os.path.isabs(relativePath)):
+      raise InvalidArgumentException("The coordination key: %s is not a path within: %s" % (key,self.path))
+    #endIf
+    return os.path.join(self.path,relativePath)
+  #endDef
+  
+  
+  def putValue(self, key, value, description=""):
+    """
+      Write the given value to the file of the given key.
+      
+      The description is not used by this backend.
+    """
+    filePath = self._getFilePath(key)
+    directory = os.path.dirname(filePath)
+    if (not os.path.exists(directory)):
+      try:
+        os.makedirs(directory)
+      except OSError:
+        # Another node may have created the directory.
+        if (not os.path.isdir(directory)): raise
+      #endTry
+    #endIf
+    
+    fd, tmpPath = tempfile.mkstemp(dir=directory,prefix="%s." % os.path.basename(filePath),suffix='.tmp')
+    try:
+      # mkstemp() creates the file readable by its owner only, the nodes may read it as another user.
+      os.fchmod(fd,0644)
+      with os.fdopen(fd,'w') as valueFile:
+        valueFile.write(value)
+      #endWith
+      os.rename(tmpPath,filePath)
+    except Exception:
+      if (os.path.exists(tmpPath)):
+        os.remove(tmpPath)
+      #endIf
+      raise
+    #endTry
+  #endDef
+  
+  
+  def getValues(self, keys):
+    """
+      Return a dictionary of the values of the given keys that have a file.
+    """
+    result = {}
+    for key in keys:
+      filePath = self._getFilePath(key)
+      try:
+        with open(filePath,'r') as valueFile:
+          result[key] = valueFile.read()
+        #endWith
+      except IOError:
+        # The file does not exist (yet).
+        pass
+      #endTry
+    #endFor
+    return result
+  #endDef
+  
+  
+  def deleteValues(self, keys):
+    """
+      Remove the files of the given keys.
+    """
+    methodName = "deleteValues"
+    
+    for key in keys:
+      filePath = self._getFilePath(key)
+      if (os.path.exists(filePath)):
+        os.remove(filePath)
+        if (TR.isLoggable(Level.FINEST)):
+          TR.finest(methodName,"Deleted: %s" % filePath)
+        #endIf
+      #endIf
+    #endFor
+  #endDef
+  
+#endClass
@@ -0,0 +1,103 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Cluster coordination with a dictionary in memory.
+  
+  The in-memory coordinator is used to simulate the coordination of a deployment in 
+  a single process, e.g., a boot node thread and a thread for each of hundreds of 
+  simulated cluster nodes that share one InMemoryCoordinator.  It counts the backend
+  calls so the cost of the coordination with some other backend can be estimated.
+  With maxBatchSize set, a getValues() or deleteValues() of more keys counts as one 
+  call per batch, the way the SSM backend is limited to 10 names per call.
+"""
+
+import threading
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.coordination.ClusterCoordinator import ClusterCoordinator
+
+TR = Trace(__name__)
+
+
+class InMemoryCoordinator(ClusterCoordinator):
+  """
+    ClusterCoordinator backed by a dictionary.
+  """
+
+  def __init__(self, maxBatchSize=None, **kwargs):
+    """
+      Constructor
+      
+      maxBatchSize - number of keys counted as one getValues() or deleteValues() call,
+                     by default all the keys of an invocation count as one call.
+      
+      The remaining keyword arguments are passed to the ClusterCoordinator constructor.
+    """
+    ClusterCoordinator.__init__(self,**kwargs)
+    
+    self.maxBatchSize = maxBatchSize
+    self.values = {}
+    self.callCounts = {'putValue': 0, 'getValues': 0, 'deleteValues': 0}
+    self.lock = threading.Lock()
+  #endDef
+
+
+  def _countCalls(self, operation, keyCount):
+    """
+      Add the number of backend calls for an operation on the given number of keys.
+      Caller holds the lock.
+    """
+    calls = 1
+    if (self.maxBatchSize and keyCount > self.maxBatchSize):
+      calls = (keyCount + self.maxBatchSize - 1) // self.maxBatchSize
+    #endIf
+    self.callCounts[operation] += calls
+  #endDef
+  
+  
+  def putValue(self, key, value, description=""):
+    """
+      Put the given value to the given key.
+    """
+    with self.lock:
+      self.values[key] = value
+      self._countCalls('putValue',1)
+    #endWith
+  #endDef
+  
+  
+  def getValues(self, keys):
+    """
+      Return a dictionary of the values of the given keys that exist.
+    """
+    with self.lock:
+      self._countCalls('getValues',len(keys))
+      return dict([(key,self.values[key]) for key in keys if key in self.values])
+    #endWith
+  #endDef
+  
+  
+  def deleteValues(self, keys):
+    """
+      Delete the given keys.
+    """
+    with self.lock:
+      self._countCalls('deleteValues',len(keys))
+      for key in keys:
+        self.values.pop(key,None)
+      #endFor
+    #endWith
+  #endDef
+  
+  
+  def getCallCounts(self):
+    """
+      Return a copy of the dictionary of backend call counts by operation.
+    """
+    with self.lock:
+      return dict(self.callCounts)
+    #endWith
+  #endDef
+  
+#endClass
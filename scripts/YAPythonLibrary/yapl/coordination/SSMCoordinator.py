@@ -0,0 +1,131 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Cluster coordination with AWS Systems Manager (SSM) Parameter Store parameters.
+  
+  Each coordination key is the name of a String parameter.
+"""
+
+import boto3
+from botocore.exceptions import ClientError
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.coordination.ClusterCoordinator import ClusterCoordinator
+from yapl.exceptions.CoordinationExceptions import CoordinationThrottledException
+
+TR = Trace(__name__)
+
+# ClientError codes of SSM requests that were throttled.
+ThrottlingErrorCodes = ['ThrottlingException', 'TooManyUpdates']
+
+# The SSM get_parameters() and delete_parameters() Names are limited to 10 names per call.
+ParameterNamesChunkSize = 10
+
+
+class SSMCoordinator(ClusterCoordinator):
+  """
+    ClusterCoordinator backed by SSM parameters.
+  """
+
+  def __init__(self, region=None, ssmClient=None, **kwargs):
+    """
+      Constructor
+      
+      region    - the AWS region name
+      ssmClient - optional SSM client, by default a client is created for the region
+      
+      The remaining keyword arguments are passed to the ClusterCoordinator constructor.
+    """
+    ClusterCoordinator.__init__(self,**kwargs)
+    
+    if (ssmClient):
+      self.ssm = ssmClient
+    else:
+      self.ssm = boto3.client('ssm', region_name=region)
+    #endIf
+  #endDef
+
+
+  def _isThrottled(self, clientError):
+    """
+      Return True if the given ClientError is due to SSM throttling.
+    """
+    errorCode = clientError.response.get('Error',{}).get('Code')
+    return errorCode in ThrottlingErrorCodes
+  #endDef
+  
+  
+  def putValue(self, key, value, description=""):
+    """
+      Put the given value to the SSM parameter with the given key.
+    """
+    try:
+      self.ssm.put_parameter(Name=key,
+                             Description=description,
+                             Value=value,
+                             Type='String',
+                             Overwrite=True)
+    except ClientError as e:
+      if (self._isThrottled(e)):
+        raise CoordinationThrottledException("SSM put_parameter() throttled for: %s" % key)
+      #endIf
+      raise
+    #endTry
+  #endDef
+  
+  
+  def getValues(self, keys):
+    """
+      Return a dictionary of the values of the SSM parameters with the given keys.
+      
+      The parameters are gotten in batches of ParameterNamesChunkSize names.  A parameter that
+      does not exist is returned by get_parameters() in the InvalidParameters list and it is 
+      left out of the result.
+    """
+    methodName = "getValues"
+    
+    result = {}
+    for i in range(0,len(keys),ParameterNamesChunkSize):
+      chunk = keys[i:i+ParameterNamesChunkSize]
+      try:
+        response = self.ssm.get_parameters(Names=chunk)
+      except ClientError as e:
+        if (self._isThrottled(e)):
+          raise CoordinationThrottledException("SSM get_parameters() throttled: %s" % e)
+        #endIf
+        raise
+      #endTry
+      
+      for parameter in response.get('Parameters',[]):
+        result[parameter.get('Name')] = parameter.get('Value')
+      #endFor
+      
+      if (TR.isLoggable(Level.FINEST)):
+        invalidParameters = response.get('InvalidParameters')
+        if (invalidParameters):
+          TR.finest(methodName,"Parameters not found: %s" % invalidParameters)
+        #endIf
+      #endIf
+    #endFor
+    
+    return result
+  #endDef
+  
+  
+  def deleteValues(self, keys):
+    """
+      Delete the SSM parameters with the given keys in batches of ParameterNamesChunkSize names.
+    """
+    methodName = "deleteValues"
+    
+    for i in range(0,len(keys),ParameterNamesChunkSize):
+      chunk = keys[i:i+ParameterNamesChunkSize]
+      self.ssm.delete_parameters(Names=chunk)
+      if (TR.isLoggable(Level.FINEST)):
+        TR.finest(methodName,"Deleted SSM parameters: %s" % chunk)
+      #endIf
+    #endFor
+  #endDef
+  
+#endClass
@@ -0,0 +1,226 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Peer distribution of the installation artifacts from the boot node to the cluster
+  nodes over a fan-out tree, so the network interface of the boot node is not the
+  bottleneck and the nodes do not all download the artifacts from S3.
+
+  The boot node is the root of the tree.  The cluster nodes, in sorted order, fill
+  the tree level by level with fanOut children per node: the first fanOut nodes get
+  the artifacts from the boot node, the next fanOut * fanOut nodes get them from those
+  nodes and so on.  Each node that gets the artifacts serves them to its children with
+  a yapl.distribution.ArtifactServer.
+
+  The tree is published with the cluster coordinator:
+    /<stack-name>/artifact-children/<fqdn> - comma separated children of a node
+    /<stack-name>/artifact-tree            - number of hosts of the tree, published after
+                                             the children of all of the nodes
+    /<stack-name>/artifact-source/<fqdn>   - base URL of the server a node gets the
+                                             artifacts from, published by the parent
+                                             when it is serving them
+
+  A node with no children has no children key, so a node waits for the tree key before
+  it reads its children, e.g., a node that has the artifacts in its local cache and does
+  not wait for its source.
+
+  A node waits for its source.  If the source is not published in time, or the
+  download from it fails, the node gets the artifacts from S3.  A node serves its
+  children either way.  A parent that can not serve its children publishes NoSource
+  as their source, so they go to S3 right away rather than wait for the timeout.
+"""
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+from yapl.exceptions.CoordinationExceptions import CoordinationTimeoutException
+
+TR = Trace(__name__)
+
+# Number of children of a node of the fan-out tree.
+DefaultFanOut = 4
+
+# Source published by a parent that does not serve the artifacts.
+NoSource = "none"
+
+
+class ArtifactDistribution(object):
+  """
+    Fan-out tree of the artifact servers of a deployment.
+  """
+
+  def __init__(self, coordinator, stackName, fanOut=DefaultFanOut):
+    """
+      Constructor
+
+      coordinator - the yapl.coordination.ClusterCoordinator of the deployment
+      stackName   - the root stack name used in the coordination keys
+      fanOut      - number of children of a node of the tree
+    """
+    object.__init__(self)
+
+    if (not coordinator):
+      raise MissingArgumentException("A cluster coordinator must be provided.")
+    #endIf
+
+    if (not stackName):
+      raise MissingArgumentException("The stack name must be provided.")
+    #endIf
+
+    if (fanOut < 1):
+      raise InvalidArgumentException("The fan-out must be at least 1, given: %s" % fanOut)
+    #endIf
+
+    self.coordinator = coordinator
+    self.stackName = stackName
+    self.fanOut = fanOut
+  #endDef
+
+
+  def getSourceKey(self, host):
+    """
+      Return the key of the artifact source of the given host.
+    """
+    return "/%s/artifact-source/%s" % (self.stackName,host)
+  #endDef
+
+
+  def getTreeKey(self):
+    """
+      Return the key published when the whole tree has been published.
+    """
+    return "/%s/artifact-tree" % self.stackName
+  #endDef
+
+
+  def getChildrenKey(self, host):
+    """
+      Return the key of the children of the given host.
+    """
+    return "/%s/artifact-children/%s" % (self.stackName,host)
+  #endDef
+
+
+  def getTree(self, rootHost, hosts):
+    """
+      Return a dictionary of host to list of children for the given root and hosts.
+      Hosts with no children are not in the dictionary.
+    """
+    hosts = sorted(set(hosts) - set([rootHost]))
+    tree = {}
+    for index, host in enumerate(hosts):
+      if (index < self.fanOut):
+        parent = rootHost
+      else:
+        parent = hosts[index // self.fanOut - 1]
+      #endIf
+      tree.setdefault(parent,[]).append(host)
+    #endFor
+    return tree
+  #endDef
+
+
+  def publishTree(self, rootHost, hosts):
+    """
+      Publish the children of each node of the tree for the given root and hosts.
+
+      Return a tuple with the children of the root and the list of the coordination keys
+      the tree uses, including the source keys the parents publish, so the caller can
+      delete them at the end.
+    """
+    methodName = "publishTree"
+
+    tree = self.getTree(rootHost,hosts)
+    keys = []
+    for parent, children in tree.items():
+      if (parent != rootHost):
+        key = self.getChildrenKey(parent)
+        self.coordinator.publishState(key,",".join(children),description="Artifact distribution children of: %s" % parent)
+        keys.append(key)
+      #endIf
+      keys.extend([self.getSourceKey(child) for child in children])
+    #endFor
+
+    # Published last, a node that sees it sees the children of every node.
+    key = self.getTreeKey()
+    self.coordinator.publishState(key,str(len(hosts)),description="Artifact distribution tree hosts")
+    keys.append(key)
+
+    TR.info(methodName,"Published artifact distribution tree of %d hosts with fan-out: %d" % (len(hosts),self.fanOut))
+    return (tree.get(rootHost,[]),keys)
+  #endDef
+
+
+  def getChildren(self, host, timeout=None):
+    """
+      Return the list of children of the given host, empty if it has none.
+
+      With a timeout in seconds, wait that long for the tree to be published first.  The
+      list is empty if the tree is not published in time.
+    """
+    methodName = "getChildren"
+
+    if (timeout != None):
+      try:
+        self.coordinator.waitForValue(self.getTreeKey(),timeout=timeout)
+      except CoordinationTimeoutException as e:
+        TR.warning(methodName,"No artifact distribution tree published, not serving the artifacts: %s" % e)
+        return []
+      #endTry
+    #endIf
+
+    children = self.coordinator.getValue(self.getChildrenKey(host))
+    if (not children):
+      return []
+    #endIf
+    return children.split(',')
+  #endDef
+
+
+  def publishSource(self, url, children):
+    """
+      Publish the given base URL as the artifact source of each of the given children.
+    """
+    for child in children:
+      self.coordinator.publishState(self.getSourceKey(child),url,description="Artifact source of: %s" % child)
+    #endFor
+  #endDef
+
+
+  def publishNoSource(self, children):
+    """
+      Publish NoSource as the artifact source of each of the given children, so they get
+      the artifacts from S3 without waiting for a source.
+    """
+    for child in children:
+      self.coordinator.publishState(self.getSourceKey(child),NoSource,description="No artifact source for: %s" % child)
+    #endFor
+  #endDef
+
+
+  def waitForSource(self, host, timeout):
+    """
+      Return the base URL of the artifact source of the given host or None if it is not
+      published within the given timeout in seconds or its parent published NoSource.
+    """
+    methodName = "waitForSource"
+
+    try:
+      source = self.coordinator.waitForValue(self.getSourceKey(host),timeout=timeout)
+    except CoordinationTimeoutException as e:
+      TR.warning(methodName,"No artifact source published for: %s: %s" % (host,e))
+      return None
+    #endTry
+
+    if (source == NoSource):
+      TR.info(methodName,"The parent of: %s does not serve the artifacts." % host)
+      return None
+    #endIf
+
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Artifact source of: %s is: %s" % (host,source))
+    #endIf
+    return source
+  #endDef
+
+#endClass
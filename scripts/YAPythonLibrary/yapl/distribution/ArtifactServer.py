@@ -0,0 +1,252 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  A small multi-threaded HTTP server that serves a fixed set of local files, e.g., the
+  installation artifacts the boot node downloaded from S3, to the other nodes of the
+  deployment.
+
+  An artifact is served at /<name> where the name is the S3 key of the artifact, e.g.,
+  /3.1.2/icp-docker-18.03.1_x86_64.bin.  Only the registered artifacts are served, a
+  request for any other path gets a 404.
+
+  GET and HEAD are supported with a single byte range (Range: bytes=first-last,
+  bytes=first- or bytes=-suffixLength), so a yapl.utilities.RangedDownloader can get an
+  artifact over several connections and resume a download.  The ETag of an artifact is
+  made from its size and modification time.
+"""
+
+import os
+import re
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import FileNotFoundException
+
+TR = Trace(__name__)
+
+# Port the artifact server listens on.
+DefaultPort = 8089
+
+# Size in bytes of the reads from an artifact file.
+DefaultBufferSize = 1024 * 1024
+
+RangePattern = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+class ArtifactRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """
+    Request handler of an ArtifactServer.  The server attribute is the HTTP server with
+    an artifacts dictionary of artifact name to file path.
+  """
+
+  protocol_version = "HTTP/1.1"
+
+
+  def log_message(self, format, *args):
+    """
+      Send the access log to the trace rather than stderr.
+    """
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine("log_message","%s %s" % (self.client_address[0],format % args))
+    #endIf
+  #endDef
+
+
+  def _getRange(self, size):
+    """
+      Return a tuple with the first and last byte of the requested range, the whole
+      artifact if there is no Range header, or None if the range is not satisfiable.
+    """
+    rangeHeader = self.headers.get('Range')
+    if (not rangeHeader):
+      return (0,size - 1)
+    #endIf
+
+    match = RangePattern.match(rangeHeader.strip())
+    if (not match or (not match.group(1) and not match.group(2))):
+      return None
+    #endIf
+
+    if (not match.group(1)):
+      # A suffix range: the last n bytes
+      first = max(0,size - int(match.group(2)))
+      last = size - 1
+    else:
+      first = int(match.group(1))
+      last = int(match.group(2)) if match.group(2) else size - 1
+      last = min(last,size - 1)
+    #endIf
+
+    if (first > last or first >= size):
+      return None
+    #endIf
+    return (first,last)
+  #endDef
+
+
+  def _sendArtifact(self, sendBody):
+    """
+      Send the headers and, if sendBody is True, the requested bytes of the artifact.
+    """
+    name = self.path.split('?')[0].lstrip('/')
+    artifactPath = self.server.artifacts.get(name)
+    if (not artifactPath or not os.path.isfile(artifactPath)):
+      self.send_error(404,"No artifact: %s" % name)
+      return
+    #endIf
+
+    stat = os.stat(artifactPath)
+    size = stat.st_size
+    etag = '"%x-%x"' % (size,int(stat.st_mtime))
+
+    byteRange = self._getRange(size)
+    if (byteRange == None):
+      self.send_response(416)
+      self.send_header('Content-Range',"bytes */%d" % size)
+      self.send_header('Content-Length','0')
+      self.end_headers()
+      return
+    #endIf
+
+    first, last = byteRange
+    length = last - first + 1
+    if (self.headers.get('Range')):
+      self.send_response(206)
+      self.send_header('Content-Range',"bytes %d-%d/%d" % (first,last,size))
+    else:
+      self.send_response(200)
+    #endIf
+    self.send_header('Content-Type','application/octet-stream')
+    self.send_header('Content-Length',str(length))
+    self.send_header('Accept-Ranges','bytes')
+    self.send_header('ETag',etag)
+    self.end_headers()
+
+    if (not sendBody): return
+
+    with open(artifactPath,'rb') as artifactFile:
+      artifactFile.seek(first)
+      remaining = length
+      while (remaining > 0):
+        data = artifactFile.read(min(self.server.bufferSize,remaining))
+        if (not data): break
+        self.wfile.write(data)
+        remaining -= len(data)
+      #endWhile
+    #endWith
+  #endDef
+
+
+  def do_GET(self):
+    self._sendArtifact(True)
+  #endDef
+
+
+  def do_HEAD(self):
+    self._sendArtifact(False)
+  #endDef
+
+#endClass
+
+
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  """
+    HTTP server with a thread per connection.
+  """
+  daemon_threads = True
+  allow_reuse_address = True
+#endClass
+
+
+class ArtifactServer(object):
+  """
+    Serve local files over HTTP with range support.
+  """
+
+  def __init__(self, artifacts=None, port=DefaultPort, bindAddress='', bufferSize=DefaultBufferSize):
+    """
+      Constructor
+
+      artifacts   - optional dictionary of artifact name to local file path
+      port        - port to listen on
+      bindAddress - address to listen on, by default all interfaces
+      bufferSize  - size in bytes of the reads from an artifact file
+    """
+    object.__init__(self)
+
+    self.artifacts = {}
+    self.port = port
+    self.bindAddress = bindAddress
+    self.bufferSize = bufferSize
+    self.httpServer = None
+    self.thread = None
+
+    for name, path in (artifacts or {}).items():
+      self.addArtifact(name,path)
+    #endFor
+  #endDef
+
+
+  def addArtifact(self, name, path):
+    """
+      Serve the file at the given path as /<name>.
+    """
+    if (not name):
+      raise MissingArgumentException("The artifact name must be provided.")
+    #endIf
+
+    if (not os.path.isfile(path)):
+      raise FileNotFoundException("The artifact: %s file: %s does not exist." % (name,path))
+    #endIf
+
+    self.artifacts[name.lstrip('/')] = path
+  #endDef
+
+
+  def start(self):
+    """
+      Start serving the artifacts on a daemon thread.
+    """
+    methodName = "start"
+
+    self.httpServer = ThreadingHTTPServer((self.bindAddress,self.port),ArtifactRequestHandler)
+    self.httpServer.artifacts = self.artifacts
+    self.httpServer.bufferSize = self.bufferSize
+    # With port 0 the system picks the port.
+    self.port = self.httpServer.server_address[1]
+
+    self.thread = threading.Thread(target=self.httpServer.serve_forever,name="ArtifactServer")
+    self.thread.daemon = True
+    self.thread.start()
+
+    TR.info(methodName,"Serving %d artifacts on port: %d: %s" % (len(self.artifacts),self.port,self.artifacts.keys()))
+  #endDef
+
+
+  def stop(self):
+    """
+      Stop serving.
+    """
+    methodName = "stop"
+
+    if (self.httpServer):
+      self.httpServer.shutdown()
+      self.httpServer.server_close()
+      self.httpServer = None
+      TR.info(methodName,"Stopped serving artifacts on port: %d" % self.port)
+    #endIf
+  #endDef
+
+
+  def getURL(self, host):
+    """
+      Return the base URL of the server for the given host name, e.g., http://<host>:<port>
+    """
+    return "http://%s:%d" % (host,self.port)
+  #endDef
+
+#endClass
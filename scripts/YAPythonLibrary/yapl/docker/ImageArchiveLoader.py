@@ -0,0 +1,247 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Load the images in a gzip compressed tar archive of docker save tar files, e.g., the
+  ICP install archive, into the local docker engine as the archive is streamed, without
+  writing the uncompressed image tar files to disk.
+
+  The pipeline is:
+    HTTP response body (or file) -> gzip decompression -> tar member stream -> docker load API
+
+  The compressed bytes may be teed to a file as they are read, so the archive is on disk
+  when the load completes, e.g., for the ICP inception install which needs the archive
+  in cluster/images.
+
+  The load is done with the docker engine API (APIClient.load_image()) with a generator
+  as the request body so the image tar is sent to the engine in chunks as it is read
+  from the archive.  The engine reports each image as it is loaded.  The time from the
+  start of the load to the first image loaded and the total wall time are recorded.
+
+  If a sha256 hex digest is provided the compressed bytes are hashed as they are read.
+  The images are loaded before the whole archive has been read, so a mismatch can only
+  be detected at the end.  The tee file is removed and an exception is raised so the
+  archive is not used for the inception install.
+"""
+
+import os
+import time
+import hashlib
+import tarfile
+import requests
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import FileTransferException
+from yapl.exceptions.ICPExceptions import ICPInstallationException
+
+TR = Trace(__name__)
+
+# Size in bytes of the reads from the archive stream.
+DefaultBufferSize = 1024 * 1024
+
+
+class TeeReader(object):
+  """
+    File-like reader that writes the bytes it reads from a source to a tee file.
+  """
+
+  def __init__(self, source, teeFile=None, hasher=None):
+    """
+      source  - file-like object with a read() method
+      teeFile - optional file open for writing that gets a copy of the bytes read
+      hasher  - optional hashlib hash that is updated with the bytes read
+    """
+    object.__init__(self)
+    self.source = source
+    self.teeFile = teeFile
+    self.hasher = hasher
+    self.byteCount = 0
+  #endDef
+
+
+  def read(self, size=-1):
+    data = self.source.read(size)
+    if (data):
+      self.byteCount += len(data)
+      if (self.teeFile):
+        self.teeFile.write(data)
+      #endIf
+      if (self.hasher):
+        self.hasher.update(data)
+      #endIf
+    #endIf
+    return data
+  #endDef
+
+
+  def drain(self, bufferSize=DefaultBufferSize):
+    """
+      Read the rest of the source, e.g., the gzip trailer that the tar stream does not read.
+    """
+    while (self.read(bufferSize)):
+      pass
+    #endWhile
+  #endDef
+
+#endClass
+
+
+class ImageArchiveLoader(object):
+  """
+    Streaming load of the images in a compressed tar archive into docker.
+  """
+
+  def __init__(self, dockerClient, bufferSize=DefaultBufferSize):
+    """
+      Constructor
+
+      dockerClient - a docker.DockerClient instance, e.g., docker.from_env()
+      bufferSize   - size in bytes of the reads from the archive stream
+    """
+    object.__init__(self)
+
+    if (not dockerClient):
+      raise MissingArgumentException("A docker client must be provided.")
+    #endIf
+
+    self.dockerClient = dockerClient
+    self.bufferSize = bufferSize
+  #endDef
+
+
+  def _memberChunks(self, memberFile):
+    """
+      Generator of the chunks of a tar member, the body of a docker load request.
+    """
+    while (True):
+      chunk = memberFile.read(self.bufferSize)
+      if (not chunk): break
+      yield chunk
+    #endWhile
+  #endDef
+
+
+  def loadFromStream(self, stream, teePath=None, sha256=None):
+    """
+      Load the images in the gzip compressed tar archive read from the given stream.
+
+      If a teePath is provided the compressed bytes are written to that file as they are read.
+
+      If a sha256 hex digest is provided and the archive has a different SHA-256, the tee
+      file is removed and an ICPInstallationException is raised after the load.
+
+      Return a dictionary with the names of the loaded images (images), the number of
+      compressed bytes read (bytes), the seconds from the start to the first image loaded
+      (timeToFirstImage) and the total seconds of the load (wallTime).
+    """
+    methodName = "loadFromStream"
+
+    startTime = time.time()
+    firstImageTime = None
+    images = []
+
+    teeFile = None
+    if (teePath):
+      teeFile = open(teePath,'wb')
+    #endIf
+
+    try:
+      reader = TeeReader(stream,teeFile,hashlib.sha256() if sha256 else None)
+      archive = tarfile.open(fileobj=reader, mode='r|gz', bufsize=self.bufferSize)
+      try:
+        for member in archive:
+          if (not member.isfile()): continue
+
+          TR.info(methodName,"Loading images from archive member: %s, %d bytes." % (member.name,member.size))
+          memberFile = archive.extractfile(member)
+          for status in self.dockerClient.api.load_image(self._memberChunks(memberFile)):
+            if (TR.isLoggable(Level.FINEST)):
+              TR.finest(methodName,"Load status: %s" % status)
+            #endIf
+
+            if (type(status) == type({}) and status.get('error')):
+              raise ICPInstallationException("Docker load of archive member: %s failed: %s" % (member.name,status.get('error')))
+            #endIf
+
+            message = status.get('stream','') if type(status) == type({}) else "%s" % status
+            if (message.startswith('Loaded image')):
+              if (firstImageTime == None):
+                firstImageTime = time.time()
+                TR.info(methodName,"First image loaded after %.1f seconds." % (firstImageTime - startTime))
+              #endIf
+              images.append(message.split(':',1)[1].strip())
+            #endIf
+          #endFor
+        #endFor
+      finally:
+        archive.close()
+      #endTry
+
+      # The tee file must get the whole archive, including what the tar stream did not read.
+      reader.drain(self.bufferSize)
+    finally:
+      if (teeFile):
+        teeFile.close()
+      #endIf
+    #endTry
+
+    if (sha256):
+      digest = reader.hasher.hexdigest()
+      if (digest.lower() != sha256.lower()):
+        if (teePath and os.path.exists(teePath)):
+          os.remove(teePath)
+        #endIf
+        raise ICPInstallationException("The image archive has SHA-256: %s, expected: %s" % (digest,sha256))
+      #endIf
+    #endIf
+
+    endTime = time.time()
+    result = { 'images': images,
+               'bytes': reader.byteCount,
+               'timeToFirstImage': (firstImageTime - startTime) if firstImageTime else None,
+               'wallTime': endTime - startTime
+             }
+
+    TR.info(methodName,"Loaded %d images from %d compressed bytes in %.1f seconds." % (len(images),reader.byteCount,result['wallTime']))
+    return result
+  #endDef
+
+
+  def loadFromURL(self, url, teePath=None, sha256=None):
+    """
+      Load the images in the gzip compressed tar archive at the given URL, e.g., an S3
+      pre-signed URL.  See loadFromStream().
+    """
+    response = requests.get(url, stream=True)
+    try:
+      if (response.status_code != 200):
+        raise FileTransferException("Get of the image archive failed with HTTP status: %s %s" % (response.status_code,response.reason))
+      #endIf
+
+      # The raw stream is the compressed body.  The tar stream does the gzip decompression.
+      response.raw.decode_content = False
+      result = self.loadFromStream(response.raw,teePath=teePath,sha256=sha256)
+
+      contentLength = response.headers.get('Content-Length')
+      if (contentLength and int(contentLength) != result['bytes']):
+        raise FileTransferException("Got %d bytes of the image archive, expected %s bytes." % (result['bytes'],contentLength))
+      #endIf
+    finally:
+      response.close()
+    #endTry
+
+    return result
+  #endDef
+
+
+  def loadFromFile(self, archivePath):
+    """
+      Load the images in the gzip compressed tar archive at the given path.  See loadFromStream().
+    """
+    with open(archivePath,'rb') as archiveFile:
+      return self.loadFromStream(archiveFile)
+    #endWith
+  #endDef
+
+#endClass
@@ -0,0 +1,366 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  An index of the images in the local docker engine by ID, repo tag, repo digest and
+  repository name, and a comparison of the images listed in the manifest.json of a
+  docker save archive with the local images.
+
+  The index is built from one images.list() call and kept until it is invalidated, e.g.,
+  after a docker load.  A lookup that misses rebuilds the index once, so an image loaded
+  by some other means is still found.
+
+  An image of an archive is present when the local engine has an image with its ID,
+  the sha256 digest of its config file, and all of its repo tags.  An image with the ID
+  that is missing some of its tags only needs to be tagged, not loaded.  In an archive of
+  docker save tar files, e.g., the ICP install archive, each docker save tar file has its
+  own manifest.json, so a tar file whose images are all present can be left out of the load.
+"""
+
+import os
+import json
+import tarfile
+import threading
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+
+TR = Trace(__name__)
+
+# Architecture suffixes of the ICP image repository names, e.g., ibmcom/icp-inception-amd64
+ArchitectureSuffixes = [ '-amd64', '-ppc64le', '-s390x' ]
+
+
+class ImageIndex(object):
+  """
+    Index of the images in the local docker engine.
+  """
+
+  def __init__(self, dockerClient):
+    """
+      Constructor
+
+      dockerClient - a docker.DockerClient instance, e.g., docker.from_env()
+    """
+    object.__init__(self)
+
+    if (not dockerClient):
+      raise MissingArgumentException("A docker client must be provided.")
+    #endIf
+
+    self.dockerClient = dockerClient
+    self.lock = threading.Lock()
+    self.byId = None
+    self.byTag = {}
+    self.byDigest = {}
+    self.byName = {}
+  #endDef
+
+
+  def _getNames(self, repoTag):
+    """
+      Return the names a repo tag is indexed by: the repository, the last component of
+      the repository and the last component without the architecture suffix.
+
+      For example, ibmcom/icp-inception-amd64:3.1.2-ee is indexed by ibmcom/icp-inception-amd64,
+      icp-inception-amd64 and icp-inception.
+    """
+    repository = repoTag
+    # A colon after the last slash is the tag separator, otherwise it is a registry port.
+    colon = repoTag.rfind(':')
+    if (colon > repoTag.rfind('/')):
+      repository = repoTag[:colon]
+    #endIf
+
+    baseName = repository.split('/')[-1]
+    names = [repository,baseName]
+    for suffix in ArchitectureSuffixes:
+      if (baseName.endswith(suffix)):
+        names.append(baseName[:-len(suffix)])
+      #endIf
+    #endFor
+    return names
+  #endDef
+
+
+  def refresh(self):
+    """
+      Rebuild the index from the images in the local docker engine.
+    """
+    methodName = "refresh"
+
+    images = self.dockerClient.images.list()
+    byId = {}
+    byTag = {}
+    byDigest = {}
+    byName = {}
+    for image in images:
+      byId[image.id] = image
+      for repoTag in image.tags:
+        byTag[repoTag] = image
+        for name in self._getNames(repoTag):
+          byName.setdefault(name,image)
+        #endFor
+      #endFor
+      for repoDigest in image.attrs.get('RepoDigests') or []:
+        byDigest[repoDigest] = image
+        byDigest[repoDigest.split('@')[-1]] = image
+      #endFor
+    #endFor
+
+    with self.lock:
+      self.byId = byId
+      self.byTag = byTag
+      self.byDigest = byDigest
+      self.byName = byName
+    #endWith
+
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Indexed %d local images with %d tags." % (len(byId),len(byTag)))
+    #endIf
+  #endDef
+
+
+  def invalidate(self):
+    """
+      Discard the index, e.g., after images have been loaded.  The next lookup rebuilds it.
+    """
+    with self.lock:
+      self.byId = None
+    #endWith
+  #endDef
+
+
+  def _lookup(self, name):
+    """
+      Return the image indexed by the given name or None.
+    """
+    with self.lock:
+      if (self.byId == None):
+        return None
+      #endIf
+      if (not name.startswith('sha256:') and len(name) == 64):
+        name = "sha256:%s" % name
+      #endIf
+      return (self.byId.get(name) or self.byTag.get(name) or
+              self.byDigest.get(name) or self.byName.get(name))
+    #endWith
+  #endDef
+
+
+  def getImage(self, name):
+    """
+      Return the local image with the given ID, repo tag, repo digest or repository name
+      or None if there is no such image.
+
+      If none of those match, the first image with a tag that contains the given name is
+      returned, which is how images were looked up before there was an index.
+    """
+    if (not name):
+      raise MissingArgumentException("The name of the image must be provided.")
+    #endIf
+
+    if (self.byId == None):
+      self.refresh()
+    #endIf
+
+    image = self._lookup(name)
+    if (not image):
+      self.refresh()
+      image = self._lookup(name)
+    #endIf
+
+    if (not image):
+      with self.lock:
+        for repoTag in sorted(self.byTag.keys()):
+          if (repoTag.find(name) >= 0):
+            image = self.byTag[repoTag]
+            break
+          #endIf
+        #endFor
+      #endWith
+    #endIf
+    return image
+  #endDef
+
+
+  def _getImageId(self, entry):
+    """
+      Return the image ID of the given archive manifest entry, the sha256 digest of its config file.
+
+      The config file is <hex>.json in a docker save archive and blobs/sha256/<hex> in an
+      OCI layout archive.
+    """
+    hexDigest = os.path.splitext(os.path.basename(entry['Config']))[0]
+    return "sha256:%s" % hexDigest
+  #endDef
+
+
+  def compare(self, manifest):
+    """
+      Compare the given archive manifest with the local images.
+
+      Return a tuple with the list of the manifest entries of the images that must be
+      loaded and a list of (image ID, repo tag) tuples of the tags that must be added to
+      images that are present.
+    """
+    methodName = "compare"
+
+    self.refresh()
+    missing = []
+    tags = []
+    with self.lock:
+      for entry in manifest:
+        imageId = self._getImageId(entry)
+        image = self.byId.get(imageId)
+        if (not image):
+          missing.append(entry)
+          continue
+        #endIf
+        for repoTag in entry.get('RepoTags') or []:
+          if (self.byTag.get(repoTag) != image):
+            tags.append((imageId,repoTag))
+          #endIf
+        #endFor
+      #endFor
+    #endWith
+
+    TR.info(methodName,"Of %d archive images, %d are missing and %d tags are missing." % (len(manifest),len(missing),len(tags)))
+    return (missing,tags)
+  #endDef
+
+
+  def addTags(self, tags):
+    """
+      Add the given list of (image ID, repo tag) tuples to the local images.
+    """
+    methodName = "addTags"
+
+    for imageId, repoTag in tags:
+      repository, tag = repoTag.rsplit(':',1)
+      TR.info(methodName,"Tagging image: %s as: %s" % (imageId,repoTag))
+      self.dockerClient.api.tag(imageId,repository,tag=tag)
+    #endFor
+
+    if (tags):
+      self.invalidate()
+    #endIf
+  #endDef
+
+
+  def readArchiveManifest(self, archivePath):
+    """
+      Return the manifest of the given, possibly compressed, docker save archive or None if
+      the archive has no manifest.json or cannot be read as a tar archive.
+
+      The archive is read up to the manifest.json member.
+    """
+    methodName = "readArchiveManifest"
+
+    try:
+      archive = tarfile.open(archivePath,'r|*')
+      try:
+        return self._readManifest(archive)
+      finally:
+        archive.close()
+      #endTry
+    except (tarfile.TarError, IOError, ValueError) as e:
+      TR.warning(methodName,"Unable to read the manifest of archive: %s: %s" % (archivePath,e))
+    #endTry
+    return None
+  #endDef
+
+
+  def _readManifest(self, archive):
+    """
+      Return the manifest of the given tar archive open for streaming or None if it has no
+      manifest.json.  The archive is read up to the manifest.json member.
+    """
+    for member in archive:
+      if (os.path.normpath(member.name) == 'manifest.json'):
+        return json.load(archive.extractfile(member))
+      #endIf
+    #endFor
+    return None
+  #endDef
+
+
+  def imagesPresent(self, archivePath):
+    """
+      Return True if all of the images of the given docker save archive are present with
+      all of their tags.  Missing tags are added.  Return False if some image is missing or
+      the manifest of the archive cannot be read.
+    """
+    manifest = self.readArchiveManifest(archivePath)
+    if (manifest == None):
+      return False
+    #endIf
+
+    missing, tags = self.compare(manifest)
+    if (missing):
+      return False
+    #endIf
+    self.addTags(tags)
+    return True
+  #endDef
+
+
+  def compareArchiveMembers(self, archivePath):
+    """
+      Compare the images of the docker save tar files in the given, possibly compressed,
+      archive of docker save tar files, e.g., the ICP install archive, with the local images.
+      Missing tags of the present images are added.
+
+      Return a tuple with the list of the names of the docker save tar files whose images
+      are all present and the list of the names of the other tar files.  The second list is
+      None if the archive was not read: there are no local images, e.g., on a new node, so
+      nothing can be present, or the archive cannot be read.
+
+      In a docker save tar file the manifest.json is the last member, so the whole archive
+      is read, but nothing is written to disk.
+    """
+    methodName = "compareArchiveMembers"
+
+    self.refresh()
+    if (not self.byId):
+      return ([],None)
+    #endIf
+
+    present = []
+    missing = []
+    try:
+      archive = tarfile.open(archivePath,'r|*')
+      try:
+        for member in archive:
+          if (not member.isfile() or not member.name.endswith('.tar')): continue
+          dockerSave = tarfile.open(fileobj=archive.extractfile(member),mode='r|')
+          try:
+            manifest = self._readManifest(dockerSave)
+          finally:
+            dockerSave.close()
+          #endTry
+
+          missingImages = True
+          if (manifest != None):
+            missingImages, tags = self.compare(manifest)
+          #endIf
+          if (missingImages):
+            missing.append(member.name)
+          else:
+            self.addTags(tags)
+            present.append(member.name)
+          #endIf
+        #endFor
+      finally:
+        archive.close()
+      #endTry
+    except (tarfile.TarError, IOError, ValueError) as e:
+      TR.warning(methodName,"Unable to read the manifests of archive: %s: %s" % (archivePath,e))
+      return ([],None)
+    #endTry
+
+    TR.info(methodName,"Of %d docker save archives in: %s, the images of %d are present." % (len(present) + len(missing),archivePath,len(present)))
+    return (present,missing)
+  #endDef
+
+#endClass
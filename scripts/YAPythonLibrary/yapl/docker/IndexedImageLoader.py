@@ -0,0 +1,543 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Load the images of a docker save archive, or of an archive of docker save archives,
+  e.g., the ICP install archive, into docker concurrently, one docker load request per
+  image.
+
+  The archive is indexed: the manifest.json of the archive lists each image with its
+  config file and its layer files, and the tar header of each member gives the offset
+  of its data in the archive.  In an archive of docker save archives, each docker save
+  archive is a member of the archive.  Its own tar headers are read at the offset of
+  the data of the member, which gives the offsets of its members in the archive, and
+  the manifests of all of the docker save archives are merged.  For each image a docker
+  save tar stream is built on the fly with a manifest of that image only, its config
+  file and its layer files, read from the archive at their offsets, and sent to the
+  docker engine load API.
+
+  A layer shared by several images is streamed once.  The layer directories in a docker
+  save archive are identified by the chain of layers up to and including the layer, so
+  the same layer file in two images means the same chain of layers.  The first image in
+  the manifest that uses a layer owns it.  An image that uses a layer owned by another
+  image waits until the owner is loaded and then leaves the layer data out of its load
+  request.  Docker does not read the data of a layer it already has.
+
+  With a yapl.docker.ImageIndex, the images of the archive that are already present in
+  the local docker engine are not loaded, only missing tags are added to them.
+
+  A compressed archive is decompressed to a work file first because the members of an
+  image are not read in archive order.  The work file is removed when the load is done.
+  The work file needs as much free space as the uncompressed archive.
+
+  The layout of the archive is detected from its first file, read from the head of the
+  compressed stream, before anything is decompressed.  An archive with some other layout,
+  an archive of tar files that are not all docker save archives with a manifest.json, or
+  an archive that could not be decompressed, e.g., the work file system is full, raises
+  an InvalidArgumentException with nothing loaded so the caller can fall back to streaming
+  the archive to docker load.
+"""
+
+import os
+import re
+import json
+import time
+import tarfile
+import threading
+from subprocess import check_call, CalledProcessError
+from multiprocessing.pool import ThreadPool
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+from yapl.exceptions.ICPExceptions import ICPInstallationException
+
+TR = Trace(__name__)
+
+# Size in bytes of the reads from the archive.
+DefaultBufferSize = 1024 * 1024
+
+# Number of images loaded at the same time.
+DefaultMaxWorkers = 4
+
+TarBlockSize = tarfile.BLOCKSIZE
+
+# Layouts of an image archive, see getArchiveLayout().
+DockerSaveLayout = "docker-save"
+NestedLayout = "nested"
+
+# Names of the files of a docker save archive: the manifest and repositories files, the
+# image config files, the layer directories and, for docker 25 and later, the OCI layout.
+DockerSaveMemberPattern = re.compile(r'^(manifest\.json|repositories|index\.json|oci-layout|[0-9a-f]{64}\.json|[0-9a-f]{64}/(VERSION|json|layer\.tar)|blobs/sha256/[0-9a-f]{64})$')
+
+
+class IndexedImageLoader(object):
+  """
+    Concurrent per image load of a docker save archive or an archive of docker save archives.
+  """
+
+  def __init__(self, dockerClient, maxWorkers=DefaultMaxWorkers, bufferSize=DefaultBufferSize, timeline=None, imageIndex=None):
+    """
+      Constructor
+
+      dockerClient - a docker.DockerClient instance, e.g., docker.from_env()
+      maxWorkers   - number of images loaded at the same time
+      bufferSize   - size in bytes of the reads from the archive
+      timeline     - optional yapl.utilities.Timeline that gets a span for the load of each image
+      imageIndex   - optional yapl.docker.ImageIndex used to skip the images that are present
+    """
+    object.__init__(self)
+
+    if (not dockerClient):
+      raise MissingArgumentException("A docker client must be provided.")
+    #endIf
+
+    if (maxWorkers < 1):
+      raise InvalidArgumentException("The maximum number of workers must be at least 1, given: %s" % maxWorkers)
+    #endIf
+
+    self.dockerClient = dockerClient
+    self.maxWorkers = maxWorkers
+    self.bufferSize = bufferSize
+    self.timeline = timeline
+    self.imageIndex = imageIndex
+    self.archivePath = None
+    self.manifest = []
+    self.members = {}
+    self.owners = {}
+    self.loaded = {}
+    self.failed = set()
+    self.condition = threading.Condition()
+  #endDef
+
+
+  def getArchiveLayout(self, archivePath):
+    """
+      Return the layout of the given archive, compressed or not: DockerSaveLayout for a
+      docker save archive, NestedLayout for an archive of docker save tar files, e.g., the
+      ICP install archive, and None for anything else.
+
+      Only the head of the archive is read, up to the header of its first file.  The name
+      of the first file of a docker save archive is one of the names of DockerSaveMemberPattern.
+      The first file of an archive of docker save tar files is a .tar file.
+    """
+    methodName = "getArchiveLayout"
+
+    try:
+      archive = tarfile.open(archivePath,'r|*')
+    except (tarfile.TarError, IOError) as e:
+      TR.info(methodName,"Archive: %s is not a readable tar archive: %s" % (archivePath,e))
+      return None
+    #endTry
+
+    layout = None
+    try:
+      for member in archive:
+        if (member.isfile()):
+          name = os.path.normpath(member.name)
+          if (DockerSaveMemberPattern.match(name)):
+            layout = DockerSaveLayout
+          elif (name.endswith('.tar')):
+            layout = NestedLayout
+          #endIf
+          TR.info(methodName,"Archive: %s first file: %s, layout: %s" % (archivePath,name,layout))
+          break
+        #endIf
+      #endFor
+    except (tarfile.TarError, IOError) as e:
+      TR.info(methodName,"Archive: %s is not a readable tar archive: %s" % (archivePath,e))
+    finally:
+      archive.close()
+    #endTry
+    return layout
+  #endDef
+
+
+  def _decompress(self, archivePath, workPath):
+    """
+      Decompress the given gzip compressed archive to the given work path.
+
+      If the decompression fails, e.g., the work file system is full, the partial work
+      file is removed and an InvalidArgumentException is raised.
+    """
+    methodName = "_decompress"
+
+    TR.info(methodName,"Decompressing: %s to: %s" % (archivePath,workPath))
+    startTime = time.time()
+    try:
+      with open(workPath,'wb') as workFile:
+        check_call(["gzip", "-dc", archivePath], stdout=workFile)
+      #endWith
+    except (CalledProcessError, IOError, OSError) as e:
+      if (os.path.exists(workPath)):
+        os.remove(workPath)
+      #endIf
+      raise InvalidArgumentException("The archive: %s could not be decompressed to: %s: %s" % (archivePath,workPath,e))
+    #endTry
+    TR.info(methodName,"Decompressed: %s in %.1f seconds." % (archivePath,time.time() - startTime))
+  #endDef
+
+
+  def _indexDockerSave(self, archive, archiveName, end=None):
+    """
+      Return a tuple with the manifest and the dictionary of member name to member of the
+      given open docker save tar archive.  The members past the given end offset, the end
+      of a docker save archive that is a member of another archive, are not indexed.
+    """
+    members = {}
+    for member in archive:
+      if (end != None and member.offset_data + member.size > end): break
+      if (member.isfile()):
+        members[os.path.normpath(member.name)] = member
+      #endIf
+    #endFor
+
+    if ('manifest.json' not in members):
+      raise InvalidArgumentException("The archive: %s is not a docker save archive, it has no manifest.json file." % archiveName)
+    #endIf
+
+    return (json.load(archive.extractfile(members['manifest.json'])),members)
+  #endDef
+
+
+  def _indexNested(self, archivePath, tarMembers):
+    """
+      Index the docker save archives that are the given members of the given archive.
+
+      Each docker save archive is read as a tar archive that starts at the offset of the
+      data of its member, so the offsets of its members are offsets in the archive.  An
+      image in more than one of the docker save archives is loaded once with all of its
+      repo tags.  A member name in more than one of the docker save archives is the same
+      config file or the same chain of layers, the first one is used.
+    """
+    self.manifest = []
+    self.members = {}
+    entries = {}
+    with open(archivePath,'rb') as archiveFile:
+      for tarMember in sorted(tarMembers,key=lambda member: member.offset_data):
+        archiveFile.seek(tarMember.offset_data)
+        archiveName = "%s:%s" % (archivePath,tarMember.name)
+        try:
+          archive = tarfile.open(fileobj=archiveFile,mode='r:')
+        except tarfile.TarError as e:
+          raise InvalidArgumentException("The archive: %s is not a docker save archive: %s" % (archiveName,e))
+        #endTry
+        try:
+          manifest, members = self._indexDockerSave(archive,archiveName,end=tarMember.offset_data + tarMember.size)
+        finally:
+          archive.close()
+        #endTry
+
+        for entry in manifest:
+          if (entry['Config'] in entries):
+            repoTags = entries[entry['Config']].setdefault('RepoTags',[])
+            repoTags.extend([repoTag for repoTag in entry.get('RepoTags') or [] if repoTag not in repoTags])
+          else:
+            entries[entry['Config']] = entry
+            self.manifest.append(entry)
+          #endIf
+        #endFor
+        for name, member in members.items():
+          self.members.setdefault(name,member)
+        #endFor
+      #endFor
+    #endWith
+  #endDef
+
+
+  def index(self, archivePath):
+    """
+      Read the manifest and the offsets of the members of the given uncompressed docker save
+      archive or archive of docker save tar files.
+
+      Return the manifest, a list with an entry for each image in the archive.
+    """
+    methodName = "index"
+
+    archive = tarfile.open(archivePath,'r:')
+    try:
+      members = {}
+      for member in archive:
+        if (member.isfile()):
+          members[os.path.normpath(member.name)] = member
+        #endIf
+      #endFor
+
+      if ('manifest.json' in members):
+        self.members = members
+        self.manifest = json.load(archive.extractfile(members['manifest.json']))
+      #endIf
+    finally:
+      archive.close()
+    #endTry
+
+    if ('manifest.json' not in members):
+      tarMembers = [member for name, member in members.items() if name.endswith('.tar')]
+      if (not tarMembers):
+        raise InvalidArgumentException("The archive: %s is not a docker save archive or an archive of docker save archives." % archivePath)
+      #endIf
+      self._indexNested(archivePath,tarMembers)
+    #endIf
+
+    # The first image in the manifest that uses a layer owns it.
+    self.owners = {}
+    for entry in self.manifest:
+      for layer in entry['Layers']:
+        self.owners.setdefault(os.path.normpath(layer),entry['Config'])
+      #endFor
+    #endFor
+
+    self.archivePath = archivePath
+    TR.info(methodName,"Archive: %s has %d images with %d distinct layers." % (archivePath,len(self.manifest),len(self.owners)))
+    return self.manifest
+  #endDef
+
+
+  def _getImageName(self, entry):
+    """
+      Return a name for the given manifest entry for the log, the first repo tag or the config file name.
+    """
+    repoTags = entry.get('RepoTags')
+    if (repoTags):
+      return repoTags[0]
+    #endIf
+    return entry['Config']
+  #endDef
+
+
+  def _readMember(self, archiveFile, member):
+    """
+      Generator of the chunks of the data of the given member read from the given archive file.
+    """
+    archiveFile.seek(member.offset_data)
+    remaining = member.size
+    while (remaining > 0):
+      chunk = archiveFile.read(min(self.bufferSize,remaining))
+      if (not chunk):
+        raise ICPInstallationException("Unexpected end of archive: %s reading member: %s" % (self.archivePath,member.name))
+      #endIf
+      remaining -= len(chunk)
+      yield chunk
+    #endWhile
+  #endDef
+
+
+  def _tarEntry(self, name, size):
+    """
+      Return the tar header block(s) of a regular file with the given name and size.
+    """
+    tarInfo = tarfile.TarInfo(name)
+    tarInfo.size = size
+    tarInfo.mode = 0644
+    tarInfo.mtime = int(time.time())
+    return tarInfo.tobuf(format=tarfile.PAX_FORMAT)
+  #endDef
+
+
+  def _padding(self, size):
+    """
+      Return the padding of a tar member with the given size to a whole block.
+    """
+    remainder = size % TarBlockSize
+    if (remainder):
+      return '\0' * (TarBlockSize - remainder)
+    #endIf
+    return ''
+  #endDef
+
+
+  def _imageStream(self, entry, layers):
+    """
+      Generator of a docker save tar stream of the image of the given manifest entry with
+      the data of the given layers.  The manifest in the stream lists all of the layers of
+      the image.
+    """
+    manifest = json.dumps([entry])
+    yield self._tarEntry('manifest.json',len(manifest))
+    yield manifest + self._padding(len(manifest))
+
+    with open(self.archivePath,'rb') as archiveFile:
+      for name in [entry['Config']] + layers:
+        member = self.members.get(os.path.normpath(name))
+        if (not member):
+          raise ICPInstallationException("The archive: %s has no member: %s" % (self.archivePath,name))
+        #endIf
+        yield self._tarEntry(name,member.size)
+        for chunk in self._readMember(archiveFile,member):
+          yield chunk
+        #endFor
+        yield self._padding(member.size)
+      #endFor
+    #endWith
+
+    yield '\0' * (2 * TarBlockSize)
+  #endDef
+
+
+  def _waitForOwners(self, entry):
+    """
+      Wait until the images that own the shared layers of the given image are loaded.
+
+      Return the layers of the image that it must stream, the layers it owns.  Raise an
+      ICPInstallationException if the load of an owner failed.
+    """
+    config = entry['Config']
+    owners = set([self.owners[os.path.normpath(layer)] for layer in entry['Layers']])
+    owners.discard(config)
+    with self.condition:
+      while (True):
+        failedOwners = owners & self.failed
+        if (failedOwners):
+          raise ICPInstallationException("Image: %s not loaded, the load of an image it shares layers with failed." % self._getImageName(entry))
+        #endIf
+        if (owners.issubset(self.loaded)): break
+        self.condition.wait()
+      #endWhile
+    #endWith
+    return [layer for layer in entry['Layers'] if self.owners[os.path.normpath(layer)] == config]
+  #endDef
+
+
+  def _loadImage(self, entry):
+    """
+      Load the image of the given manifest entry.  Return the seconds the load took or
+      None if the image is present and was not loaded.
+    """
+    methodName = "_loadImage"
+
+    config = entry['Config']
+    imageName = self._getImageName(entry)
+    with self.condition:
+      if (config in self.loaded):
+        return None
+      #endIf
+    #endWith
+
+    try:
+      layers = self._waitForOwners(entry)
+
+      TR.info(methodName,"Loading image: %s streaming %d of its %d layers." % (imageName,len(layers),len(entry['Layers'])))
+      startTime = time.time()
+      if (self.timeline):
+        with self.timeline.span(imageName,category='image'):
+          self._load(entry,layers)
+        #endWith
+      else:
+        self._load(entry,layers)
+      #endIf
+      loadTime = time.time() - startTime
+      TR.info(methodName,"Loaded image: %s in %.1f seconds." % (imageName,loadTime))
+
+      with self.condition:
+        self.loaded[config] = loadTime
+        self.condition.notify_all()
+      #endWith
+      return loadTime
+    except:
+      with self.condition:
+        self.failed.add(config)
+        self.condition.notify_all()
+      #endWith
+      raise
+    #endTry
+  #endDef
+
+
+  def _load(self, entry, layers):
+    """
+      Send the docker save tar stream of the given image to the docker load API.
+    """
+    methodName = "_load"
+
+    for status in self.dockerClient.api.load_image(self._imageStream(entry,layers)):
+      if (TR.isLoggable(Level.FINEST)):
+        TR.finest(methodName,"Load status: %s" % status)
+      #endIf
+      if (type(status) == type({}) and status.get('error')):
+        raise ICPInstallationException("Docker load of image: %s failed: %s" % (self._getImageName(entry),status.get('error')))
+      #endIf
+    #endFor
+  #endDef
+
+
+  def loadImages(self, archivePath, workPath=None):
+    """
+      Load the images of the given docker save archive.
+
+      A gzip compressed archive is decompressed to the given workPath, by default the
+      archive path without the compression suffix, and the work file is removed at the end.
+
+      The archive is a docker save archive or an archive of docker save tar files, e.g., the
+      ICP install archive.  An InvalidArgumentException is raised, with nothing loaded, if
+      the archive has some other layout or could not be decompressed.  The layout is checked
+      before the decompression.
+
+      Return a list of dictionaries with the image name (image), its config file (config)
+      and the seconds its load took (loadTime), in manifest order.  The loadTime of an
+      image that was present is None.
+    """
+    methodName = "loadImages"
+
+    if (not archivePath):
+      raise MissingArgumentException("The path of the image archive must be provided.")
+    #endIf
+
+    startTime = time.time()
+    if (not self.getArchiveLayout(archivePath)):
+      raise InvalidArgumentException("The archive: %s is not a docker save archive or an archive of docker save archives." % archivePath)
+    #endIf
+
+    compressed = archivePath.endswith('.gz') or archivePath.endswith('.tgz')
+    if (compressed):
+      if (not workPath):
+        workPath = "%s.tar" % os.path.splitext(archivePath)[0]
+      #endIf
+      self._decompress(archivePath,workPath)
+    else:
+      workPath = archivePath
+    #endIf
+
+    try:
+      self.index(workPath)
+      self.loaded = {}
+      self.failed = set()
+
+      if (self.imageIndex):
+        missing, tags = self.imageIndex.compare(self.manifest)
+        self.imageIndex.addTags(tags)
+        missingConfigs = [entry['Config'] for entry in missing]
+        for entry in self.manifest:
+          if (entry['Config'] not in missingConfigs):
+            self.loaded[entry['Config']] = None
+          #endIf
+        #endFor
+      #endIf
+
+      # Images are submitted in manifest order, so an image only waits on images that a worker already has.
+      pool = ThreadPool(min(self.maxWorkers,len(self.manifest)) or 1)
+      try:
+        loadTimes = pool.map(self._loadImage,self.manifest,chunksize=1)
+      finally:
+        pool.close()
+        pool.join()
+        if (self.imageIndex):
+          self.imageIndex.invalidate()
+        #endIf
+      #endTry
+    finally:
+      if (compressed and os.path.exists(workPath)):
+        os.remove(workPath)
+      #endIf
+    #endTry
+
+    results = []
+    for entry, loadTime in zip(self.manifest,loadTimes):
+      results.append({'image': self._getImageName(entry), 'config': entry['Config'], 'loadTime': loadTime})
+    #endFor
+
+    loadedCount = len([result for result in results if result['loadTime'] != None])
+    TR.info(methodName,"Loaded %d of %d images from: %s in %.1f seconds with %d workers." % (loadedCount,len(results),archivePath,time.time() - startTime,self.maxWorkers))
+    return results
+  #endDef
+
+#endClass
@@ -0,0 +1,21 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Exceptions raised by the cluster coordination backends in yapl.coordination.
+"""
+
+class CoordinationTimeoutException(Exception):
+  """
+    CoordinationTimeoutException is raised when a wait for a coordination value or 
+    a barrier on a set of coordination values does not complete before its timeout.
+  """
+#endClass
+
+
+class CoordinationThrottledException(Exception):
+  """
+    CoordinationThrottledException is raised by a coordination backend when the
+    underlying service throttles a request.  The caller is expected to back off.
+  """
+#endClass
@@ -27,11 +27,15 @@ import shutil
 import tarfile
 
 from yapl.utilities.Trace import Trace, Level
+from yapl.utilities.TransferProgress import TransferProgress
 from yapl.exceptions.Exceptions import MissingArgumentException
 
 
 TR = Trace(__name__)
 
+# Size in bytes of the reads from the Helm download.
+DownloadBufferSize = 1024 * 1024
+
 
 class ConfigureHelm(object):
   """
@@ -109,9 +113,22 @@ class ConfigureHelm(object):
       TR.finest(methodName,"Downloading Helm tgz file from: %s to: %s" % (url,tgzPath))
     #endIf
     r = requests.get(url, verify=False, stream=True)
-    with open(tgzPath, 'wb') as tgzFile:
-      shutil.copyfileobj(r.raw, tgzFile)
-    #endWith
+    contentLength = r.headers.get('Content-Length')
+    progress = TransferProgress(url,totalBytes=int(contentLength) if contentLength else None)
+    try:
+      with open(tgzPath, 'wb') as tgzFile:
+        while (True):
+          buf = r.raw.read(DownloadBufferSize)
+          if (not buf): break
+          tgzFile.write(buf)
+          progress.update(len(buf))
+        #endWhile
+      #endWith
+    except:
+      progress.finish(failed=True)
+      raise
+    #endTry
+    progress.finish()
  
     if (TR.isLoggable(Level.FINEST)):
       TR.finest(methodName,"Extracting the Helm tgz archive: %s" % tgzPath)
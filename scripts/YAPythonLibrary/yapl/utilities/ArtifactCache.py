@@ -0,0 +1,263 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  A local cache of downloaded artifacts, e.g., the ICP install archive and the Docker
+  install binary, shared by the bootstrap and node initialization scripts.  An AMI that
+  already has the artifacts in the cache directory does not download them again.
+
+  An artifact is stored by its content when its SHA-256 is known:
+    <cacheDirectory>/sha256/<hex digest>
+  and otherwise by its S3 bucket, key and ETag:
+    <cacheDirectory>/s3/<bucket>/<key>/<ETag>
+  The ETag changes when the object changes, so a stale entry is never a hit.
+
+  A hit is hard linked to the destination path.  If the destination is on another file
+  system, the hit is cloned with a reflink (FICLONE) where the file system supports it,
+  e.g., XFS or btrfs.  A downloaded artifact is put in the cache the same way.  By
+  default nothing is copied: an artifact that can not be linked or cloned is not cached,
+  so a cache on another file system never costs an extra pass over the data.  With
+  copyFallback the artifact is copied instead.  A hard link shares the data with the cache entry, so the destination
+  must not be modified in place.  Moving it, e.g., into the inception cluster/images
+  directory, is fine.  A yapl.utilities.RangedDownloader removes the destination before
+  it downloads a new copy, so a download after a miss does not change a cache entry.
+
+  The cache is kept under a size cap by removing the least recently used entries.  The
+  modification time of an entry is set when it is used, so it is the time of last use.
+"""
+
+import os
+import re
+import time
+import errno
+import fcntl
+import shutil
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+
+TR = Trace(__name__)
+
+# Default cache directory and size cap in bytes.
+DefaultCacheDirectory = "/var/cache/icp-artifacts"
+DefaultMaxSize = 40 * 1024 * 1024 * 1024
+
+# ioctl request to clone a file (reflink), from linux/fs.h
+FICLONE = 0x40049409
+
+UnsafeCharacters = re.compile(r'[^A-Za-z0-9._-]')
+
+
+class ArtifactCache(object):
+  """
+    Local cache of downloaded artifacts with LRU eviction under a size cap.
+  """
+
+  def __init__(self, cacheDirectory=DefaultCacheDirectory, maxSize=DefaultMaxSize, copyFallback=False):
+    """
+      Constructor
+
+      cacheDirectory - directory of the cache, created if it does not exist
+      maxSize        - size cap of the cache in bytes
+      copyFallback   - True to copy a file into or out of the cache when it can not be
+                       hard linked or cloned
+    """
+    object.__init__(self)
+
+    if (not cacheDirectory):
+      raise MissingArgumentException("The cache directory must be provided.")
+    #endIf
+
+    self.cacheDirectory = cacheDirectory
+    self.maxSize = maxSize
+    self.copyFallback = copyFallback
+  #endDef
+
+
+  def _getPaths(self, bucket, key, etag, sha256):
+    """
+      Return the list of the cache paths of an artifact, the content path first.
+    """
+    paths = []
+    if (sha256):
+      paths.append(os.path.join(self.cacheDirectory,"sha256",sha256.lower()))
+    #endIf
+    if (bucket and key and etag):
+      paths.append(os.path.join(self.cacheDirectory,"s3",bucket,key.lstrip('/'),UnsafeCharacters.sub('_',etag)))
+    #endIf
+    return paths
+  #endDef
+
+
+  def _clone(self, sourcePath, destPath):
+    """
+      Clone the source file to the destination path with a reflink.  Return False if the
+      file system does not support it.
+    """
+    with open(sourcePath,'rb') as sourceFile:
+      with open(destPath,'wb') as destFile:
+        try:
+          fcntl.ioctl(destFile.fileno(),FICLONE,sourceFile.fileno())
+          return True
+        except IOError:
+          pass
+        #endTry
+      #endWith
+    #endWith
+    os.remove(destPath)
+    return False
+  #endDef
+
+
+  def _link(self, sourcePath, destPath, allowCopy):
+    """
+      Make the destination path a hard link, a clone or, if allowCopy is True, a copy of the
+      source path.  The destination is created under a temporary name and renamed, so it is
+      either complete or missing.  Return the method used, or None if the file was not linked.
+    """
+    methodName = "_link"
+
+    destDir = os.path.dirname(destPath)
+    if (not os.path.exists(destDir)):
+      os.makedirs(destDir)
+    #endIf
+
+    tmpPath = "%s.%d.tmp" % (destPath,os.getpid())
+    if (os.path.exists(tmpPath)):
+      os.remove(tmpPath)
+    #endIf
+
+    method = None
+    try:
+      os.link(sourcePath,tmpPath)
+      method = 'link'
+    except OSError as e:
+      if (e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK)):
+        raise
+      #endIf
+    #endTry
+
+    if (not method and self._clone(sourcePath,tmpPath)):
+      method = 'reflink'
+    #endIf
+
+    if (not method and allowCopy):
+      shutil.copyfile(sourcePath,tmpPath)
+      method = 'copy'
+    #endIf
+
+    if (method):
+      os.rename(tmpPath,destPath)
+      if (TR.isLoggable(Level.FINE)):
+        TR.fine(methodName,"%s: %s to: %s" % (method,sourcePath,destPath))
+      #endIf
+    #endIf
+    return method
+  #endDef
+
+
+  def get(self, bucket, key, etag, destPath, sha256=None):
+    """
+      Return True if the artifact is in the cache and it was linked to the given destination path.
+
+      The artifact is looked up by its SHA-256, if it is provided, and by its bucket, key and ETag.
+    """
+    methodName = "get"
+
+    for path in self._getPaths(bucket,key,etag,sha256):
+      if (os.path.isfile(path)):
+        if (os.path.exists(destPath)):
+          os.remove(destPath)
+        #endIf
+        method = self._link(path,destPath,self.copyFallback)
+        if (method):
+          os.utime(path,None)
+          TR.info(methodName,"Cache hit for: %s/%s, %s from: %s to: %s" % (bucket,key,method,path,destPath))
+          return True
+        #endIf
+      #endIf
+    #endFor
+    return False
+  #endDef
+
+
+  def put(self, bucket, key, etag, sourcePath, sha256=None):
+    """
+      Put the downloaded artifact at the given source path in the cache and evict the least
+      recently used entries if the cache is over its size cap.
+    """
+    methodName = "put"
+
+    paths = self._getPaths(bucket,key,etag,sha256)
+    if (not paths):
+      TR.info(methodName,"No ETag or SHA-256 for: %s/%s, not cached." % (bucket,key))
+      return
+    #endIf
+
+    if (os.path.getsize(sourcePath) > self.maxSize):
+      TR.info(methodName,"Artifact: %s/%s is larger than the cache, not cached." % (bucket,key))
+      return
+    #endIf
+
+    # The first path holds the data, the others are links to it.
+    if (not self._link(sourcePath,paths[0],self.copyFallback)):
+      TR.info(methodName,"Artifact: %s/%s could not be linked into the cache, not cached." % (bucket,key))
+      return
+    #endIf
+    for path in paths[1:]:
+      self._link(paths[0],path,False)
+    #endFor
+
+    TR.info(methodName,"Cached: %s/%s in: %s" % (bucket,key,paths[0]))
+    self.evict()
+  #endDef
+
+
+  def getEntries(self):
+    """
+      Return a list of (last use time, size, path) tuples of the cache entries, oldest first.
+      The entries that are links to the same file are counted once, with their newest use.
+    """
+    files = {}
+    for root, dirs, names in os.walk(self.cacheDirectory):
+      for name in names:
+        if (name.endswith('.tmp')): continue
+        path = os.path.join(root,name)
+        stat = os.stat(path)
+        files.setdefault((stat.st_dev,stat.st_ino),[]).append((stat.st_mtime,stat.st_size,path))
+      #endFor
+    #endFor
+
+    entries = []
+    for links in files.values():
+      links.sort()
+      lastUse = links[-1][0]
+      entries.append((lastUse,links[0][1],[link[2] for link in links]))
+    #endFor
+    entries.sort()
+    return entries
+  #endDef
+
+
+  def evict(self):
+    """
+      Remove the least recently used entries until the cache is under its size cap.
+      Return the number of bytes removed.
+    """
+    methodName = "evict"
+
+    entries = self.getEntries()
+    totalSize = sum([entry[1] for entry in entries])
+    removed = 0
+    for lastUse, size, paths in entries:
+      if (totalSize - removed <= self.maxSize): break
+      for path in paths:
+        os.remove(path)
+      #endFor
+      removed += size
+      TR.info(methodName,"Evicted: %s, %d bytes, last used: %s" % (paths[0],size,time.ctime(lastUse)))
+    #endFor
+    return removed
+  #endDef
+
+#endClass
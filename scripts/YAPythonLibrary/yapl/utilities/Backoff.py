@@ -0,0 +1,127 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Exponential backoff with full jitter, a ceiling and an overall deadline for polling
+  loops, e.g., many cluster nodes polling the same service.
+
+  The delay before attempt n (starting at 0) is a random value between 0 and
+  min(maxDelay, initialDelay * multiplier**n).  The random "full jitter" spreads the
+  polls of nodes that started at the same time so they do not hit the service in
+  lockstep.  With jitter=False the delay is the upper bound itself.  The exponent n is
+  clamped at the first attempt where the upper bound reaches maxDelay, so a very long
+  polling loop does not overflow multiplier**n.
+
+  Usage:
+    backoff = Backoff(initialDelay=5, maxDelay=60, timeout=6000)
+    while (not done()):
+      if (not backoff.sleep()):
+        raise SomeTimeoutException(...)
+      #endIf
+    #endWhile
+"""
+
+import math
+import time
+import random
+
+from yapl.exceptions.Exceptions import InvalidArgumentException
+
+
+class Backoff(object):
+  """
+    Exponential backoff state for one polling loop.
+  """
+
+  def __init__(self, initialDelay=5, maxDelay=60, multiplier=2, jitter=True, timeout=None):
+    """
+      Constructor
+
+      initialDelay - upper bound in seconds of the first delay
+      maxDelay     - ceiling in seconds of the upper bound of any delay
+      multiplier   - factor the upper bound grows by after each delay
+      jitter       - True for a random delay between 0 and the upper bound (full jitter)
+      timeout      - seconds from now to the deadline of the polling loop, None for no deadline
+    """
+    object.__init__(self)
+
+    if (initialDelay < 0 or maxDelay < initialDelay):
+      raise InvalidArgumentException("Backoff delays must satisfy 0 <= initialDelay <= maxDelay, given: %s, %s" % (initialDelay,maxDelay))
+    #endIf
+
+    if (multiplier < 1):
+      raise InvalidArgumentException("The backoff multiplier must be at least 1, given: %s" % multiplier)
+    #endIf
+
+    self.initialDelay = initialDelay
+    self.maxDelay = maxDelay
+    self.multiplier = multiplier
+    self.jitter = jitter
+    self.attempt = 0
+    
+    # The upper bound reaches maxDelay at this exponent, a larger one does not change the bound.
+    self.maxExponent = 0
+    if (initialDelay > 0 and multiplier > 1):
+      self.maxExponent = int(math.ceil(math.log(float(maxDelay) / initialDelay) / math.log(multiplier)))
+    #endIf
+    
+    self.deadline = None
+    if (timeout != None):
+      self.deadline = time.time() + timeout
+    #endIf
+  #endDef
+
+
+  def reset(self):
+    """
+      Start over from the initial delay, e.g., after a poll that made progress.
+    """
+    self.attempt = 0
+  #endDef
+
+
+  def nextDelay(self):
+    """
+      Return the next delay in seconds and advance the backoff.
+    """
+    exponent = min(self.attempt,self.maxExponent)
+    upperBound = min(self.maxDelay, self.initialDelay * (self.multiplier ** exponent))
+    self.attempt += 1
+    if (self.jitter):
+      return random.uniform(0,upperBound)
+    #endIf
+    return upperBound
+  #endDef
+
+
+  def remaining(self):
+    """
+      Return the seconds left until the deadline or None if there is no deadline.
+    """
+    if (self.deadline == None):
+      return None
+    #endIf
+    return max(0, self.deadline - time.time())
+  #endDef
+
+
+  def sleep(self):
+    """
+      Sleep for the next delay and return True.
+
+      Return False without sleeping if the deadline has passed.  If the next delay goes past
+      the deadline, sleep only until the deadline so the caller gets one last attempt.
+    """
+    delay = self.nextDelay()
+    remaining = self.remaining()
+    if (remaining != None):
+      if (remaining <= 0):
+        return False
+      #endIf
+      delay = min(delay,remaining)
+    #endIf
+    time.sleep(delay)
+    return True
+  #endDef
+
+#endClass
@@ -0,0 +1,215 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  A journal of the phases run by a PhaseScheduler.
+
+  The journal is a JSON file that records the state of each phase, STARTED, COMPLETED
+  or FAILED, and the outputs of the completed phases.  The journal is rewritten after
+  every change of state so that it survives a failure of the process.  The journal is
+  keyed by a journal ID, e.g., the ID of the stack that is being deployed, so that a
+  journal left behind by some other deployment is not used to resume.
+
+  The outputs of a phase are written to the journal so they must be JSON serializable.
+"""
+
+import os
+import json
+import time
+import threading
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+
+TR = Trace(__name__)
+
+# The version is incremented when the content of the journal changes.
+PhaseJournalVersion = 1
+
+"""
+  Journal phase states
+"""
+STARTED   = 'STARTED'
+COMPLETED = 'COMPLETED'
+FAILED    = 'FAILED'
+
+
+class PhaseJournal(object):
+  """
+    Persistent record of the phases that have been run.
+  """
+
+  def __init__(self, journalPath, journalId):
+    """
+      Constructor
+
+      journalPath - path to the journal JSON file
+      journalId   - ID of the run recorded in the journal, e.g., a stack ID
+    """
+    object.__init__(self)
+
+    if (not journalPath):
+      raise MissingArgumentException("The path to the journal file must be provided.")
+    #endIf
+
+    if (not journalId):
+      raise MissingArgumentException("The journal ID must be provided.")
+    #endIf
+
+    self.journalPath = journalPath
+    self.journalId = journalId
+    self.phases = {}
+    self.lock = threading.Lock()
+  #endDef
+
+
+  def load(self):
+    """
+      Load the journal file.
+
+      Return True if the journal file exists, it can be parsed and it has the journal ID
+      and version of this journal.  Otherwise the journal is left empty and False is returned.
+    """
+    methodName = "load"
+
+    if (not os.path.exists(self.journalPath)):
+      TR.info(methodName,"No phase journal at: %s" % self.journalPath)
+      return False
+    #endIf
+
+    try:
+      with open(self.journalPath,'r') as journalFile:
+        journal = json.load(journalFile)
+      #endWith
+    except Exception as e:
+      TR.warning(methodName,"Ignoring phase journal: %s that could not be read, Exception: %s" % (self.journalPath,e))
+      return False
+    #endTry
+
+    if (journal.get('version') != PhaseJournalVersion):
+      TR.warning(methodName,"Ignoring phase journal: %s with version: %s, expected version: %s" % (self.journalPath,journal.get('version'),PhaseJournalVersion))
+      return False
+    #endIf
+
+    if (journal.get('journalId') != self.journalId):
+      TR.warning(methodName,"Ignoring phase journal: %s for: %s, expected: %s" % (self.journalPath,journal.get('journalId'),self.journalId))
+      return False
+    #endIf
+
+    with self.lock:
+      self.phases = journal.get('phases',{})
+    #endWith
+
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Loaded phase journal: %s with phases: %s" % (self.journalPath,dict([(name,entry.get('state')) for name,entry in self.phases.items()])))
+    #endIf
+
+    return True
+  #endDef
+
+
+  def reset(self):
+    """
+      Discard all phase entries and write the empty journal.
+    """
+    with self.lock:
+      self.phases = {}
+      self._save()
+    #endWith
+  #endDef
+
+
+  def getState(self, name):
+    """
+      Return the state recorded for the phase with the given name or None if the phase
+      is not in the journal.
+    """
+    with self.lock:
+      entry = self.phases.get(name)
+    #endWith
+    if (not entry): return None
+    return entry.get('state')
+  #endDef
+
+
+  def getOutputs(self, name):
+    """
+      Return the outputs recorded for the phase with the given name.
+    """
+    with self.lock:
+      entry = self.phases.get(name)
+    #endWith
+    if (not entry): return {}
+    return entry.get('outputs',{})
+  #endDef
+
+
+  def recordStarted(self, name):
+    """
+      Record that the phase with the given name has started.
+    """
+    self._record(name,{'state': STARTED, 'startedAt': time.time()})
+  #endDef
+
+
+  def recordCompleted(self, name, outputs=None):
+    """
+      Record that the phase with the given name has completed with the given outputs.
+    """
+    self._record(name,{'state': COMPLETED, 'completedAt': time.time(), 'outputs': outputs or {}})
+  #endDef
+
+
+  def recordFailed(self, name, message):
+    """
+      Record that the phase with the given name has failed with the given message.
+    """
+    self._record(name,{'state': FAILED, 'failedAt': time.time(), 'message': message})
+  #endDef
+
+
+  def remove(self, name):
+    """
+      Remove the phase with the given name from the journal.
+    """
+    with self.lock:
+      if (name in self.phases):
+        del self.phases[name]
+        self._save()
+      #endIf
+    #endWith
+  #endDef
+
+
+  def _record(self, name, entry):
+    """
+      Update the journal entry of the phase with the given name and write the journal.
+    """
+    with self.lock:
+      current = self.phases.get(name,{})
+      current.update(entry)
+      self.phases[name] = current
+      self._save()
+    #endWith
+  #endDef
+
+
+  def _save(self):
+    """
+      Write the journal to a temporary file and rename it to the journal path so that the
+      journal file is always complete.  Caller holds the journal lock.
+    """
+    journal = { 'version': PhaseJournalVersion,
+                'journalId': self.journalId,
+                'updatedAt': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                'phases': self.phases
+              }
+
+    tmpPath = "%s.tmp" % self.journalPath
+    with open(tmpPath,'w') as journalFile:
+      json.dump(journal,journalFile,indent=2)
+    #endWith
+    os.rename(tmpPath,self.journalPath)
+  #endDef
+
+#endClass
@@ -0,0 +1,548 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Run a collection of phases as a dependency graph.
+
+  Each phase declares the phases it depends on and the named inputs it consumes.
+  A phase that consumes an input implicitly depends on the phase that declares that
+  input as one of its outputs.  Phases that do not depend on each other are run
+  concurrently on at most maxWorkers threads.  With maxWorkers=1 the phases are run
+  one at a time in the order they were added, subject to their dependencies.
+
+  The scheduler fails fast.  When a phase raises an exception, no more phases are
+  started, the phases that have not started are cancelled and the exception is raised
+  to the caller of run().  Phases that are running at the time of the failure can not
+  be interrupted.  A long running phase may check isCancelled() to stop early.  The
+  worker threads are daemon threads so they do not keep the process alive.
+
+  The scheduler may be given a PhaseJournal.  The state and the outputs of each phase
+  are recorded in the journal.  When the scheduler is run with resume=True, a phase
+  that completed in an earlier run is skipped if all of the phases it depends on were
+  skipped and its isValid check, if any, passes.  The outputs of a skipped phase are
+  taken from the journal and passed to its restore callable, if any, so the phase can
+  restore the state it set up in the earlier run, e.g., instance variables.  A phase
+  that is not idempotent must provide an invalidate callable that undoes the effects
+  of an earlier run of the phase.  It is called before the phase is run again.
+
+  The scheduler records the start and end time of each phase and reports the critical
+  path through the graph, i.e., the chain of dependent phases with the longest total
+  elapsed time.  The critical path time is the lower bound of the wall time of the run
+  no matter how many workers are used.
+"""
+
+import threading
+import time
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+from yapl.exceptions.Exceptions import InvalidConfigurationException
+
+TR = Trace(__name__)
+
+"""
+  Phase states
+"""
+PENDING   = 'PENDING'
+RUNNING   = 'RUNNING'
+COMPLETED = 'COMPLETED'
+FAILED    = 'FAILED'
+CANCELLED = 'CANCELLED'
+
+
+class Phase(object):
+  """
+    A unit of work run by the PhaseScheduler.
+  """
+
+  def __init__(self, name, action, dependsOn=None, inputs=None, outputs=None,
+               idempotent=True, invalidate=None, isValid=None, restore=None):
+    """
+      Constructor
+
+      name      - unique name of the phase
+      action    - callable that does the work of the phase.  The action is called with a
+                  keyword argument for each of the phase inputs.  If the phase has outputs,
+                  the action returns a dictionary with a value for each output.
+      dependsOn - list of names of phases that must complete before this phase starts
+      inputs    - list of names of outputs of other phases that are passed to the action
+      outputs   - list of names of the values in the dictionary returned by the action
+      idempotent - False if the phase can not simply be run again after it has been run.
+      invalidate - callable that undoes the effects of an earlier run of a phase that is
+                   not idempotent.  Required when idempotent is False.
+      isValid    - callable that takes the outputs recorded in the journal and returns False
+                   if the results of the earlier run of the phase are no longer usable.
+      restore    - callable that takes the outputs recorded in the journal and restores the
+                   state the phase set up when it was run, when the phase is skipped on resume.
+    """
+    object.__init__(self)
+
+    if (not name):
+      raise MissingArgumentException("A phase name must be provided.")
+    #endIf
+
+    if (not action):
+      raise MissingArgumentException("An action for phase: %s must be provided." % name)
+    #endIf
+
+    if (not idempotent and not invalidate):
+      raise MissingArgumentException("Phase: %s is not idempotent so an invalidate callable must be provided." % name)
+    #endIf
+
+    self.name = name
+    self.action = action
+    self.dependsOn = dependsOn or []
+    self.inputs = inputs or []
+    self.outputs = outputs or []
+    self.idempotent = idempotent
+    self.invalidate = invalidate
+    self.isValid = isValid
+    self.restore = restore
+
+    self.state = PENDING
+    self.resumed = False
+    self.startTime = None
+    self.endTime = None
+    self.exception = None
+  #endDef
+
+
+  def getElapsedTime(self):
+    """
+      Return the elapsed time of the phase in seconds.
+
+      If the phase has not started, 0 is returned.  If the phase is running, the time
+      since it started is returned.
+    """
+    if (self.startTime == None):
+      return 0.0
+    #endIf
+
+    endTime = self.endTime
+    if (endTime == None):
+      endTime = time.time()
+    #endIf
+
+    return endTime - self.startTime
+  #endDef
+
+
+  def __str__(self):
+    return "Phase(%s,%s)" % (self.name,self.state)
+  #endDef
+
+
+  def __repr__(self):
+    return self.__str__()
+  #endDef
+
+#endClass
+
+
+class PhaseScheduler(object):
+  """
+    Run phases concurrently subject to their dependencies.
+  """
+
+  def __init__(self, phases=None, maxWorkers=1, journal=None, resume=False, timeline=None):
+    """
+      Constructor
+
+      phases     - list of Phase instances.  More phases can be added with addPhase().
+      maxWorkers - maximum number of phases run at the same time.
+      journal    - optional PhaseJournal where the state of each phase is recorded.
+      resume     - True to skip the phases that completed in an earlier run recorded in the journal.
+      timeline   - optional Timeline where a span is recorded for each phase that is run.
+    """
+    object.__init__(self)
+
+    if (maxWorkers < 1):
+      raise InvalidArgumentException("The maximum number of workers (maxWorkers) must be at least 1, given: %s" % maxWorkers)
+    #endIf
+
+    self.maxWorkers = maxWorkers
+    self.journal = journal
+    self.resume = resume
+    self.timeline = timeline
+    self.phases = []
+    self.phaseMap = {}
+    self.producers = {}
+    self.outputs = {}
+
+    self.condition = threading.Condition()
+    self.cancelEvent = threading.Event()
+    self.failedPhase = None
+    self.startTime = None
+    self.endTime = None
+
+    if (phases):
+      for phase in phases:
+        self.addPhase(phase)
+      #endFor
+    #endIf
+  #endDef
+
+
+  def addPhase(self, phase):
+    """
+      Add the given phase to the graph.
+    """
+    if (self.phaseMap.get(phase.name)):
+      raise InvalidArgumentException("A phase named: %s has already been added." % phase.name)
+    #endIf
+
+    for output in phase.outputs:
+      producer = self.producers.get(output)
+      if (producer):
+        raise InvalidArgumentException("Output: %s of phase: %s is already an output of phase: %s" % (output,phase.name,producer.name))
+      #endIf
+      self.producers[output] = phase
+    #endFor
+
+    self.phases.append(phase)
+    self.phaseMap[phase.name] = phase
+  #endDef
+
+
+  def getPhase(self, name):
+    """
+      Return the phase with the given name or None if there is no such phase.
+    """
+    return self.phaseMap.get(name)
+  #endDef
+
+
+  def getDependencies(self, phase):
+    """
+      Return the list of phases the given phase depends on, i.e., the phases named in
+      dependsOn and the phases that produce the inputs of the given phase.
+    """
+    result = []
+    for name in phase.dependsOn:
+      dependency = self.phaseMap.get(name)
+      if (not dependency):
+        raise InvalidConfigurationException("Phase: %s depends on phase: %s which has not been added." % (phase.name,name))
+      #endIf
+      if (dependency not in result):
+        result.append(dependency)
+      #endIf
+    #endFor
+
+    for inputName in phase.inputs:
+      producer = self.producers.get(inputName)
+      if (not producer):
+        raise InvalidConfigurationException("Phase: %s input: %s is not an output of any phase." % (phase.name,inputName))
+      #endIf
+      if (producer not in result):
+        result.append(producer)
+      #endIf
+    #endFor
+
+    return result
+  #endDef
+
+
+  def getTopologicalOrder(self):
+    """
+      Return the list of phases in an order where every phase follows all of its dependencies.
+
+      Among the phases that are ready at the same point, the order the phases were added is kept.
+
+      An InvalidConfigurationException is raised if there is a dependency cycle.
+    """
+    result = []
+    done = set()
+    remaining = list(self.phases)
+    while (remaining):
+      ready = [phase for phase in remaining if all([dependency.name in done for dependency in self.getDependencies(phase)])]
+      if (not ready):
+        raise InvalidConfigurationException("Dependency cycle among phases: %s" % [phase.name for phase in remaining])
+      #endIf
+      phase = ready[0]
+      result.append(phase)
+      done.add(phase.name)
+      remaining.remove(phase)
+    #endWhile
+    return result
+  #endDef
+
+
+  def isCancelled(self):
+    """
+      Return True if a phase has failed and the remaining work is being cancelled.
+    """
+    return self.cancelEvent.is_set()
+  #endDef
+
+
+  def _isReady(self, phase):
+    """
+      Return True if the given pending phase has all of its dependencies completed.
+    """
+    for dependency in self.getDependencies(phase):
+      if (dependency.state != COMPLETED):
+        return False
+      #endIf
+    #endFor
+    return True
+  #endDef
+
+
+  def _runPhase(self, phase):
+    """
+      Worker thread body that runs the action of the given phase.
+
+      The phase state, the phase outputs and the first failure are recorded under
+      the scheduler condition and waiters are notified.
+    """
+    methodName = "_runPhase"
+
+    exception = None
+    outputs = None
+    try:
+      TR.info(methodName,"STARTED phase: %s" % phase.name)
+
+      kwargs = {}
+      for inputName in phase.inputs:
+        kwargs[inputName] = self.outputs.get(inputName)
+      #endFor
+
+      if (self.journal):
+        if (not phase.idempotent and self.journal.getState(phase.name)):
+          TR.info(methodName,"Invalidating the earlier run of phase: %s" % phase.name)
+          phase.invalidate()
+        #endIf
+        self.journal.recordStarted(phase.name)
+      #endIf
+
+      if (self.timeline):
+        with self.timeline.span(phase.name):
+          result = phase.action(**kwargs)
+        #endWith
+      else:
+        result = phase.action(**kwargs)
+      #endIf
+
+      if (phase.outputs):
+        if (type(result) != type({})):
+          raise InvalidConfigurationException("Phase: %s declares outputs: %s but the action returned: %s" % (phase.name,phase.outputs,result))
+        #endIf
+        outputs = {}
+        for output in phase.outputs:
+          if (output not in result):
+            raise InvalidConfigurationException("Phase: %s did not return a value for output: %s" % (phase.name,output))
+          #endIf
+          outputs[output] = result.get(output)
+        #endFor
+      #endIf
+
+      if (self.journal):
+        self.journal.recordCompleted(phase.name,outputs)
+      #endIf
+    except BaseException as e:
+      TR.error(methodName,"FAILED phase: %s, Exception: %s" % (phase.name,e), e)
+      exception = e
+      if (self.journal):
+        try:
+          self.journal.recordFailed(phase.name,"%s" % e)
+        except Exception as journalException:
+          TR.warning(methodName,"Failed to record the failure of phase: %s in the journal, Exception: %s" % (phase.name,journalException))
+        #endTry
+      #endIf
+    #endTry
+
+    with self.condition:
+      phase.endTime = time.time()
+      if (exception != None):
+        phase.state = FAILED
+        phase.exception = exception
+        if (not self.failedPhase):
+          self.failedPhase = phase
+          self.cancelEvent.set()
+        #endIf
+      else:
+        if (outputs):
+          self.outputs.update(outputs)
+        #endIf
+        phase.state = COMPLETED
+        TR.info(methodName,"COMPLETED phase: %s in %.1f seconds." % (phase.name,phase.getElapsedTime()))
+      #endIf
+      self.condition.notify_all()
+    #endWith
+  #endDef
+
+
+  def _startPhase(self, phase):
+    """
+      Start a daemon worker thread to run the given phase.
+      Caller holds the scheduler condition.
+    """
+    phase.state = RUNNING
+    phase.startTime = time.time()
+    worker = threading.Thread(target=self._runPhase, args=(phase,), name="phase-%s" % phase.name)
+    worker.daemon = True
+    worker.start()
+  #endDef
+
+
+  def run(self):
+    """
+      Run all of the phases and return when they have all completed.
+
+      If a phase fails, the phases that have not started are cancelled and the exception
+      raised by the failed phase is raised.
+    """
+    methodName = "run"
+
+    # Validates the graph: missing dependencies, missing inputs and cycles.
+    self.getTopologicalOrder()
+
+    if (self.journal):
+      if (self.resume and self.journal.load()):
+        self._resumeFromJournal()
+      else:
+        self.journal.reset()
+      #endIf
+    #endIf
+
+    self.startTime = time.time()
+    TR.info(methodName,"STARTED running %d phases with at most %d workers." % (len(self.phases),self.maxWorkers))
+
+    with self.condition:
+      while (not self.failedPhase):
+        running = [phase for phase in self.phases if phase.state == RUNNING]
+        for phase in self.phases:
+          if (len(running) >= self.maxWorkers): break
+          if (phase.state == PENDING and self._isReady(phase)):
+            self._startPhase(phase)
+            running.append(phase)
+          #endIf
+        #endFor
+
+        if (not running):
+          # Nothing running and nothing could be started, so all phases are done.
+          break
+        #endIf
+
+        # A timeout on the wait keeps the main thread responsive to signals.
+        self.condition.wait(1.0)
+      #endWhile
+
+      if (self.failedPhase):
+        for phase in self.phases:
+          if (phase.state == PENDING):
+            phase.state = CANCELLED
+          elif (phase.state == RUNNING):
+            TR.warning(methodName,"Phase: %s is still running after the failure of phase: %s" % (phase.name,self.failedPhase.name))
+          #endIf
+        #endFor
+      #endIf
+    #endWith
+
+    self.endTime = time.time()
+    self._logSummary()
+
+    if (self.failedPhase):
+      raise self.failedPhase.exception
+    #endIf
+
+    TR.info(methodName,"COMPLETED running %d phases in %.1f seconds." % (len(self.phases),self.endTime - self.startTime))
+  #endDef
+
+
+  def _resumeFromJournal(self):
+    """
+      Mark the phases that completed in the earlier run recorded in the journal as completed.
+
+      A completed phase is run again if any phase it depends on is run again or if its 
+      isValid check fails.  The outputs of the skipped phases are restored from the journal.
+    """
+    methodName = "_resumeFromJournal"
+
+    for phase in self.getTopologicalOrder():
+      if (self.journal.getState(phase.name) != COMPLETED): continue
+
+      rerunDependencies = [dependency.name for dependency in self.getDependencies(phase) if dependency.state != COMPLETED]
+      if (rerunDependencies):
+        TR.info(methodName,"Phase: %s will be run again because it depends on: %s" % (phase.name,rerunDependencies))
+        continue
+      #endIf
+
+      outputs = self.journal.getOutputs(phase.name)
+      if (phase.isValid and not phase.isValid(outputs)):
+        TR.info(methodName,"Phase: %s will be run again because the results of its earlier run are not valid." % phase.name)
+        continue
+      #endIf
+
+      if (phase.restore):
+        phase.restore(outputs)
+      #endIf
+
+      self.outputs.update(outputs)
+      phase.state = COMPLETED
+      phase.resumed = True
+      TR.info(methodName,"Skipping phase: %s that completed in an earlier run." % phase.name)
+    #endFor
+  #endDef
+
+
+  def getCriticalPath(self):
+    """
+      Return a tuple with the list of phase names on the critical path and the total
+      elapsed time in seconds of the phases on the critical path.
+
+      The critical path is the chain of dependent phases with the longest total elapsed time.
+      Phases that did not run contribute no time.
+    """
+    finish = {}
+    previous = {}
+    for phase in self.getTopologicalOrder():
+      longest = 0.0
+      longestDependency = None
+      for dependency in self.getDependencies(phase):
+        if (finish[dependency.name] > longest or longestDependency == None):
+          longest = finish[dependency.name]
+          longestDependency = dependency.name
+        #endIf
+      #endFor
+      finish[phase.name] = longest + phase.getElapsedTime()
+      previous[phase.name] = longestDependency
+    #endFor
+
+    if (not finish):
+      return ([],0.0)
+    #endIf
+
+    last = max(finish.keys(), key=lambda name: finish[name])
+    path = []
+    name = last
+    while (name):
+      path.insert(0,name)
+      name = previous.get(name)
+    #endWhile
+
+    return (path,finish[last])
+  #endDef
+
+
+  def _logSummary(self):
+    """
+      Emit the elapsed time of each phase, the total of the phase times, the wall time
+      and the critical path to the trace log.
+    """
+    methodName = "_logSummary"
+
+    if (TR.isLoggable(Level.FINE)):
+      for phase in self.phases:
+        TR.fine(methodName,"Phase: %s, state: %s%s, elapsed time: %.1f seconds." % (phase.name,phase.state," (resumed)" if phase.resumed else "",phase.getElapsedTime()))
+      #endFor
+    #endIf
+
+    totalPhaseTime = sum([phase.getElapsedTime() for phase in self.phases])
+    path, pathTime = self.getCriticalPath()
+    TR.info(methodName,"Wall time: %.1f seconds, total phase time: %.1f seconds, critical path time: %.1f seconds." % (self.endTime - self.startTime,totalPhaseTime,pathTime))
+    TR.info(methodName,"Critical path: %s" % " > ".join(path))
+  #endDef
+
+#endClass
@@ -0,0 +1,654 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Download a large object over HTTP with several connections, each one getting a byte
+  range of the object, e.g., the ICP install archive from S3 with a pre-signed URL.
+
+  The size of the object is probed with a GET of the first byte (Range: bytes=0-0).
+  A HEAD request can not be used because an S3 pre-signed URL is signed for one HTTP
+  method, and the URLs used here are signed for GET.  If the server does not support
+  range requests or the object fits in one chunk, the object is downloaded with a
+  single streaming GET.
+
+  Otherwise the destination file is preallocated to the size of the object and split
+  into chunkSize ranges.  The ranges are fetched by maxConnections worker threads.
+  Each worker has its own requests Session, so its connection is reused for all of the
+  ranges it gets, and its own handle on the destination file.  A range is written at
+  its offset in the file (seek and write on the worker's own handle) as it streams in.
+
+  Resumable downloads:
+    The completed ranges are recorded in a sidecar file, <destPath>.parts, along with
+    the size and the ETag of the object and the chunk size.  A range is recorded after
+    its bytes have been synced to disk.  When a download is started and the sidecar
+    matches the size and ETag of the object, only the ranges that are not recorded
+    are fetched.  The sidecar is removed when the download completes.
+
+  Hard links:
+    A download that is not resumed removes the destination file before it writes a new
+    one, it never truncates the file in place.  The destination may be a hard link to
+    another file, e.g., an entry of a yapl.utilities.ArtifactCache, which must keep its
+    content.  For the same reason a destination file with other links is not resumed.
+
+  Retries:
+    A range that fails with a connection error, a 429 or a 5xx status is retried up
+    to maxRetries times with an exponential backoff with jitter, bounded by maxRetryDelay.
+    Any other failure, or a range that runs out of retries, stops the workers from taking
+    more ranges and a FileTransferException is raised.  The ranges completed up to that
+    point stay recorded in the sidecar for the next attempt.
+
+  Checksum:
+    If a sha256 hex digest is provided, the object is hashed as it is downloaded and the
+    download is rejected, and the destination file removed, if the digest does not match.
+    SHA-256 can only be computed over the bytes in order, so the hash has a frontier, the
+    offset up to which the object has been hashed.  The worker streaming the range at the
+    frontier hashes its buffers as they are written.  When a range completes, the ranges
+    after the frontier that are already on disk are hashed by reading them back, which is
+    usually from the page cache since they were just written.  Ranges completed by an
+    earlier download are read back from the file when the download is resumed.
+
+  Progress:
+    If a yapl.utilities.TransferProgress is provided, it is given the size of the download
+    and the bytes of each buffer written, so it reports the progress of the download.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+import requests
+from multiprocessing.pool import ThreadPool
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.utilities.Backoff import Backoff
+from yapl.exceptions.Exceptions import MissingArgumentException
+from yapl.exceptions.Exceptions import InvalidArgumentException
+from yapl.exceptions.Exceptions import FileTransferException
+
+TR = Trace(__name__)
+
+# Size in bytes of the byte range fetched by one GET request.
+DefaultChunkSize = 64 * 1024 * 1024
+
+# Number of connections, i.e., worker threads, used to fetch the ranges.
+DefaultMaxConnections = 8
+
+# Size in bytes of the buffer used to stream the body of a response to the file.
+DefaultBufferSize = 1024 * 1024
+
+# Number of retries of a failed request and the bounds in seconds of the delay between retries.
+DefaultMaxRetries = 5
+DefaultRetryDelay = 1
+DefaultMaxRetryDelay = 30
+
+# Suffix of the sidecar file that records the completed ranges of a download.
+PartsFileSuffix = ".parts"
+
+ContentRangePattern = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class RetryableTransferException(FileTransferException):
+  """
+    Raised for a failed request that is worth retrying, e.g., a 503 status.
+  """
+#endClass
+
+
+class RangedDownloader(object):
+  """
+    Multi-connection, resumable download of an object with HTTP range requests.
+  """
+
+  def __init__(self, chunkSize=DefaultChunkSize, maxConnections=DefaultMaxConnections, bufferSize=DefaultBufferSize,
+               maxRetries=DefaultMaxRetries, retryDelay=DefaultRetryDelay, maxRetryDelay=DefaultMaxRetryDelay):
+    """
+      Constructor
+
+      chunkSize      - size in bytes of each range
+      maxConnections - number of connections used to fetch the ranges concurrently
+      bufferSize     - size in bytes of the reads from a response body
+      maxRetries     - number of times a failed request is retried
+      retryDelay     - upper bound in seconds of the delay before the first retry
+      maxRetryDelay  - ceiling in seconds of the delay between retries
+    """
+    object.__init__(self)
+
+    if (chunkSize < 1):
+      raise InvalidArgumentException("The chunk size must be at least 1 byte, given: %s" % chunkSize)
+    #endIf
+
+    if (maxConnections < 1):
+      raise InvalidArgumentException("The maximum number of connections must be at least 1, given: %s" % maxConnections)
+    #endIf
+
+    self.chunkSize = chunkSize
+    self.maxConnections = maxConnections
+    self.bufferSize = bufferSize
+    self.maxRetries = maxRetries
+    self.retryDelay = retryDelay
+    self.maxRetryDelay = maxRetryDelay
+
+    self.local = threading.local()
+    self.lock = threading.Lock()
+    self.cancelEvent = threading.Event()
+    self.retryCount = 0
+    self.resumedBytes = 0
+
+    # Hash state of a download with a checksum.  See _hashInline() and _hashCompleted().
+    self.hasher = None
+    self.hashFrontier = 0
+    self.hashCatchingUp = False
+    self.completedRanges = {}
+    self.progress = None
+  #endDef
+
+
+  def _getSession(self):
+    """
+      Return the requests Session of the current worker thread.
+    """
+    session = getattr(self.local,'session',None)
+    if (session == None):
+      session = requests.Session()
+      self.local.session = session
+    #endIf
+    return session
+  #endDef
+
+
+  def _checkStatus(self, response, expectedStatus, what):
+    """
+      Raise a FileTransferException if the status of the given response is not the expected
+      status.  The exception is a RetryableTransferException for a 429 or 5xx status.
+    """
+    if (response.status_code == expectedStatus):
+      return
+    #endIf
+
+    message = "%s failed with HTTP status: %s %s" % (what,response.status_code,response.reason)
+    if (response.status_code == 429 or response.status_code >= 500):
+      raise RetryableTransferException(message)
+    #endIf
+    raise FileTransferException(message)
+  #endDef
+
+
+  def _withRetries(self, what, function, *args):
+    """
+      Return the result of the given function called with the given args.
+
+      The function is called again after a connection error or a RetryableTransferException,
+      up to maxRetries times, with a bounded exponential backoff between the calls.
+    """
+    methodName = "_withRetries"
+
+    backoff = Backoff(initialDelay=self.retryDelay,maxDelay=self.maxRetryDelay)
+    attempt = 0
+    while (True):
+      try:
+        return function(*args)
+      except (requests.exceptions.RequestException, RetryableTransferException) as e:
+        if (self.cancelEvent.is_set()):
+          raise FileTransferException("%s cancelled after the failure of another range." % what)
+        #endIf
+
+        if (attempt >= self.maxRetries):
+          raise FileTransferException("%s failed after %d retries: %s" % (what,attempt,e))
+        #endIf
+
+        attempt += 1
+        with self.lock:
+          self.retryCount += 1
+        #endWith
+        TR.warning(methodName,"%s failed, retry: %d of %d: %s" % (what,attempt,self.maxRetries,e))
+        backoff.sleep()
+      #endTry
+    #endWhile
+  #endDef
+
+
+  def probe(self, url):
+    """
+      Return a tuple with the size of the object at the given URL, True if the server supports
+      range requests for it and the ETag of the object, if the server provides one.
+
+      The probe is a GET of the first byte of the object.  A 206 (Partial Content) response
+      has the size of the object in its Content-Range header.  A 200 response means the
+      server ignored the Range header, the size is the Content-Length and the body is not read.
+    """
+    return self._withRetries("Probe of: %s" % url.split('?')[0], self._probe, url)
+  #endDef
+
+
+  def _probe(self, url):
+    """
+      Do the probe GET of probe().
+    """
+    methodName = "_probe"
+
+    response = requests.get(url, headers={'Range': 'bytes=0-0'}, stream=True)
+    try:
+      etag = response.headers.get('ETag')
+      if (response.status_code == 206):
+        match = ContentRangePattern.match(response.headers.get('Content-Range',''))
+        if (match and match.group(3) != '*'):
+          size = int(match.group(3))
+          if (TR.isLoggable(Level.FINE)):
+            TR.fine(methodName,"Object size: %d bytes, ETag: %s, range requests supported." % (size,etag))
+          #endIf
+          return (size,True,etag)
+        #endIf
+        raise FileTransferException("Unexpected Content-Range: %s in the probe response." % response.headers.get('Content-Range'))
+      #endIf
+
+      self._checkStatus(response,200,"Probe")
+      contentLength = response.headers.get('Content-Length')
+      size = int(contentLength) if contentLength else None
+      if (TR.isLoggable(Level.FINE)):
+        TR.fine(methodName,"Object size: %s bytes, ETag: %s, range requests not supported." % (size,etag))
+      #endIf
+      return (size,False,etag)
+    finally:
+      response.close()
+    #endTry
+  #endDef
+
+
+  def _removeDestination(self, destPath):
+    """
+      Remove the given destination file, if it exists, so a new file is written rather than
+      the file, and any file hard linked to it, truncated.
+    """
+    if (os.path.lexists(destPath)):
+      os.remove(destPath)
+    #endIf
+  #endDef
+
+
+  def _downloadSingle(self, url, destPath):
+    """
+      Download the object at the given URL to the given file with one streaming GET.
+      Return the number of bytes written.
+    """
+    response = requests.get(url, stream=True)
+    try:
+      self._checkStatus(response,200,"Download")
+
+      # A retry starts the stream over, so the hash starts over too.
+      if (self.hasher):
+        self.hasher = hashlib.sha256()
+      #endIf
+
+      byteCount = 0
+      self._removeDestination(destPath)
+      with open(destPath,'wb') as destFile:
+        for buf in response.iter_content(chunk_size=self.bufferSize):
+          destFile.write(buf)
+          if (self.hasher):
+            self.hasher.update(buf)
+          #endIf
+          if (self.progress):
+            self.progress.update(len(buf))
+          #endIf
+          byteCount += len(buf)
+        #endFor
+      #endWith
+    finally:
+      response.close()
+    #endTry
+
+    return byteCount
+  #endDef
+
+
+  def _hashInline(self, position, buf):
+    """
+      Hash the part of the given buffer, written at the given position, that is at the hash frontier.
+    """
+    with self.lock:
+      if (self.hashCatchingUp): return
+      end = position + len(buf)
+      if (position <= self.hashFrontier < end):
+        self.hasher.update(buf[self.hashFrontier - position:])
+        self.hashFrontier = end
+      #endIf
+    #endWith
+  #endDef
+
+
+  def _hashCompleted(self, destPath):
+    """
+      Advance the hash frontier over the completed ranges by reading them back from the
+      destination file.  Only one thread reads back at a time, the others return at once.
+    """
+    with self.lock:
+      if (self.hashCatchingUp): return
+      self.hashCatchingUp = True
+    #endWith
+
+    with open(destPath,'rb') as destFile:
+      while (True):
+        with self.lock:
+          first = self.hashFrontier - (self.hashFrontier % self.chunkSize)
+          last = self.completedRanges.get(first)
+          # No range at the frontier is completed, or the whole object is hashed.
+          if (last == None or self.hashFrontier > last):
+            self.hashCatchingUp = False
+            return
+          #endIf
+          start = self.hashFrontier
+        #endWith
+
+        destFile.seek(start)
+        remaining = last - start + 1
+        while (remaining > 0):
+          buf = destFile.read(min(self.bufferSize,remaining))
+          if (not buf):
+            with self.lock:
+              self.hashCatchingUp = False
+            #endWith
+            raise FileTransferException("Unexpected end of file: %s at offset: %d hashing the download." % (destPath,last - remaining + 1))
+          #endIf
+          self.hasher.update(buf)
+          remaining -= len(buf)
+        #endWhile
+
+        with self.lock:
+          self.hashFrontier = last + 1
+        #endWith
+      #endWhile
+    #endWith
+  #endDef
+
+
+  def _verifyChecksum(self, destPath, sha256):
+    """
+      Raise a FileTransferException and remove the destination file and its sidecar if the
+      hash of the download does not match the given sha256 hex digest.
+    """
+    methodName = "_verifyChecksum"
+
+    digest = self.hasher.hexdigest()
+    if (digest.lower() != sha256.lower()):
+      for path in [destPath, self._getPartsPath(destPath)]:
+        if (os.path.exists(path)):
+          os.remove(path)
+        #endIf
+      #endFor
+      raise FileTransferException("Download to: %s rejected, SHA-256: %s, expected: %s" % (destPath,digest,sha256))
+    #endIf
+
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Download to: %s has the expected SHA-256: %s" % (destPath,digest))
+    #endIf
+  #endDef
+
+
+  def _getRange(self, url, destPath, first, last, etag):
+    """
+      Get one byte range of the object and write it at its offset in the destination file.
+      The data is synced to disk before returning the number of bytes written.
+    """
+    session = self._getSession()
+    response = session.get(url, headers={'Range': 'bytes=%d-%d' % (first,last)}, stream=True)
+    try:
+      self._checkStatus(response,206,"Range: %d-%d" % (first,last))
+
+      rangeETag = response.headers.get('ETag')
+      if (etag and rangeETag and rangeETag != etag):
+        raise FileTransferException("The object changed during the download, ETag: %s, expected: %s" % (rangeETag,etag))
+      #endIf
+
+      byteCount = 0
+      with open(destPath,'r+b') as destFile:
+        destFile.seek(first)
+        for buf in response.iter_content(chunk_size=self.bufferSize):
+          if (self.cancelEvent.is_set()):
+            raise FileTransferException("Range: %d-%d cancelled after the failure of another range." % (first,last))
+          #endIf
+          destFile.write(buf)
+          if (self.hasher):
+            self._hashInline(first + byteCount,buf)
+          #endIf
+          if (self.progress):
+            self.progress.update(len(buf))
+          #endIf
+          byteCount += len(buf)
+        #endFor
+        destFile.flush()
+        os.fsync(destFile.fileno())
+      #endWith
+    finally:
+      response.close()
+    #endTry
+
+    expected = last - first + 1
+    if (byteCount != expected):
+      # A short body is usually a dropped connection.
+      raise RetryableTransferException("Range: %d-%d got %d bytes, expected %d bytes." % (first,last,byteCount,expected))
+    #endIf
+
+    return byteCount
+  #endDef
+
+
+  def _fetchRange(self, args):
+    """
+      Worker body that gets one range, with retries, and records it in the parts file.
+      The args is a tuple of the URL, the destination path, the first and last byte of
+      the range, the ETag and the parts dictionary.  Return the number of bytes written.
+    """
+    url, destPath, first, last, etag, parts = args
+
+    if (self.cancelEvent.is_set()):
+      return 0
+    #endIf
+
+    try:
+      byteCount = self._withRetries("Range: %d-%d" % (first,last), self._getRange, url, destPath, first, last, etag)
+    except:
+      self.cancelEvent.set()
+      raise
+    #endTry
+
+    with self.lock:
+      parts['completed'].append(first)
+      self._writeParts(destPath,parts)
+      self.completedRanges[first] = last
+    #endWith
+
+    if (self.hasher):
+      self._hashCompleted(destPath)
+    #endIf
+
+    return byteCount
+  #endDef
+
+
+  def getRanges(self, size):
+    """
+      Return the list of (first,last) byte ranges of an object of the given size.
+    """
+    return [(first, min(first + self.chunkSize, size) - 1) for first in range(0,size,self.chunkSize)]
+  #endDef
+
+
+  def _getPartsPath(self, destPath):
+    """
+      Return the path of the sidecar file of the given destination path.
+    """
+    return "%s%s" % (destPath,PartsFileSuffix)
+  #endDef
+
+
+  def _readParts(self, destPath, size, etag):
+    """
+      Return the parts dictionary of an earlier download to the given path if it is for an
+      object with the given size and ETag and the same chunk size, otherwise return None.
+    """
+    methodName = "_readParts"
+
+    partsPath = self._getPartsPath(destPath)
+    if (not os.path.exists(partsPath) or not os.path.exists(destPath)):
+      return None
+    #endIf
+
+    try:
+      with open(partsPath,'r') as partsFile:
+        parts = json.load(partsFile)
+      #endWith
+    except Exception as e:
+      TR.warning(methodName,"Ignoring the parts file: %s that could not be read: %s" % (partsPath,e))
+      return None
+    #endTry
+
+    if (parts.get('size') != size or parts.get('etag') != etag or parts.get('chunkSize') != self.chunkSize):
+      TR.info(methodName,"Parts file: %s is for a different object or chunk size, starting over." % partsPath)
+      return None
+    #endIf
+
+    if (os.path.getsize(destPath) != size):
+      TR.info(methodName,"Partial file: %s has the wrong size, starting over." % destPath)
+      return None
+    #endIf
+
+    if (os.stat(destPath).st_nlink > 1):
+      TR.info(methodName,"Partial file: %s is linked to another file, starting over." % destPath)
+      return None
+    #endIf
+
+    return parts
+  #endDef
+
+
+  def _writeParts(self, destPath, parts):
+    """
+      Write the given parts dictionary to the sidecar file of the given destination path.
+      Caller holds the lock.
+    """
+    partsPath = self._getPartsPath(destPath)
+    tmpPath = "%s.tmp" % partsPath
+    with open(tmpPath,'w') as partsFile:
+      json.dump(parts,partsFile)
+    #endWith
+    os.rename(tmpPath,partsPath)
+  #endDef
+
+
+  def download(self, url, destPath, sha256=None, progress=None):
+    """
+      Download the object at the given URL to the given destination path.
+      Return the number of bytes downloaded, including the bytes of ranges that were
+      downloaded by an earlier, interrupted download to the same path.
+
+      If a sha256 hex digest is provided, a download with a different SHA-256 is rejected
+      with a FileTransferException and the destination file is removed.
+
+      If a TransferProgress is provided, it reports the progress of the download.  Its total
+      is the size of the object less the bytes of an earlier download that are resumed.
+      The caller finishes it, e.g., with the retryCount of the downloader.
+    """
+    methodName = "download"
+
+    if (not url):
+      raise MissingArgumentException("The URL of the object to download must be provided.")
+    #endIf
+
+    if (not destPath):
+      raise MissingArgumentException("The destination path of the download must be provided.")
+    #endIf
+
+    self.cancelEvent.clear()
+    self.retryCount = 0
+    self.resumedBytes = 0
+    self.hasher = hashlib.sha256() if sha256 else None
+    self.hashFrontier = 0
+    self.hashCatchingUp = False
+    self.completedRanges = {}
+    self.progress = progress
+
+    size, rangesSupported, etag = self.probe(url)
+    if (progress and size != None):
+      progress.setTotal(size)
+    #endIf
+
+    if (not rangesSupported or size <= self.chunkSize or self.maxConnections == 1):
+      byteCount = self._withRetries("Download to: %s" % destPath, self._downloadSingle, url, destPath)
+      if (size != None and byteCount != size):
+        raise FileTransferException("Download to: %s got %d bytes, expected %d bytes." % (destPath,byteCount,size))
+      #endIf
+      if (self.hasher):
+        self._verifyChecksum(destPath,sha256)
+      #endIf
+      return byteCount
+    #endIf
+
+    ranges = self.getRanges(size)
+    parts = self._readParts(destPath,size,etag)
+    if (parts):
+      completed = set(parts['completed'])
+      for first,last in ranges:
+        if (first in completed):
+          self.completedRanges[first] = last
+        #endIf
+      #endFor
+      pending = [(first,last) for first,last in ranges if first not in completed]
+      self.resumedBytes = sum([last - first + 1 for first,last in ranges if first in completed])
+      TR.info(methodName,"Resuming the download to: %s, %d of %d ranges, %d bytes, already downloaded." % (destPath,len(ranges)-len(pending),len(ranges),self.resumedBytes))
+      if (progress):
+        progress.setTotal(size - self.resumedBytes)
+      #endIf
+    else:
+      # Preallocate the destination file so each range can be written at its offset.
+      self._removeDestination(destPath)
+      with open(destPath,'wb') as destFile:
+        destFile.truncate(size)
+      #endWith
+      parts = {'size': size, 'etag': etag, 'chunkSize': self.chunkSize, 'completed': []}
+      with self.lock:
+        self._writeParts(destPath,parts)
+      #endWith
+      pending = ranges
+    #endIf
+
+    TR.info(methodName,"Downloading %d bytes to: %s in %d ranges of %d bytes with %d connections." % (size,destPath,len(pending),self.chunkSize,self.maxConnections))
+
+    byteCount = self.resumedBytes
+    if (self.hasher and self.resumedBytes):
+      # The resumed ranges at the start of the object are read back before the workers start.
+      self._hashCompleted(destPath)
+    #endIf
+
+    if (pending):
+      pool = ThreadPool(min(self.maxConnections,len(pending)))
+      try:
+        byteCount += sum(pool.map(self._fetchRange, [(url,destPath,first,last,etag,parts) for first,last in pending]))
+      finally:
+        pool.close()
+        pool.join()
+      #endTry
+    #endIf
+
+    if (byteCount != size):
+      raise FileTransferException("Download to: %s got %d bytes, expected %d bytes." % (destPath,byteCount,size))
+    #endIf
+
+    if (self.hasher):
+      self._hashCompleted(destPath)
+      if (self.hashFrontier != size):
+        raise FileTransferException("Download to: %s hashed %d of %d bytes." % (destPath,self.hashFrontier,size))
+      #endIf
+      self._verifyChecksum(destPath,sha256)
+    #endIf
+
+    os.remove(self._getPartsPath(destPath))
+
+    if (self.retryCount and TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Download to: %s needed %d retries." % (destPath,self.retryCount))
+    #endIf
+
+    return byteCount
+  #endDef
+
+#endClass
@@ -0,0 +1,201 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  A timeline of timing spans, e.g., the phases of a deployment.
+
+  Each span records its wall clock start and end time, the CPU time used by the process
+  and its child processes while the span was open and the peak resident set size (RSS)
+  of the process and of its child processes at the end of the span.
+
+  CPU time and peak RSS come from getrusage() so they are process wide.  When spans run
+  concurrently on different threads, the CPU time of a span includes the CPU time used
+  by the other threads and by the child processes that completed while the span was open.
+  The peak RSS is the high water mark of the process so far, so a regression shows up in
+  the first span that pushes it up.  On Linux the RSS is in kilobytes.
+
+  The timeline is written as a JSON file and as a Chrome trace event file that can be
+  opened with chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import os
+import json
+import time
+import resource
+import threading
+from contextlib import contextmanager
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+
+TR = Trace(__name__)
+
+
+class Timeline(object):
+  """
+    A collection of timing spans.
+  """
+
+  def __init__(self, name):
+    """
+      Constructor
+
+      name - name of the timeline, e.g., the name of the script, used in the names of the
+             timeline files and as the process name in the trace event file.
+    """
+    object.__init__(self)
+
+    if (not name):
+      raise MissingArgumentException("The timeline name must be provided.")
+    #endIf
+
+    self.name = name
+    self.startTime = time.time()
+    self.spans = []
+    self.threadIds = {}
+    self.lock = threading.Lock()
+  #endDef
+
+
+  def _getUsage(self):
+    """
+      Return a tuple with the CPU time in seconds used by the process and its child processes,
+      the peak RSS of the process and the peak RSS of its child processes.
+    """
+    selfUsage = resource.getrusage(resource.RUSAGE_SELF)
+    childUsage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpuTime = selfUsage.ru_utime + selfUsage.ru_stime + childUsage.ru_utime + childUsage.ru_stime
+    return (cpuTime,selfUsage.ru_maxrss,childUsage.ru_maxrss)
+  #endDef
+
+
+  def _getThreadId(self):
+    """
+      Return a small integer that identifies the current thread in the trace event file.
+      Caller holds the timeline lock.
+    """
+    ident = threading.current_thread().ident
+    threadId = self.threadIds.get(ident)
+    if (threadId == None):
+      threadId = len(self.threadIds) + 1
+      self.threadIds[ident] = threadId
+    #endIf
+    return threadId
+  #endDef
+
+
+  @contextmanager
+  def span(self, name, category='phase'):
+    """
+      Context manager that records a span with the given name for the code it wraps.
+
+      The span is recorded even when the wrapped code raises an exception.  The span
+      has a failed attribute set to True in that case.
+    """
+    startCPU, _, _ = self._getUsage()
+    startTime = time.time()
+    failed = False
+    try:
+      yield
+    except BaseException:
+      failed = True
+      raise
+    finally:
+      endTime = time.time()
+      endCPU, peakRSS, peakChildRSS = self._getUsage()
+      with self.lock:
+        span = { 'name': name,
+                 'category': category,
+                 'thread': threading.current_thread().name,
+                 'threadId': self._getThreadId(),
+                 'startTime': startTime,
+                 'endTime': endTime,
+                 'wallTime': endTime - startTime,
+                 'cpuTime': endCPU - startCPU,
+                 'peakRSS': peakRSS,
+                 'peakChildRSS': peakChildRSS,
+                 'failed': failed
+               }
+        self.spans.append(span)
+      #endWith
+    #endTry
+  #endDef
+
+
+  def getSpans(self):
+    """
+      Return a list of the spans recorded so far ordered by start time.
+    """
+    with self.lock:
+      spans = list(self.spans)
+    #endWith
+    spans.sort(key=lambda span: span['startTime'])
+    return spans
+  #endDef
+
+
+  def getTraceEvents(self):
+    """
+      Return the spans as a dictionary in the Chrome trace event format.
+
+      Each span is a complete event (ph 'X') with its time stamp and duration in microseconds
+      relative to the start of the timeline.
+    """
+    pid = os.getpid()
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.name}}]
+    for span in self.getSpans():
+      events.append({ 'name': span['name'],
+                      'cat': span['category'],
+                      'ph': 'X',
+                      'pid': pid,
+                      'tid': span['threadId'],
+                      'ts': int((span['startTime'] - self.startTime) * 1000000),
+                      'dur': int(span['wallTime'] * 1000000),
+                      'args': { 'cpuTime': span['cpuTime'],
+                                'peakRSS': span['peakRSS'],
+                                'peakChildRSS': span['peakChildRSS'],
+                                'failed': span['failed']
+                              }
+                    })
+    #endFor
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+  #endDef
+
+
+  def write(self, directoryPath):
+    """
+      Write the timeline to <name>-timeline.json and <name>-trace.json in the given directory.
+
+      The timeline file holds the spans.  The trace file holds the same spans in the
+      Chrome trace event format.  Return the list of paths of the files that were written.
+    """
+    methodName = "write"
+
+    if (not os.path.exists(directoryPath)):
+      os.makedirs(directoryPath)
+    #endIf
+
+    timeline = { 'name': self.name,
+                 'startTime': self.startTime,
+                 'endTime': time.time(),
+                 'spans': self.getSpans()
+               }
+
+    timelinePath = os.path.join(directoryPath,"%s-timeline.json" % self.name)
+    with open(timelinePath,'w') as timelineFile:
+      json.dump(timeline,timelineFile,indent=2)
+    #endWith
+
+    tracePath = os.path.join(directoryPath,"%s-trace.json" % self.name)
+    with open(tracePath,'w') as traceFile:
+      json.dump(self.getTraceEvents(),traceFile)
+    #endWith
+
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Timeline with %d spans written to: %s and %s" % (len(timeline['spans']),timelinePath,tracePath))
+    #endIf
+
+    return [timelinePath,tracePath]
+  #endDef
+
+#endClass
@@ -0,0 +1,242 @@
+"""
+Created on 18 OCT 2026
+
+Description:
+  Progress reports and summary metrics of file transfers, e.g., the download of the ICP
+  install archive, so a slow bucket region can be told apart from a stalled connection.
+
+  A TransferProgress is given the number of bytes of each chunk transferred, either by
+  calling update() or by calling the instance itself, which makes it usable as the Callback
+  of a boto3 S3 transfer.  Every interval seconds it reports through the trace the bytes
+  transferred, the throughput since the previous report, the average throughput and, when
+  the size of the transfer is known, the estimated time to completion.
+
+  When the transfer is done, finish() adds a summary record with the bytes, the seconds,
+  the average MB/s and the number of retries to a TransferMetrics collection.  By default
+  that is the DeploymentTransfers collection of this module, which the bootstrap and node
+  initialization scripts write to their logs directory as <name>-transfers.json.
+
+  The bytes transferred include the bytes of requests that were retried, so a transfer
+  with retries can report more bytes than the size of the object.
+"""
+
+import os
+import json
+import time
+import threading
+
+from yapl.utilities.Trace import Trace, Level
+from yapl.exceptions.Exceptions import MissingArgumentException
+
+TR = Trace(__name__)
+
+# Seconds between progress reports.
+DefaultReportInterval = 10
+
+MB = 1024.0 * 1024.0
+
+
+class TransferMetrics(object):
+  """
+    A collection of the summary records of transfers.
+  """
+
+  def __init__(self):
+    """
+      Constructor
+    """
+    object.__init__(self)
+    self.records = []
+    self.lock = threading.Lock()
+  #endDef
+
+
+  def add(self, record):
+    """
+      Add the given summary record to the collection.
+    """
+    with self.lock:
+      self.records.append(record)
+    #endWith
+  #endDef
+
+
+  def getRecords(self):
+    """
+      Return a list of the summary records ordered by start time.
+    """
+    with self.lock:
+      records = list(self.records)
+    #endWith
+    records.sort(key=lambda record: record['startTime'])
+    return records
+  #endDef
+
+
+  def write(self, directoryPath, name):
+    """
+      Write the summary records to <name>-transfers.json in the given directory and return
+      the path of the file.  The file also has the totals of all of the transfers.
+    """
+    methodName = "write"
+
+    if (not os.path.exists(directoryPath)):
+      os.makedirs(directoryPath)
+    #endIf
+
+    records = self.getRecords()
+    totalBytes = sum([record['bytes'] for record in records])
+    metrics = { 'name': name,
+                'transfers': records,
+                'totalBytes': totalBytes,
+                'totalRetries': sum([record['retries'] for record in records]),
+                'failed': len([record for record in records if record['failed']])
+              }
+
+    metricsPath = os.path.join(directoryPath,"%s-transfers.json" % name)
+    with open(metricsPath,'w') as metricsFile:
+      json.dump(metrics,metricsFile,indent=2)
+    #endWith
+
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Metrics of %d transfers, %d bytes, written to: %s" % (len(records),totalBytes,metricsPath))
+    #endIf
+    return metricsPath
+  #endDef
+
+#endClass
+
+
+# The transfers of the deployment script running in this process.
+DeploymentTransfers = TransferMetrics()
+
+
+class TransferProgress(object):
+  """
+    Progress reports and the summary record of one transfer.
+  """
+
+  def __init__(self, name, totalBytes=None, interval=DefaultReportInterval, metrics=None):
+    """
+      Constructor
+
+      name       - name of the transfer in the reports, e.g., the S3 key of the object
+      totalBytes - size of the transfer in bytes, if it is known
+      interval   - seconds between progress reports
+      metrics    - TransferMetrics the summary record is added to, by default DeploymentTransfers
+    """
+    object.__init__(self)
+
+    if (not name):
+      raise MissingArgumentException("The name of the transfer must be provided.")
+    #endIf
+
+    self.name = name
+    self.totalBytes = totalBytes
+    self.interval = interval
+    self.metrics = metrics if metrics != None else DeploymentTransfers
+    self.byteCount = 0
+    self.startTime = time.time()
+    self.lastReportTime = self.startTime
+    self.lastReportBytes = 0
+    self.finished = False
+    self.lock = threading.Lock()
+  #endDef
+
+
+  def setTotal(self, totalBytes):
+    """
+      Set the size of the transfer in bytes, e.g., once a probe of the object has returned it.
+    """
+    with self.lock:
+      self.totalBytes = totalBytes
+    #endWith
+  #endDef
+
+
+  def __call__(self, byteCount):
+    """
+      Same as update(), so the instance can be the Callback of a boto3 S3 transfer.
+    """
+    self.update(byteCount)
+  #endDef
+
+
+  def update(self, byteCount):
+    """
+      Add the given number of bytes to the bytes transferred and report the progress if
+      the report interval has passed.  Safe to call from several threads.
+    """
+    with self.lock:
+      self.byteCount += byteCount
+      now = time.time()
+      if (now - self.lastReportTime < self.interval):
+        return
+      #endIf
+      rate = (self.byteCount - self.lastReportBytes) / (now - self.lastReportTime)
+      self.lastReportTime = now
+      self.lastReportBytes = self.byteCount
+      transferred = self.byteCount
+      totalBytes = self.totalBytes
+    #endWith
+
+    self._report(transferred,totalBytes,rate,now)
+  #endDef
+
+
+  def _report(self, transferred, totalBytes, rate, now):
+    """
+      Write a progress report to the trace.
+    """
+    methodName = "update"
+
+    elapsed = now - self.startTime
+    average = transferred / elapsed if elapsed > 0 else 0.0
+    if (totalBytes):
+      remaining = max(totalBytes - transferred,0)
+      eta = "%.0f s" % (remaining / average) if average > 0 else "unknown"
+      TR.info(methodName,"%s: %.1f of %.1f MB (%d%%), %.1f MB/s now, %.1f MB/s average, ETA: %s" %
+              (self.name,transferred / MB,totalBytes / MB,min(100,100 * transferred // totalBytes),rate / MB,average / MB,eta))
+    else:
+      TR.info(methodName,"%s: %.1f MB, %.1f MB/s now, %.1f MB/s average" % (self.name,transferred / MB,rate / MB,average / MB))
+    #endIf
+  #endDef
+
+
+  def finish(self, retries=0, failed=False):
+    """
+      Add the summary record of the transfer to the metrics and return it.  Only the first
+      call adds a record.
+
+      retries - number of requests of the transfer that were retried
+      failed  - True if the transfer failed
+    """
+    methodName = "finish"
+
+    endTime = time.time()
+    seconds = endTime - self.startTime
+    with self.lock:
+      if (self.finished):
+        return None
+      #endIf
+      self.finished = True
+      byteCount = self.byteCount
+    #endWith
+
+    record = { 'name': self.name,
+               'bytes': byteCount,
+               'totalBytes': self.totalBytes,
+               'startTime': self.startTime,
+               'seconds': seconds,
+               'MBps': (byteCount / MB / seconds) if seconds > 0 else 0.0,
+               'retries': retries,
+               'failed': failed
+             }
+    self.metrics.add(record)
+
+    TR.info(methodName,"%s: %s %.1f MB in %.1f seconds, %.1f MB/s, %d retries." %
+            (self.name,"FAILED after" if failed else "transferred",byteCount / MB,seconds,record['MBps'],retries))
+    return record
+  #endDef
+
+#endClass
@@ -65,7 +65,7 @@ History:
   9 - 11 NOV 2018 - pvs - Moved to using the icp-install-artifact-map.yaml to define the S3 buckets,
   and the paths in those buckets for the ICP and Docker images for base and fixpacks.  This information
   will no longer be passed in through CloudFormation parameters.  This greatly simplifies the inputs
-  that need to be provided by the deployer.  See getInstallImages() method.
+  that need to be provided by the deployer.  See getInstallArtifact() method.
   
   12 - 19 NOV 2018 - pvs - Added KubeHelper and HelmHelper classes to execute arbitrary kubectl and 
   helm commands defined by yaml files in a command directory.  Refactored out the common code to
@@ -107,8 +107,12 @@ History:
 
 from Crypto.PublicKey import RSA
 from subprocess import call, check_call, CalledProcessError
+from multiprocessing.pool import ThreadPool
 import socket
 import shutil
+import errno
+import pipes
+import json
 import requests
 from os import chmod
 import sys, os.path, time
@@ -117,8 +121,17 @@ import docker
 import yaml
 from botocore.exceptions import ClientError
 from yapl.utilities.Trace import Trace, Level
+from yapl.utilities.PhaseScheduler import Phase, PhaseScheduler
+from yapl.utilities.PhaseJournal import PhaseJournal
+from yapl.utilities.Timeline import Timeline
 import yapl.utilities.Scrubber as Scrubber
 import yapl.utilities.Utilities as Utilities
+from yapl.utilities.RangedDownloader import RangedDownloader
+from yapl.utilities.TransferProgress import TransferProgress, DeploymentTransfers
+from yapl.utilities.ArtifactCache import ArtifactCache
+from yapl.docker.ImageArchiveLoader import ImageArchiveLoader
+from yapl.docker.IndexedImageLoader import IndexedImageLoader
+from yapl.docker.ImageIndex import ImageIndex
 from yapl.exceptions.Exceptions import ExitException
 from yapl.exceptions.Exceptions import MissingArgumentException
 from yapl.exceptions.Exceptions import InvalidArgumentException
@@ -129,6 +142,7 @@ from yapl.exceptions.ICPExceptions import ICPInstallationException
 #from yapl.docker.InstallDocker import InstallDocker
 
 from yapl.aws.LogExporter import LogExporter
+from yapl.aws.LogExporter import LogShipper
 from yapl.icp.AWSConfigureICP import ConfigureICP
 from yapl.icp.AWSConfigureEFS import ConfigureEFS
 from yapl.icp.ConfigurePKI import ConfigurePKI
@@ -137,12 +151,67 @@ from yapl.icp.ConfigureHelm import ConfigureHelm
 from yapl.icp.CommandsSetProcessor import CommandSetProcessor
 from yapl.icp.CommandHelper import CommandHelper
 from yapl.aws.SecurityHelper import SecurityHelper
+from yapl.coordination.CoordinatorFactory import createCoordinator
+from yapl.distribution.ArtifactServer import ArtifactServer
+from yapl.distribution.ArtifactDistribution import ArtifactDistribution
 
 ClusterHostSyncSleepTime = 60
 ClusterHostSyncMaxTryCount = 100
+
+# The cluster host sync sleep starts at the minimum and backs off to ClusterHostSyncSleepTime.
+ClusterHostSyncMinSleepTime = 5
 StackStatusMaxWaitCount = 100
 StackStatusSleepTime = 60
 
+# Byte range size and number of connections of the download of the installation images.
+DownloadChunkSize = 64 * 1024 * 1024
+DownloadMaxConnections = 8
+
+# Seconds between the progress reports of a download.
+TransferProgressInterval = 10
+
+# Seconds to wait for a log shipment in progress to complete before the final log export.
+LogShipperStopTimeout = 300
+
+# Size cap in bytes of the artifact cache of downloaded install images.
+ArtifactCacheMaxSize = 40 * 1024 * 1024 * 1024
+
+# The describe_instances() InstanceIds filter is limited, so instance IDs are described in chunks.
+DescribeInstancesChunkSize = 100
+
+# Maximum number of stacks that have their resources listed concurrently.
+StackDiscoveryMaxWorkers = 8
+
+# The describe_auto_scaling_groups() AutoScalingGroupNames is limited to 50 names per call.
+AutoScalingGroupChunkSize = 50
+
+# The discovery snapshot is written to the boot node home directory, next to the logs directory.
+# It is not written in the logs directory because it holds the stack parameters and the logs get
+# exported to S3.  The version is incremented when the content of the snapshot changes.
+DiscoverySnapshotFileName = "discovery-snapshot.json"
+DiscoverySnapshotVersion = 1
+
+# EC2 instance states that invalidate a discovery snapshot.
+InvalidInstanceStates = [ 'shutting-down', 'terminated', 'stopping', 'stopped' ]
+
+# Maximum number of bootstrap phases run at the same time.  The install artifact fetch
+# phases mostly wait on the network, so there is room for them next to the other phases.
+BootstrapPhaseMaxWorkers = 8
+
+# Where the Docker install binary is downloaded to.
+DockerInstallBinaryPath = "/root/docker/icp-install-docker.bin"
+
+# The phase journal is written to the boot node home directory.  It records the phases that
+# completed and their outputs so a failed bootstrap can be resumed with --resume.
+PhaseJournalFileName = "bootstrap-journal.json"
+
+# Number of ICP images loaded into docker at the same time.
+ImageLoadMaxWorkers = 4
+
+# Port of the artifact servers and number of children of a node of the artifact distribution tree.
+ArtifactServerPort = 8089
+ArtifactDistributionFanOut = 4
+
 """
   StackParameters and StackParameterNames holds all of the CloudFormation stack parameters.  
   The __getattr__ method on the Bootstrap class is used to make StackParameters accessible
@@ -236,6 +305,33 @@ class Host:
     self.role = role
     self.instanceId = instanceId
   #endDef
+  
+  
+  def toDict(self):
+    """
+      Return a dictionary representation of this Host suitable for serialization to JSON.
+    """
+    return { 'private_ip4_address': self.private_ip4_address,
+             'private_dns_name': self.private_dns_name,
+             'public_ip4_address': self.public_ip4_address,
+             'role': self.role,
+             'instanceId': self.instanceId
+           }
+  #endDef
+  
+  
+  @staticmethod
+  def fromDict(hostDict):
+    """
+      Return a Host instance created from the given dictionary representation.
+      See toDict().
+    """
+    return Host(hostDict.get('private_ip4_address'),
+                hostDict.get('private_dns_name'),
+                hostDict.get('public_ip4_address'),
+                hostDict.get('role'),
+                hostDict.get('instanceId'))
+  #endDef
 
 #endClass
 
@@ -255,7 +351,17 @@ class Bootstrap(object):
                     '--role': 'string',
                     '--logfile': 'string',
                     '--loglevel': 'string',
-                    '--trace': 'string'
+                    '--trace': 'string',
+                    '--reuse-discovery': 'switch',
+                    '--resume': 'switch',
+                    '--stream-images': 'switch',
+                    '--peer-distribution': 'switch',
+                    '--coordination-backend': 'string',
+                    '--coordination-path': 'string',
+                    '--artifact-cache': 'string',
+                    '--log-compression': 'string',
+                    '--incremental-log-export': 'switch',
+                    '--ship-logs': 'string'
                    }
 
 
@@ -279,6 +385,44 @@ class Bootstrap(object):
     self.hosts = { 'master': [], 'worker': [], 'proxy': [], 'management': [], 'va': [], 'etcd': []}
     self.clusterHosts = []
     self.bootHost = None
+    
+    # When reuseDiscovery is True the discovery snapshot from a previous run is used, if it is valid.
+    self.reuseDiscovery = False
+    self.discoverySnapshotPath = os.path.join(self.home,DiscoverySnapshotFileName)
+    
+    # When resume is True the phases that completed in a previous run recorded in the phase journal are skipped.
+    self.resume = False
+    self.phaseJournalPath = os.path.join(self.home,PhaseJournalFileName)
+    
+    # When streamImages is True the ICP images are loaded into docker as the install archive is downloaded.
+    self.streamImages = False
+    
+    # When peerDistribution is True the boot node serves the install images to the cluster nodes.
+    self.peerDistribution = False
+    self.artifactServer = None
+    
+    # The coordination with the cluster nodes uses SSM parameters unless some other backend is configured.
+    self.coordinationBackend = 'ssm'
+    self.coordinationPath = None
+    self.coordinator = None
+    
+    # With --artifact-cache downloaded install images are kept in the artifact cache, the same cache nodeinit 
+    # uses, so one AMI serves both.  The cache is off by default, it costs a HEAD of each object.
+    self.artifactCacheDirectory = None
+    self.artifactCache = None
+    
+    # The exported logs are compressed with gzip or zstd if a log compression is given.
+    self.logCompression = None
+    
+    # When incrementalLogExport is True only the logs, and the parts of logs, that changed since the previous export are exported.
+    self.incrementalLogExport = False
+    
+    # When logShipInterval is set the logs are exported by a LogShipper every logShipInterval seconds.
+    self.logShipInterval = None
+    self.logShipper = None
+    
+    # Timing spans of the bootstrap phases, written to the logs directory at the end of main().
+    self.timeline = Timeline('bootstrap')
         
     # Where the CloudFormation template puts the ICP inception fixpack archive.
     self.inceptionFixpackArchivePath = "/tmp/icp-inception-fixpack.tar"
@@ -563,6 +707,11 @@ class Bootstrap(object):
       into the StackParmaters dictionary to make them available for use with the Bootstrap 
       instance as instance variables via __getattr__().
       
+      If reuseDiscovery is set and a valid discovery snapshot from a previous run of the 
+      bootstrap on this boot node is available, then the stack parameters, hosts and SSM
+      parameter keys are restored from the snapshot rather than introspecting the stacks.
+      Otherwise the stacks are introspected and a new snapshot is saved.
+      
       We default the Docker client timeout to 7200 seconds to avoid a timeout during the 
       inception installation.  The timeout is configurable with the InceptionTimeout 
       parameter on the root stack template.
@@ -576,19 +725,40 @@ class Bootstrap(object):
     self.cfnClient = boto3.client('cloudformation', region_name=self.region)
     self.cfnResource = boto3.resource('cloudformation')
     self.ec2 = boto3.resource('ec2')
+    self.ec2Client = boto3.client('ec2', region_name=self.region)
     self.asg = boto3.client('autoscaling', region_name=self.region)
     self.s3  = boto3.client('s3', region_name=self.region)
-    self.ssm = boto3.client('ssm', region_name=self.region)
+    if (self.artifactCacheDirectory):
+      self.artifactCache = ArtifactCache(self.artifactCacheDirectory,maxSize=ArtifactCacheMaxSize)
+    #endIf
     self.route53 = boto3.client('route53', region_name=self.region)
     
-    StackParameters = self.getStackParameters(bootStackId)
+    self.coordinator = createCoordinator(self.coordinationBackend,
+                                         region=self.region,
+                                         path=self.coordinationPath,
+                                         minSleepTime=ClusterHostSyncMinSleepTime,
+                                         maxSleepTime=ClusterHostSyncSleepTime,
+                                         timeout=ClusterHostSyncMaxTryCount*ClusterHostSyncSleepTime)
+    
+    snapshot = None
+    if (self.reuseDiscovery):
+      snapshot = self.loadDiscoverySnapshot(self.discoverySnapshotPath,bootStackId)
+    #endIf
+    
+    if (snapshot):
+      StackParameters = snapshot.get('stackParameters')
+    else:
+      StackParameters = self.getStackParameters(bootStackId)
+    #endIf
     StackParameterNames = StackParameters.keys()
     
     self.logExporter = LogExporter(region=self.region,
                                    bucket=self.ICPDeploymentLogsBucketName,
                                    keyPrefix='logs/%s' % self.rootStackName,
                                    role=self.role,
-                                   fqdn=self.fqdn
+                                   fqdn=self.fqdn,
+                                   compression=self.logCompression,
+                                   incremental=self.incrementalLogExport
                                    )
     
     if (TR.isLoggable(Level.FINEST)):
@@ -608,6 +778,12 @@ class Bootstrap(object):
     # but with the dots removed.  ICPVersion must be provided as a stack parameter.
     self.icpVersion = self.ICPVersion.replace('.','')
     self.icpHome = "/opt/icp/%s" % self.ICPVersion
+
+    # The live logs are shipped to the S3 bucket for logs while the deployment runs.
+    if (self.logShipInterval):
+      self.logShipper = LogShipper(self.logExporter,[self.logsHome,"%s/cluster/logs" % self.icpHome],interval=self.logShipInterval)
+      self.logShipper.start()
+    #endIf
     
     # The path to the config.yaml template.
     self.configTemplatePath = os.path.join(self.home,"config","icp%s-config-template.yaml" % self.icpVersion)
@@ -659,19 +835,23 @@ class Bootstrap(object):
     
     TR.info(methodName,"ICP Inception container operation timeout is %d seconds." % self.inceptionTimeout)
     self.dockerClient = docker.from_env(timeout=self.inceptionTimeout)
+    self.imageIndex = ImageIndex(self.dockerClient)
 
     self.pkiDirectory = os.path.join(self.icpHome,"cluster","cfc-certs")
     self.pkiFileName = 'icp-router'
     self.CN = self.getClusterCN()
 
-    self.stackIds =  self._getStackIds(bootStackId)
-    
     # pre-signed URL for the ICP IntallationCompletedHandle
     self.installCompletedEventURL = self.InstallationCompletedURL
     
-    self._getHosts(self.stackIds)
-
-    self._getSSMParameterKeys(rootStackName)
+    if (snapshot):
+      self._restoreDiscoverySnapshot(snapshot)
+    else:
+      self.stackIds =  self._getStackIds(bootStackId)
+      self._getHosts(self.stackIds)
+      self._getSSMParameterKeys(rootStackName)
+      self.saveDiscoverySnapshot(self.discoverySnapshotPath,bootStackId)
+    #endIf
 
     # Initialize various IntrinsicVariables
     IntrinsicVariables['HelmHome'] = os.path.join(self.home,".helm")     
@@ -837,15 +1017,25 @@ class Bootstrap(object):
   #endDef
   
   
-  def _getAutoScalingGroupEC2Instances(self, asgIds):
+  def _getAutoScalingGroupEC2Instances(self, asgIds, asgClient=None):
     """
-      Return a list of EC2 instance IDs for the members of the given auto-scaling groups
-      with the given auto-scaling-group IDs.
+      Return a dictionary keyed by auto-scaling group ID (name) with the list of EC2 
+      instance IDs of the members of each of the given auto-scaling groups.
       
-      If asgIds is not a list then it is assumed to be a strting and a list is formed
+      If asgIds is not a list then it is assumed to be a string and a list is formed
       with that string.
+      
+      The auto-scaling groups are described in chunks of at most AutoScalingGroupChunkSize
+      names per describe_auto_scaling_groups() call and each chunk is paged with the 
+      describe_auto_scaling_groups paginator.  The master, worker, proxy, management and
+      va auto-scaling groups of a deployment get resolved in one call.
+      
+      asgClient is an AutoScaling client.  It defaults to the AutoScaling client of this
+      Bootstrap instance.
     """
-    result = []
+    methodName = "_getAutoScalingGroupEC2Instances"
+    
+    result = {}
     
     if (not asgIds):
       raise InvalidArgumentException("An auto-scaling group ID or a list of auto-scaling group IDs (asgIds) is required.")
@@ -855,31 +1045,54 @@ class Bootstrap(object):
       asgIds = [asgIds]
     #endIf
     
-    response = self.asg.describe_auto_scaling_groups( AutoScalingGroupNames=asgIds )
-    if (not response):
-      raise AWSStackResourceException("Empty result for AutoScalingGroup describe_auto_scaling_groups for asg: %s" % asgIds)
+    if (not asgClient):
+      asgClient = self.asg
     #endIf
     
-    autoScalingGroups = response.get('AutoScalingGroups')
-    for asg in autoScalingGroups:
-      instances = asg.get('Instances')
-      for instance in instances:
-        result.append(instance.get('InstanceId'))
+    paginator = asgClient.get_paginator('describe_auto_scaling_groups')
+    
+    for i in range(0, len(asgIds), AutoScalingGroupChunkSize):
+      chunk = asgIds[i:i+AutoScalingGroupChunkSize]
+      if (TR.isLoggable(Level.FINEST)):
+        TR.finest(methodName,"Describing auto-scaling groups: %s" % chunk)
+      #endIf
+      for page in paginator.paginate(AutoScalingGroupNames=chunk):
+        if (not page):
+          raise AWSStackResourceException("Empty result for AutoScalingGroup describe_auto_scaling_groups for asg: %s" % chunk)
+        #endIf
+        for asg in page.get('AutoScalingGroups',[]):
+          instances = asg.get('Instances',[])
+          result[asg.get('AutoScalingGroupName')] = [instance.get('InstanceId') for instance in instances]
+        #endFor
       #endFor
     #endFor
     
+    for asgId in asgIds:
+      if (asgId not in result):
+        TR.warning(methodName,"Auto-scaling group: %s, not found in describe_auto_scaling_groups() results." % asgId)
+        result[asgId] = []
+      #endIf
+    #endFor
+    
     return result
   #endDef
   
   
-  def _getEC2Instances(self, stackId):
+  def _getStackInstanceResources(self, stackId, cfnClient=None):
     """
-      Return a list of EC2 instance IDs deployed in the given stack.
-      The instances can be deployed atomically or as a member of an auto-scaling group.
+      Return a list of (resourceType, physicalResourceId) tuples for the EC2 instances
+      and the auto-scaling groups deployed in the given stack.  The list is in the order
+      the resources are listed by CloudFormation.
       
-      The returned list is intended to be used to get the roles and IP addresses
-      of the members of the ICP cluster, to create the hosts file used by the 
-      installer on the boot node.
+      The auto-scaling groups are not resolved to their members here.  The caller collects
+      the auto-scaling groups of all the stacks and resolves them in one batch.  
+      See _getAutoScalingGroupEC2Instances().
+      
+      The stack resources are listed with the list_stack_resources paginator so that
+      all pages of resources are seen for large stacks.  
+      
+      cfnClient is a CloudFormation client.  It defaults to the CloudFormation client
+      of this Bootstrap instance.
     """
     result = []
     
@@ -887,25 +1100,27 @@ class Bootstrap(object):
       raise MissingArgumentException("A stack ID (stackId) is required.")
     #endIf
     
-    response = self.cfnClient.list_stack_resources(StackName=stackId)
-    if (not response):
-      raise AWSStackResourceException("Empty result for CloudFormation list_stack_resources for stack: %s" % stackId)
+    if (not cfnClient):
+      cfnClient = self.cfnClient
     #endIf
     
-    stackResources = response.get('StackResourceSummaries')
+    stackResources = []
+    paginator = cfnClient.get_paginator('list_stack_resources')
+    for page in paginator.paginate(StackName=stackId):
+      if (not page):
+        raise AWSStackResourceException("Empty result for CloudFormation list_stack_resources for stack: %s" % stackId)
+      #endIf
+      stackResources.extend(page.get('StackResourceSummaries',[]))
+    #endFor
+    
     if (not stackResources):
       raise AWSStackResourceException("Empty StackResourceSummaries in response from CloudFormation list_stack_resources for stack: %s." % stackId)
     #endIf
 
     for resource in stackResources:
       resourceType = resource.get('ResourceType')
-      if (resourceType == 'AWS::EC2::Instance'):
-        ec2InstanceId = resource.get('PhysicalResourceId')
-        result.append(ec2InstanceId)        
-      #endIf
-      if (resourceType == 'AWS::AutoScaling::AutoScalingGroup'):
-        ec2InstanceIds = self._getAutoScalingGroupEC2Instances(resource.get('PhysicalResourceId'))
-        result.extend(ec2InstanceIds)
+      if (resourceType in ['AWS::EC2::Instance', 'AWS::AutoScaling::AutoScalingGroup']):
+        result.append((resourceType,resource.get('PhysicalResourceId')))
       #endIf
     #endFor
 
@@ -913,6 +1128,78 @@ class Bootstrap(object):
   #endDef
   
   
+  def _getStackEC2Instances(self, stackIds, cfnClient=None, asgClient=None, maxWorkers=StackDiscoveryMaxWorkers):
+    """
+      Return a list of EC2 instance IDs deployed in all of the given stacks.
+      The instances can be deployed atomically or as a member of an auto-scaling group.
+      
+      The returned list is intended to be used to get the roles and IP addresses
+      of the members of the ICP cluster, to create the hosts file used by the 
+      installer on the boot node.
+      
+      The resources of the stacks are enumerated concurrently on a pool of at most 
+      maxWorkers threads.  The auto-scaling groups found in all of the stacks are then
+      resolved to their member instances with one batched lookup.  The results are 
+      merged in the order of the given stackIds and the order of the resources in each 
+      stack, so the returned list is deterministic.
+      
+      cfnClient is a CloudFormation client and asgClient is an AutoScaling client.
+      They default to the clients of this Bootstrap instance.  Different clients, e.g.,
+      stubbed clients, may be provided.  (boto3 clients are safe to share across threads.)
+    """
+    methodName = "_getStackEC2Instances"
+    
+    result = []
+    
+    if (not stackIds):
+      raise InvalidArgumentException("A non-empty list of stack IDs (stackIds) is required.")
+    #endIf
+    
+    if (not cfnClient):
+      cfnClient = self.cfnClient
+    #endIf
+    
+    workerCount = max(1,min(maxWorkers,len(stackIds)))
+    if (TR.isLoggable(Level.FINER)):
+      TR.finer(methodName,"Listing resources of %d stacks with %d worker threads." % (len(stackIds),workerCount))
+    #endIf
+    
+    pool = ThreadPool(workerCount)
+    try:
+      stackResources = pool.map(lambda stackId: self._getStackInstanceResources(stackId,cfnClient=cfnClient), stackIds)
+    finally:
+      pool.close()
+      pool.join()
+    #endTry
+    
+    asgIds = []
+    for resources in stackResources:
+      for resourceType, physicalId in resources:
+        if (resourceType == 'AWS::AutoScaling::AutoScalingGroup' and physicalId not in asgIds):
+          asgIds.append(physicalId)
+        #endIf
+      #endFor
+    #endFor
+    
+    asgInstanceIds = {}
+    if (asgIds):
+      asgInstanceIds = self._getAutoScalingGroupEC2Instances(asgIds,asgClient=asgClient)
+    #endIf
+    
+    for resources in stackResources:
+      for resourceType, physicalId in resources:
+        if (resourceType == 'AWS::EC2::Instance'):
+          result.append(physicalId)
+        else:
+          result.extend(asgInstanceIds.get(physicalId,[]))
+        #endIf
+      #endFor
+    #endFor
+    
+    return result
+  #endDef
+  
+  
   def _getStackIds(self, bootStackId):
     """
       Return a list of stack IDs from the StackIds boot stack input parameter.
@@ -928,6 +1215,52 @@ class Bootstrap(object):
   #endDef
     
   
+  def _describeEC2Instances(self, instanceIds, ec2Client=None):
+    """
+      Return a dictionary keyed by EC2 instance ID with the instance description
+      returned by describe_instances() for each of the given instance IDs.
+      
+      The instance IDs are described in chunks of at most DescribeInstancesChunkSize
+      IDs per describe_instances() call and each chunk is paged with the describe_instances 
+      paginator.  The number of API calls is proportional to the number of chunks rather 
+      than the number of instances.  (An ec2.Instance() resource lazy loads its attributes
+      which can result in a DescribeInstances call for each instance.)
+      
+      ec2Client is an EC2 client.  It defaults to the EC2 client of this Bootstrap instance.
+      A different client, e.g., a stubbed client, may be provided.
+    """
+    methodName = "_describeEC2Instances"
+    
+    result = {}
+    
+    if (not instanceIds):
+      raise MissingArgumentException("A non-empty list of EC2 instance IDs (instanceIds) is required.")
+    #endIf
+    
+    if (not ec2Client):
+      ec2Client = self.ec2Client
+    #endIf
+    
+    paginator = ec2Client.get_paginator('describe_instances')
+    
+    for i in range(0, len(instanceIds), DescribeInstancesChunkSize):
+      chunk = instanceIds[i:i+DescribeInstancesChunkSize]
+      if (TR.isLoggable(Level.FINEST)):
+        TR.finest(methodName,"Describing EC2 instances: %s" % chunk)
+      #endIf
+      for page in paginator.paginate(InstanceIds=chunk):
+        for reservation in page.get('Reservations',[]):
+          for instance in reservation.get('Instances',[]):
+            result[instance.get('InstanceId')] = instance
+          #endFor
+        #endFor
+      #endFor
+    #endFor
+    
+    return result
+  #endDef
+  
+  
   def _getHosts(self, stackIds):
     """
       Fill the hosts dictionary instance variable with Host objects for all the hosts in the
@@ -952,33 +1285,36 @@ class Bootstrap(object):
       TR.finest(methodName,"StackIds: %s" % stackIds)
     #endIf
     
-    ec2InstanceIds = []
-    for stackId in stackIds:
-      ec2Ids = self._getEC2Instances(stackId)
-      if (ec2Ids):
-        ec2InstanceIds.extend(ec2Ids)
-      #endIf
-    #endFor
+    ec2InstanceIds = self._getStackEC2Instances(stackIds)
     
     if (not ec2InstanceIds):
       raise AWSStackResourceException("The ICP deployment is expected to have several EC2 instances, but none were found.")
     #endIf
     
+    ec2Instances = self._describeEC2Instances(ec2InstanceIds)
+    
     for iid in ec2InstanceIds:
-      ec2Instance = self.ec2.Instance(iid)
-      tags = ec2Instance.tags
+      ec2Instance = ec2Instances.get(iid)
+      if (not ec2Instance):
+        TR.warning(methodName,"Ignoring EC2 instance: %s, not found in describe_instances() results." % iid)
+        continue
+      #endIf
+      tags = ec2Instance.get('Tags',[])
       icpRole = ""
       for tag in tags:
         if tag['Key'] == 'ICPRole':
           icpRole = tag['Value'].lower()
         #endIf
       #endFor
+      privateIPAddress = ec2Instance.get('PrivateIpAddress')
+      privateDNSName = ec2Instance.get('PrivateDnsName')
+      publicIPAddress = ec2Instance.get('PublicIpAddress')
       if (not icpRole):
         TR.warning(methodName,"Ignoring EC2 instance: %s, with no ICPRole tag." % iid)
       elif (icpRole == "boot"):
-        self.bootHost = Host(ec2Instance.private_ip_address,ec2Instance.private_dns_name,ec2Instance.public_ip_address,icpRole,iid)
+        self.bootHost = Host(privateIPAddress,privateDNSName,publicIPAddress,icpRole,iid)
       elif (icpRole in ICPClusterRoles):
-        self.addHost(icpRole,Host(ec2Instance.private_ip_address,ec2Instance.private_dns_name,ec2Instance.public_ip_address,icpRole,iid))
+        self.addHost(icpRole,Host(privateIPAddress,privateDNSName,publicIPAddress,icpRole,iid))
       else:
         TR.warning(methodName,"Ignoring EC2 instance: %s, with role tag: %s" % (iid,icpRole))
       #endIf
@@ -986,6 +1322,171 @@ class Bootstrap(object):
   #endDef
   
   
+  def saveDiscoverySnapshot(self, snapshotPath, bootStackId):
+    """
+      Write the results of the stack introspection to a JSON file at the given snapshotPath.
+      
+      The snapshot holds the stack parameters, the stack IDs, the cluster hosts, the boot host
+      and the SSM parameter keys.  It is keyed by the given bootStackId and it has a version,
+      DiscoverySnapshotVersion, so a snapshot from some other deployment or from an incompatible
+      version of the bootstrap script is not used.  See loadDiscoverySnapshot().
+      
+      The snapshot holds sensitive stack parameters so the file is created with mode 0600.
+      
+      A failure to write the snapshot is not fatal.  The snapshot is an optimization.
+    """
+    methodName = "saveDiscoverySnapshot"
+    
+    snapshot = { 'version': DiscoverySnapshotVersion,
+                 'bootStackId': bootStackId,
+                 'rootStackName': self.rootStackName,
+                 'region': self.region,
+                 'createdAt': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                 'stackParameters': StackParameters,
+                 'stackIds': self.stackIds,
+                 'hosts': dict([(role,[host.toDict() for host in hostsInRole]) for role,hostsInRole in self.hosts.items()]),
+                 'bootHost': self.bootHost.toDict() if self.bootHost else None,
+                 'ssmParameterKeys': SSMParameterKeys
+               }
+    try:
+      # The file is created with mode 0600 so it is never readable by others, not even briefly.
+      # The mode of a snapshot left by a previous run is set before it is rewritten.
+      fd = os.open(snapshotPath, os.O_WRONLY|os.O_CREAT|os.O_TRUNC, 0600)
+      os.fchmod(fd, 0600)
+      with os.fdopen(fd,'w') as snapshotFile:
+        json.dump(snapshot,snapshotFile,indent=2)
+      #endWith
+      TR.info(methodName,"Discovery snapshot for boot stack: %s saved to: %s" % (bootStackId,snapshotPath))
+    except Exception as e:
+      TR.warning(methodName,"Failed to save discovery snapshot to: %s, Exception: %s" % (snapshotPath,e))
+    #endTry
+  #endDef
+  
+  
+  def loadDiscoverySnapshot(self, snapshotPath, bootStackId):
+    """
+      Return the discovery snapshot saved at the given snapshotPath if it exists, it was
+      saved for the given bootStackId with the current DiscoverySnapshotVersion and it is 
+      still valid.  Otherwise return None.
+      
+      See _validateDiscoverySnapshot() for the validity checks.
+    """
+    methodName = "loadDiscoverySnapshot"
+    
+    if (not os.path.isfile(snapshotPath)):
+      TR.info(methodName,"No discovery snapshot at: %s. The stacks will be introspected." % snapshotPath)
+      return None
+    #endIf
+    
+    try:
+      with open(snapshotPath,'r') as snapshotFile:
+        snapshot = json.load(snapshotFile)
+      #endWith
+    except Exception as e:
+      TR.warning(methodName,"Failed to load discovery snapshot from: %s, Exception: %s" % (snapshotPath,e))
+      return None
+    #endTry
+    
+    if (snapshot.get('version') != DiscoverySnapshotVersion):
+      TR.info(methodName,"Discovery snapshot version: %s is not the current version: %s. The stacks will be introspected." % (snapshot.get('version'),DiscoverySnapshotVersion))
+      return None
+    #endIf
+    
+    if (snapshot.get('bootStackId') != bootStackId):
+      TR.info(methodName,"Discovery snapshot is for boot stack: %s, not for boot stack: %s. The stacks will be introspected." % (snapshot.get('bootStackId'),bootStackId))
+      return None
+    #endIf
+    
+    if (not self._validateDiscoverySnapshot(snapshot)):
+      return None
+    #endIf
+    
+    TR.info(methodName,"Using discovery snapshot created at: %s from: %s" % (snapshot.get('createdAt'),snapshotPath))
+    return snapshot
+  #endDef
+  
+  
+  def _validateDiscoverySnapshot(self, snapshot):
+    """
+      Return True if all the hosts in the given snapshot are still EC2 instances with 
+      the private IP address recorded in the snapshot and not in one of InvalidInstanceStates.
+      
+      The check is done with batched describe_instances() calls, which is much cheaper 
+      than the full CloudFormation, AutoScaling and EC2 introspection.
+    """
+    methodName = "_validateDiscoverySnapshot"
+    
+    hostDicts = []
+    for hostsInRole in snapshot.get('hosts',{}).values():
+      hostDicts.extend(hostsInRole)
+    #endFor
+    
+    if (not hostDicts or not snapshot.get('bootHost') or not snapshot.get('stackParameters')):
+      TR.info(methodName,"Discovery snapshot is incomplete. The stacks will be introspected.")
+      return False
+    #endIf
+    
+    hostDicts.append(snapshot.get('bootHost'))
+    
+    try:
+      ec2Instances = self._describeEC2Instances([hostDict.get('instanceId') for hostDict in hostDicts])
+    except ClientError as e:
+      TR.info(methodName,"Discovery snapshot instances could not be described: %s. The stacks will be introspected." % e)
+      return False
+    #endTry
+    
+    for hostDict in hostDicts:
+      iid = hostDict.get('instanceId')
+      ec2Instance = ec2Instances.get(iid)
+      if (not ec2Instance):
+        TR.info(methodName,"Discovery snapshot instance: %s no longer exists. The stacks will be introspected." % iid)
+        return False
+      #endIf
+      state = ec2Instance.get('State',{}).get('Name')
+      if (state in InvalidInstanceStates):
+        TR.info(methodName,"Discovery snapshot instance: %s is in state: %s. The stacks will be introspected." % (iid,state))
+        return False
+      #endIf
+      if (ec2Instance.get('PrivateIpAddress') != hostDict.get('private_ip4_address')):
+        TR.info(methodName,"Discovery snapshot instance: %s private IP address has changed. The stacks will be introspected." % iid)
+        return False
+      #endIf
+    #endFor
+    
+    return True
+  #endDef
+  
+  
+  def _restoreDiscoverySnapshot(self, snapshot):
+    """
+      Restore the stack IDs, hosts, boot host and SSM parameter keys from the given 
+      discovery snapshot.
+      
+      The stack parameters are restored in __init() since they are needed before the
+      rest of the discovery results.
+    """
+    methodName = "_restoreDiscoverySnapshot"
+    
+    global SSMParameterKeys
+    
+    self.stackIds = snapshot.get('stackIds')
+    
+    for role,hostsInRole in snapshot.get('hosts',{}).items():
+      for hostDict in hostsInRole:
+        self.addHost(role,Host.fromDict(hostDict))
+      #endFor
+    #endFor
+    
+    self.bootHost = Host.fromDict(snapshot.get('bootHost'))
+    
+    SSMParameterKeys = snapshot.get('ssmParameterKeys',[])
+    
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Restored %d cluster hosts and %d SSM parameter keys from the discovery snapshot." % (len(self.getClusterHosts()),len(SSMParameterKeys)))
+    #endIf
+  #endDef
+  
+  
   def getMasterHosts(self):
     """
       Return the list of hosts instances in role of 'master'
@@ -1208,25 +1709,21 @@ class Bootstrap(object):
       in main() so if an exception occurs here it is caught here and the stack dump is
       emitted to the bootstrap log file.
       
-      NOTE: The maximum number of keys that can be deleted in one call to delete_parameters()
-      is 10.  Go figure. The number of SSMParameterKeys will be the number of nodes in the 
-      cluster.  In the body of the method the SSMParameterKeys is broken up into a list of
-      lists of length at most 10.
+      NOTE: The keys are deleted with the cluster coordinator so the same keys are cleaned
+      up whichever coordination backend is used.  The SSM backend deletes at most 10 keys 
+      per call to delete_parameters().
     """
     methodName = "_deleteSSMParameters"
     
     global SSMParameterKeys
     
     try:
-      if (SSMParameterKeys):
-        # keep within the limit of deleting at most 10 keys at a time
-        parmKeys = [SSMParameterKeys[i:i+10] for i in range(0, len(SSMParameterKeys), 10)]
-        for keys in parmKeys:
-          self.ssm.delete_parameters(Names=keys)
-          if (TR.isLoggable(Level.FINEST)):
-            TR.finest(methodName,"Post install cleanup. Deleted SSM parameters: %s" % keys)
-          #endIf
-        #endFor
+      if (SSMParameterKeys and self.coordinator):
+        # The coordinator keeps within the limits of the backend on the number of keys per call.
+        self.coordinator.deleteValues(SSMParameterKeys)
+        if (TR.isLoggable(Level.FINEST)):
+          TR.finest(methodName,"Post install cleanup. Deleted coordination keys: %s" % SSMParameterKeys)
+        #endIf
       #endIf
     except Exception as e:
       raise ICPInstallationException("Attempting to delete SSM parameter keys: %s\n\tException: %s" % (SSMParameterKeys,e))
@@ -1291,12 +1788,9 @@ class Bootstrap(object):
     
     parameterKey = "/%s/boot-public-key" % stackName
     
-    TR.info(methodName,"Putting SSH public key to SSM parameter: %s" % parameterKey)
-    self.ssm.put_parameter(Name=parameterKey,
-                           Description="Root public key and private IP address for ICP boot node to be added to autorized_keys of all ICP cluster nodes.",
-                           Value=authorizedKeyEntry,
-                           Type='String',
-                           Overwrite=True)
+    TR.info(methodName,"Putting SSH public key to coordination key: %s" % parameterKey)
+    self.coordinator.publishState(parameterKey,authorizedKeyEntry,
+                                  description="Root public key and private IP address for ICP boot node to be added to autorized_keys of all ICP cluster nodes.")
     TR.info(methodName,"Public key published.")
     
   #endDef
@@ -1304,59 +1798,20 @@ class Bootstrap(object):
   def syncWithClusterNodes(self,desiredState='READY'):
     """
       Wait for all cluster nodes to indicate they are ready to proceed with the installation.
+      
+      Each cluster node publishes its state to the key /<rootStackName>/<private DNS name>.
+      The cluster coordinator barrier waits for all of the keys to be in the desired state
+      and acknowledges each one with ACK.  The coordinator polls with an adaptive backoff
+      from ClusterHostSyncMinSleepTime to ClusterHostSyncSleepTime and it gives up after
+      ClusterHostSyncMaxTryCount * ClusterHostSyncSleepTime seconds.
     """
     methodName = "syncWithClusterNodes"
     
+    hostParameters = ["/%s/%s" % (self.rootStackName,host.private_dns_name) for host in self.getClusterHosts()]
     
-    hostsNotReady = self.getClusterHosts()
-    
-    tryCount = 1
-    while (hostsNotReady and tryCount <= ClusterHostSyncMaxTryCount):
-      for host in hostsNotReady:
-        hostParameter = "/%s/%s" % (self.rootStackName,host.private_dns_name)
-        if (TR.isLoggable(Level.FINE)):
-          TR.fine(methodName,"Try: %d, checking readiness of host: %s with role: %s, using SSM Parameter: %s" % (tryCount,host.private_dns_name,host.role,hostParameter))
-        #endIf
-        try:
-          response = self.ssm.get_parameter(Name=hostParameter)
-          if (not response):
-            TR.warning(methodName, "Failed to get a response for get_parameter: %s" % hostParameter)
-          else:
-            parameter = response.get('Parameter')
-            if (not parameter):
-              raise Exception("get_parameter response returned an empty Parameter.")
-            #endIf
-            state = parameter.get('Value')
-            if (state == desiredState):
-              TR.info(methodName,"Role: %s, host: %s, is in desired state: %s." % (host.role,host.private_dns_name,state))
-              hostsNotReady.remove(host)
-              self.putSSMParameter(hostParameter,'ACK',description="Acknowledged state: %s received." % state)
-            else:
-              if (TR.isLoggable(Level.FINEST)):
-                TR.finest(methodName,"Role: %s, host: %s, Ignoring state: %s" % (host.role,host.private_dns_name,state))
-              #endIf
-            #endIf
-          #endIf
-        except ClientError as e:
-          etext = "%s" % e
-          if (etext.find('ParameterNotFound') >= 0):
-            if (TR.isLoggable(Level.FINEST)):
-              TR.finest(methodName,"Ignoring ParameterNotFound ClientError on ssm.get_parameter() invocation")
-            #endIf
-          else:
-            raise ICPInstallationException("Unexpected ClientError on ssm.get_parameter() invocation: %s" % etext)
-          #endIf
-        #endTry
-      #endFor
-      time.sleep(ClusterHostSyncSleepTime)
-      tryCount += 1
-    #endWhile
+    self.coordinator.waitForAll(hostParameters,desiredState,ackValue='ACK')
     
-    if (hostsNotReady):
-      raise Exception("Cluster hosts are not ready: %s" % hostsNotReady)
-    else:
-      TR.info(methodName, "All cluster hosts are ready to proceed with the ICP installation.")
-    #endIf
+    TR.info(methodName, "All cluster hosts are ready to proceed with the ICP installation.")
   #endDef
   
 
@@ -1449,22 +1904,19 @@ class Bootstrap(object):
     """
       Put the given parameterValue to the given parameterKey
       
-      Wrapper for dealing with CloudFormation SSM parameters.
+      Wrapper for dealing with CloudFormation SSM parameters.  The value is put with the 
+      cluster coordinator so it goes to the configured coordination backend.
     """
     methodName = "putSSMParameter"
     
-    TR.info(methodName,"Putting value: %s to SSM parameter: %s" % (parameterValue,parameterKey))
-    self.ssm.put_parameter(Name=parameterKey,
-                           Description=description,
-                           Value=parameterValue,
-                           Type='String',
-                           Overwrite=True)
+    TR.info(methodName,"Putting value: %s to coordination key: %s" % (parameterValue,parameterKey))
+    self.coordinator.publishState(parameterKey,parameterValue,description=description)
     TR.info(methodName,"Value: %s put to: %s." % (parameterValue,parameterKey))
     
   #endDef
   
   
-  def getS3Object(self, bucket=None, s3Path=None, destPath=None):
+  def getS3Object(self, bucket=None, s3Path=None, destPath=None, chunkSize=DownloadChunkSize, maxConnections=DownloadMaxConnections, sha256=None):
     """
       Return destPath which is the local file path provided as the destination of the download.
       
@@ -1475,10 +1927,14 @@ class Bootstrap(object):
       the object. 
       
       If the directory of the destPath does not exist it is created.
-      It is assumed the objects to be gotten are large binary objects.
+      It is assumed the objects to be gotten are large binary objects.  The object is 
+      downloaded in byte ranges of chunkSize bytes over maxConnections connections.
+      See yapl.utilities.RangedDownloader.  The progress of the download is reported every
+      TransferProgressInterval seconds and its summary is added to the deployment transfer
+      metrics.  See yapl.utilities.TransferProgress.
       
-      For details on how to download a large file with the requests package see:
-      https://stackoverflow.com/questions/16694907/how-to-download-large-file-in-python-with-requests-py
+      If a sha256 hex digest is provided, the object is hashed as it is downloaded and
+      a download with a different SHA-256 is rejected.
     """
     methodName = "getS3Object"
     
@@ -1507,15 +1963,55 @@ class Bootstrap(object):
       TR.info(methodName,"Created object destination directory: %s" % destDir)
     #endIf
     
-    r = requests.get(s3url, stream=True)
-    with open(destPath, 'wb') as destFile:
-      shutil.copyfileobj(r.raw, destFile)
-    #endWith
+    hit, etag = self.getCachedObject(bucket,s3Path,destPath,sha256=sha256)
+    if (hit):
+      TR.info(methodName, "COMPLETED object: %s from bucket: %s, to: %s from the artifact cache." % (s3Path,bucket,destPath))
+      return destPath
+    #endIf
+    
+    progress = TransferProgress(s3Path,interval=TransferProgressInterval)
+    downloader = RangedDownloader(chunkSize=chunkSize,maxConnections=maxConnections)
+    try:
+      byteCount = downloader.download(s3url,destPath,sha256=sha256,progress=progress)
+    except:
+      progress.finish(retries=downloader.retryCount,failed=True)
+      raise
+    #endTry
+    progress.finish(retries=downloader.retryCount)
+    
+    if (self.artifactCache):
+      self.artifactCache.put(bucket,s3Path,etag,destPath,sha256=sha256)
+    #endIf
 
-    TR.info(methodName, "COMPLETED download from bucket: %s, object: %s, to: %s" % (bucket,s3Path,destPath))
+    TR.info(methodName, "COMPLETED download of %d bytes from bucket: %s, object: %s, to: %s" % (byteCount,bucket,s3Path,destPath))
     
     return destPath
   #endDef
+  
+  
+  def getCachedObject(self, bucket, s3Path, destPath, sha256=None):
+    """
+      Return a tuple with True if the given S3 object was linked from the artifact cache 
+      to the given destination path and the ETag of the object.
+      
+      The ETag comes from a HEAD of the object, so a changed object is not a cache hit.
+      If the HEAD fails the ETag is None and only a SHA-256 can be a hit.
+    """
+    methodName = "getCachedObject"
+    
+    if (not self.artifactCache):
+      return (False,None)
+    #endIf
+    
+    etag = None
+    try:
+      etag = self.s3.head_object(Bucket=bucket,Key=s3Path).get('ETag')
+    except ClientError as e:
+      TR.warning(methodName,"Unable to get the ETag of object: %s in bucket: %s: %s" % (s3Path,bucket,e))
+    #endTry
+    
+    return (self.artifactCache.get(bucket,s3Path,etag,destPath,sha256=sha256),etag)
+  #endDef
 
   
   def loadInstallMap(self, mapPath="", version=None, region=None):
@@ -1570,34 +2066,161 @@ class Bootstrap(object):
   #endDef
   
   
-  def getInstallImages(self, installMap):
+  def getInstallArtifactNames(self):
     """
-      Create a presigned URL and use it to download the ICP and Docker images from the S3
-      bucket where the images are stored.
+      Return the names of the install artifacts the bootstrap fetches.
       
-      ICP install image gets downloaded to: /tmp/icp-install-archive.tgz
-      Docker binary gets downloaded to: /root/docker/icp-install-docker.bin
-        
-      Using a pre-signed URL is needed when the deployer does not have access to the installation
-      image bucket.
+      The ICP install archive is not fetched with streamImages, it is downloaded by 
+      streamICPImages().  The PKI key and certificate are fetched when the deployer 
+      provides them in the ClusterPKIBucketName bucket at the ClusterPKIRootPath.
     """
-    methodName = "getInstallImages"
-    
-    icpLocalPath = "/tmp/icp-install-archive.tgz"
-    icpS3Path = "{version}/{object}".format(version=installMap['version'],object=installMap['icp-base-install-archive'])
-    dockerLocalPath = "/root/docker/icp-install-docker.bin"
-    dockerS3Path = "{version}/{object}".format(version=installMap['version'],object=installMap['docker-install-binary'])    
-    bucket = installMap['s3bucket']
-    
-    for s3Path, localPath in zip([icpS3Path, dockerS3Path], [icpLocalPath, dockerLocalPath]):
-      TR.info(methodName,"Getting object: %s from bucket: %s using a pre-signed URL." % (s3Path,bucket))
-      self.getS3Object(bucket=bucket, s3Path=s3Path, destPath=localPath)
-    #endFor
-    
+    names = ['DockerBinary']
+    if (not self.streamImages):
+      names.insert(0,'ICPArchive')
+    #endIf
+    if (self.ClusterPKIBucketName and self.ClusterPKIRootPath):
+      names.extend(['PKIKey','PKICert'])
+    #endIf
+    return names
   #endDef
   
   
-  def installDocker(self, inventoryPath='/etc/ansible/hosts'):
+  def getInstallArtifact(self, name, installMap=None):
+    """
+      Return a dictionary with the S3 bucket, the S3 key, the local destination path (destPath)
+      and the optional SHA-256 of the install artifact with the given name.
+      
+      ICPArchive        - the ICP install archive, downloaded to: /tmp/icp-install-archive.tgz
+      DockerBinary      - the Docker install binary, downloaded to: /root/docker/icp-install-docker.bin
+      PKIKey, PKICert   - the deployer provided PKI key and certificate, downloaded to the
+                          PKI directory
+      
+      The ICP archive bucket objects are downloaded with a pre-signed URL (presignedURL is
+      True) because the deployer may not have access to that bucket.  The PKI objects are
+      in a bucket of the deployer and are downloaded directly.
+    """
+    if (name == 'PKIKey' or name == 'PKICert'):
+      suffix = 'key' if name == 'PKIKey' else 'crt'
+      return { 'bucket': self.ClusterPKIBucketName, 
+               'key': "%s.%s" % (self.ClusterPKIRootPath,suffix),
+               'destPath': os.path.join(self.pkiDirectory,"%s.%s" % (self.pkiFileName,suffix)),
+               'sha256': None,
+               'presignedURL': False
+             }
+    #endIf
+    
+    if (not installMap):
+      raise MissingArgumentException("The install map must be provided to get install artifact: %s" % name)
+    #endIf
+    
+    if (name == 'ICPArchive'):
+      objectName = installMap['icp-base-install-archive']
+      destPath = self.imageArchivePath
+      sha256 = installMap.get('icp-base-install-archive-sha256')
+    elif (name == 'DockerBinary'):
+      objectName = installMap['docker-install-binary']
+      destPath = DockerInstallBinaryPath
+      sha256 = installMap.get('docker-install-binary-sha256')
+    else:
+      raise InvalidArgumentException("Unknown install artifact: %s" % name)
+    #endIf
+    
+    return { 'bucket': installMap['s3bucket'],
+             'key': "{version}/{object}".format(version=installMap['version'],object=objectName),
+             'destPath': destPath,
+             'sha256': sha256,
+             'presignedURL': True
+           }
+  #endDef
+  
+  
+  def fetchInstallArtifact(self, name, installMap=None):
+    """
+      Download the install artifact with the given name to its destination path.
+      See getInstallArtifact().
+      
+      Each install artifact is fetched by its own bootstrap phase, so the downloads run at
+      the same time and a phase that needs an artifact waits for that artifact only.
+      
+      Using a pre-signed URL is needed when the deployer does not have access to the installation
+      image bucket.  If the install map has an icp-base-install-archive-sha256 or 
+      docker-install-binary-sha256 entry, the image is checked against it as it is downloaded.
+    """
+    methodName = "fetchInstallArtifact"
+    
+    artifact = self.getInstallArtifact(name,installMap)
+    bucket = artifact['bucket']
+    s3Path = artifact['key']
+    destPath = artifact['destPath']
+    
+    if (artifact['presignedURL']):
+      TR.info(methodName,"Getting %s object: %s from bucket: %s using a pre-signed URL." % (name,s3Path,bucket))
+      self.getS3Object(bucket=bucket, s3Path=s3Path, destPath=destPath, sha256=artifact['sha256'])
+    else:
+      # The PKI key and certificate are fetched at the same time into the same directory.
+      destDir = os.path.dirname(destPath)
+      try:
+        os.makedirs(destDir,0700)
+      except OSError as e:
+        if (e.errno != errno.EEXIST):
+          raise
+        #endIf
+      #endTry
+      TR.info(methodName,"Downloading %s from S3 bucket: %s with key: %s to file: %s" % (name,bucket,s3Path,destPath))
+      self.s3.download_file(bucket,s3Path,destPath)
+    #endIf
+    
+    return destPath
+  #endDef
+  
+  
+  def serveInstallImages(self, installMap):
+    """
+      Serve the Docker binary the boot node downloaded to the cluster nodes.
+      
+      The cluster nodes only get the Docker binary, see nodeinit getInstallImages(), so
+      the ICP install archive is not served.  An ArtifactServer serves the Docker binary
+      at its S3 key.  The artifact distribution tree is published with the cluster 
+      coordinator and the boot node is published as the source of its children.  The 
+      other cluster nodes get the binary from their parent in the tree and serve it to 
+      their own children.  See yapl.distribution.ArtifactDistribution.
+      
+      The serving is not needed for the bootstrap to succeed.  If the server can not be
+      started, the children of the boot node are told there is no source so they get 
+      the binary from S3 right away, rather than wait for the ArtifactSourceTimeout.
+      
+      The coordination keys of the tree are added to the SSMParameterKeys so they are
+      deleted at the end of the bootstrap.
+    """
+    methodName = "serveInstallImages"
+    global SSMParameterKeys
+    
+    dockerS3Path = "{version}/{object}".format(version=installMap['version'],object=installMap['docker-install-binary'])
+    
+    distribution = ArtifactDistribution(self.coordinator,self.rootStackName,fanOut=ArtifactDistributionFanOut)
+    hosts = [host.private_dns_name for host in self.getClusterHosts()]
+    children, keys = distribution.publishTree(self.fqdn,hosts)
+    SSMParameterKeys.extend(keys)
+    
+    try:
+      self.artifactServer = ArtifactServer({dockerS3Path: DockerInstallBinaryPath},port=ArtifactServerPort)
+      self.artifactServer.start()
+      distribution.publishSource(self.artifactServer.getURL(self.fqdn),children)
+    except Exception as e:
+      TR.warning(methodName,"Not serving the Docker binary, the cluster nodes get it from S3: %s" % e)
+      if (self.artifactServer):
+        self.artifactServer.stop()
+        self.artifactServer = None
+      #endIf
+      distribution.publishNoSource(children)
+      return
+    #endTry
+    
+    TR.info(methodName,"Serving the Docker binary to %d of %d cluster nodes." % (len(children),len(hosts)))
+  #endDef
+  
+  
+  def installDocker(self, inventoryPath='/etc/ansible/hosts'):
     """
       Use an instance of the InstallDocker helper class to run an Ansible playbook
       to install docker on the boot node and all cluster member nodes.
@@ -1626,19 +2249,11 @@ class Bootstrap(object):
       
       Helper for installKubectl() and any other method that needs to get an image
       instance from the local docker registry.
+      
+      The rootName is looked up in the local image index by ID, tag, digest and repository 
+      name, e.g., icp-inception, before falling back to the first tag that contains it.
     """
-    result = None
-    
-    imageList = self.dockerClient.images.list()
-
-    for image in imageList:
-      imageNameTag = image.tags[0]
-      if (imageNameTag.find(rootName) >= 0):
-        result = image
-        break
-      #endIf
-    #endFor
-    return result
+    return self.imageIndex.getImage(rootName)
   #endDef
   
   
@@ -1771,7 +2386,7 @@ class Bootstrap(object):
       
       The primary use-case is that the deployer will provide a CA signed key and certificate in 
       an S3 bucket named in the ClusterPKIBucketName input parameter and located at the 
-      ClusterPKIRootPath in that bucket.  
+      ClusterPKIRootPath in that bucket.  See getInstallArtifact().
       
       If either of those two input parameters are empty, then self-signed certs are created and 
       used.  The CN of the self-signed cert will be the CN of the cluster.  See getClusterCN().
@@ -1779,25 +2394,17 @@ class Bootstrap(object):
     methodName = "configurePKI"
     
     if (self.ClusterPKIBucketName and self.ClusterPKIRootPath):
-      bucket = self.ClusterPKIBucketName
-      rootKey = self.ClusterPKIRootPath
       TR.info(methodName,"Using deployer provided PKI key and certificate for cluster: %s identity." % self.CN)
 
-      if (not os.path.exists(self.pkiDirectory)):
-        os.makedirs(self.pkiDirectory,0600)
-      #endIf
-    
-      keyFilePath = os.path.join(self.pkiDirectory, "%s.key" % self.pkiFileName)
-      TR.info(methodName,"Downloading PKI key from S3 bucket: %s with key: %s.key to file: %s" % (bucket,rootKey,keyFilePath))
-      with open(keyFilePath,'wb') as pkiKeyFile:
-        self.s3.download_fileobj(bucket,'%s.key' % rootKey, pkiKeyFile)
-      #endWith
-      
-      certFilePath = os.path.join(self.pkiDirectory, "%s.crt" % self.pkiFileName)
-      TR.info(methodName,"Downloading PKI certificate from S3 bucket: %s with key: %s.crt to file: %s" % (bucket,rootKey,certFilePath))
-      with open(certFilePath,'wb') as pkiCertFile:
-        self.s3.download_fileobj(bucket,'%s.crt' % rootKey, pkiCertFile)
-      #endWith
+      # The key and certificate are normally fetched by the fetchPKIKey and fetchPKICert phases.
+      for name in ['PKIKey','PKICert']:
+        artifact = self.getInstallArtifact(name)
+        if (os.path.exists(artifact['destPath'])):
+          TR.info(methodName,"Using %s file: %s" % (name,artifact['destPath']))
+        else:
+          self.fetchInstallArtifact(name)
+        #endIf
+      #endFor
       
     else:
       TR.info(methodName,"Using self-signed PKI key and certificate for cluster: %s identity." % self.CN)
@@ -1868,31 +2475,110 @@ class Bootstrap(object):
       The AWS CloudFormation template downlaods the ICP installation tar ball from
       an S3 bucket to /tmp/icp-install-archive.tgz of each cluster node.  It turns 
       out that download is very fast: typically 3 to 4 minutes.
+      
+      The ICP installation archive is a gzip compressed tar of docker save tar files.
+      The archive is decompressed to a work file and indexed, the docker save archives
+      in it included, and the images are loaded ImageLoadMaxWorkers at a time, each with
+      its own docker load request, see yapl.docker.IndexedImageLoader.  The images that 
+      are already present, e.g., on a rerun, are not loaded.  The load time of each image
+      is written to load-icp-images.json in the logs directory.
+      
+      If the archive can not be indexed, e.g., /tmp is full or it has some other layout,
+      the members of the archive are piped into docker load as they are decompressed.
+      The docker save tar files in the archive whose images are all present are left out.
     """
     methodName = "loadICPImages"
         
     TR.info(methodName,"STARTED Docker load of ICP installation images.")
     
-    retcode = call("tar -zxvf %s -O | docker load | tee /root/logs/load-icp-images.log" % imageArchivePath, shell=True)
+    loader = IndexedImageLoader(self.dockerClient,maxWorkers=ImageLoadMaxWorkers,timeline=self.timeline,imageIndex=self.imageIndex)
+    try:
+      results = loader.loadImages(imageArchivePath)
+    except InvalidArgumentException as e:
+      TR.info(methodName,"Indexed image load not possible, loading the archive with docker load: %s" % e)
+      results = None
+    #endTry
+    
+    if (results != None):
+      with open(os.path.join(self.logsHome,"load-icp-images.json"),'w') as reportFile:
+        json.dump(results,reportFile,indent=2)
+      #endWith
+      TR.info(methodName,"COMPLETED Docker load of %d ICP installation images." % len(results))
+      return
+    #endIf
+    
+    presentMembers, missingMembers = self.imageIndex.compareArchiveMembers(imageArchivePath)
+    if (missingMembers == []):
+      TR.info(methodName,"COMPLETED All ICP installation images are present, skipping the docker load.")
+      return
+    #endIf
+    
+    excludes = ''.join([" --exclude=%s" % pipes.quote(member) for member in sorted(presentMembers)])
+    retcode = call("tar -zxvf %s -O%s | docker load | tee /root/logs/load-icp-images.log" % (imageArchivePath,excludes), shell=True)
     if (retcode != 0):
-      raise ICPInstallationException("Error calling: 'tar -zxvf %s -O | docker load' - Return code: %s" % (imageArchivePath,retcode))
+      raise ICPInstallationException("Error calling: 'tar -zxvf %s -O%s | docker load' - Return code: %s" % (imageArchivePath,excludes,retcode))
     #endIf
+    self.imageIndex.invalidate()
     
     TR.info(methodName,"COMPLETED Docker load of ICP installation images.")  
     
   #endDef
   
-
-  def configureInception(self, installMap):
+  
+  def streamICPImages(self, installMap):
     """
-      Do the pre-installation steps of getting the inception meta-data from the inception image
-      and moving the files into place for hosts, ssh_key, and config.yaml
+      Load the IBM Cloud Private images into docker as the installation tar archive is 
+      downloaded from S3 with a pre-signed URL.
+      
+      The compressed archive is decompressed and the image tar files in it are sent to
+      the docker engine load API as they are read, so the first images are loaded long 
+      before the download completes.  The compressed bytes are written to the image
+      archive path as they are read because configureInception() moves the archive 
+      into the inception cluster/images directory.  The archive is written to a 
+      temporary file that is renamed when the load completes, so a failed load does
+      not leave a partial archive in the image archive path.
       
-      The installMap holds the name of the install image and the Docker inception image.
+      See yapl.docker.ImageArchiveLoader.
     """
-    methodName = "configureInception"
+    methodName = "streamICPImages"
     
-    TR.info(methodName,"IBM Cloud Private Inception configuration started.")
+    bucket = installMap['s3bucket']
+    s3Path = "{version}/{object}".format(version=installMap['version'],object=installMap['icp-base-install-archive'])
+    
+    TR.info(methodName,"STARTED streaming Docker load of ICP installation images from object: %s in bucket: %s" % (s3Path,bucket))
+    
+    s3url = self.s3.generate_presigned_url(ClientMethod='get_object',Params={'Bucket': bucket, 'Key': s3Path})
+    if (TR.isLoggable(Level.FINE)):
+      TR.fine(methodName,"Getting S3 object with pre-signed URL: %s" % s3url)
+    #endIf
+    
+    teePath = "%s.part" % self.imageArchivePath
+    loader = ImageArchiveLoader(self.dockerClient)
+    result = loader.loadFromURL(s3url,teePath=teePath,sha256=installMap.get('icp-base-install-archive-sha256'))
+    os.rename(teePath,self.imageArchivePath)
+    self.imageIndex.invalidate()
+    
+    TR.info(methodName,"Loaded %d images, first image loaded after %s seconds, total time: %.1f seconds." % 
+            (len(result['images']),
+             "%.1f" % result['timeToFirstImage'] if result['timeToFirstImage'] != None else "-",
+             result['wallTime']))
+    
+    TR.info(methodName,"COMPLETED streaming Docker load of ICP installation images.")
+  #endDef
+  
+
+  def extractInceptionCluster(self, installMap):
+    """
+      Get the inception meta-data, the cluster directory, from the inception image into icpHome.
+      
+      The cluster directory is copied out of the inception container into a staging directory
+      that is renamed to icpHome/cluster, so icpHome/cluster is either complete or missing.
+      If icpHome/cluster already exists it is not extracted again.  The extraction does not 
+      overwrite files, e.g., config.yaml, that configureInception() moved into place.
+      
+      The installMap holds the name of the Docker inception image.
+    """
+    methodName = "extractInceptionCluster"
     
     if (not installMap):
       raise MissingArgumentException("The installMap cannot be empty or None.")
@@ -1903,39 +2589,66 @@ class Bootstrap(object):
       raise ICPInstallationException("The installMap has no value for 'inception-image-name'")
     #endIf
     
-    imageTarBallName = installMap.get('icp-base-install-archive')
-    if (not imageTarBallName):
-      raise ICPInstallationException("The installMap has no value for 'icp-base-install-archive'")
+    clusterDirectory = os.path.join(self.icpHome,"cluster")
+    if (os.path.isdir(clusterDirectory)):
+      TR.info(methodName,"The ICP meta data has already been extracted to: %s" % clusterDirectory)
+      return
     #endIf
     
-    if (not os.path.exists(self.icpHome)):
-      os.makedirs(self.icpHome)
+    stagingDirectory = os.path.join(self.icpHome,".cluster-extract")
+    if (os.path.exists(stagingDirectory)):
+      shutil.rmtree(stagingDirectory)
     #endIf
+    os.makedirs(stagingDirectory)
     
     try:
       TR.info(methodName,"Extracting ICP meta data from the inception container to %s" % self.icpHome)
       
       if (TR.isLoggable(Level.FINER)):
-        TR.finer(methodName,"Invoking: docker run -v %s:/data -e LICENSE=accept %s cp -r cluster /data" % (self.icpHome,dockerImage))
+        TR.finer(methodName,"Invoking: docker run -v %s:/data -e LICENSE=accept %s cp -r cluster /data" % (stagingDirectory,dockerImage))
       #endIf
       
       self.dockerClient.containers.run(dockerImage, 
-                                       volumes={self.icpHome: {'bind': '/data', 'mode': 'rw'}}, 
+                                       volumes={stagingDirectory: {'bind': '/data', 'mode': 'rw'}}, 
                                        environment={'LICENSE': 'accept'},
                                        command="cp -r cluster /data")
       
     except Exception as e:
-      raise ICPInstallationException("ERROR invoking: 'docker run -v %s:/data -e LICENSE=accept %s cp -r cluster /data' - Exception: %s" % (self.icpHome,dockerImage,e))
+      raise ICPInstallationException("ERROR invoking: 'docker run -v %s:/data -e LICENSE=accept %s cp -r cluster /data' - Exception: %s" % (stagingDirectory,dockerImage,e))
     #endTry
     
-    # NOTE: The above docker command created the cluster directory in icpHome
+    os.rename(os.path.join(stagingDirectory,"cluster"),clusterDirectory)
+    os.rmdir(stagingDirectory)
+  #endDef
+  
+
+  def configureInception(self, installMap):
+    """
+      Do the pre-installation steps of moving the files into place for hosts, ssh_key, 
+      config.yaml and the ICP install archive in the cluster directory extracted from the
+      inception image by extractInceptionCluster().
+      
+      The installMap holds the name of the install image.
+    """
+    methodName = "configureInception"
+    
+    TR.info(methodName,"IBM Cloud Private Inception configuration started.")
+    
+    if (not installMap):
+      raise MissingArgumentException("The installMap cannot be empty or None.")
+    #endIf
+    
+    imageTarBallName = installMap.get('icp-base-install-archive')
+    if (not imageTarBallName):
+      raise ICPInstallationException("The installMap has no value for 'icp-base-install-archive'")
+    #endIf
+    
+    # NOTE: extractInceptionCluster() created the cluster directory in icpHome
     os.mkdir("%s/cluster/images" % self.icpHome)
     shutil.move("/tmp/icp-install-archive.tgz","%s/cluster/images/%s" % (self.icpHome,imageTarBallName))
     shutil.copyfile("/root/hosts", "%s/cluster/hosts" % self.icpHome)
     shutil.move("/root/config.yaml", "%s/cluster/config.yaml" % self.icpHome)
     shutil.copyfile("/root/.ssh/id_rsa", "%s/cluster/ssh_key" % self.icpHome)
-    
-    self.configurePKI()
         
     TR.info(methodName,"IBM Cloud Private Inception configuration completed.")    
   #endDef
@@ -1957,7 +2670,9 @@ class Bootstrap(object):
       from the Docker SDK for Python?
       
       The only thing that works is: docker load -i /tmp/icp-inception-fixpack.tar
-    
+      
+      If the manifest of the fixpack archive can be read and all of its images are
+      already present, the load is skipped.
     """
     methodName = "loadInceptionFixpackImages"
     
@@ -1965,11 +2680,17 @@ class Bootstrap(object):
       raise ICPInstallationException("Inception fixpack archive (.tar) file does not exist at: %s" % self.inceptionFixpackArchivePath)
     #endIf
     
+    if (self.imageIndex.imagesPresent(self.inceptionFixpackArchivePath)):
+      TR.info(methodName,"All inception fixpack images are present, skipping the docker load.")
+      return
+    #endIf
+    
     TR.info(methodName,"STARTED Docker load of inception fixpack images.")
     retcode = call("docker load -i /tmp/icp-inception-fixpack.tar | tee /root/logs/load-icp-inception-fixpack.log", shell=True)
     if (retcode != 0):
       raise ICPInstallationException("Error calling: 'docker load -i /tmp/icp-inception-fixpack.tar' - Return code: %s" % retcode)
     #endIf
+    self.imageIndex.invalidate()
     TR.info(methodName,"COMPLETED Docker load of inception fixpack images.")
     
   #endDef
@@ -2327,6 +3048,285 @@ class Bootstrap(object):
   #endDef
   
   
+  def getBootstrapPhases(self):
+    """
+      Return the list of phases of the bootstrap process for the PhaseScheduler.
+      
+      Each phase names the phases it depends on.  Phases that do not depend on each other
+      run concurrently, e.g., the downloads of the install artifacts overlap each other, the SSH 
+      configuration and the wait for the cluster nodes to be ready and the config.yaml file
+      is created while docker is being installed.  The PKI key and certificate go in the
+      cluster directory extracted from the inception image, so the PKI phases run after the
+      extractInceptionCluster phase, as they ran after the extraction before the phases.
+      
+      The installMap is an output of the loadInstallMap phase and an input to the phases
+      that use it.
+      
+      The phases are recorded in the phase journal.  With --resume, the phases that completed 
+      in a previous run are skipped.  The isValid and restore hooks of a phase check that the 
+      results of the previous run are still in place and restore the state the phase set up.
+      The configureInception phase moves files into place so it is not idempotent.  Its 
+      invalidate hook puts the files back before it is run again.
+    """
+    
+    phases = []
+    
+    phases.append(Phase('createICPHostsFile',self.createICPHostsFile))
+    phases.append(Phase('createAnsibleHostsFile',self.createAnsibleHostsFile))
+    
+    if (self.securityPath):
+      phases.append(Phase('configureSecurity',self._configureSecurityPhase))
+    #endIf
+    
+    phases.append(Phase('configureSSH',self.configureSSH))
+    phases.append(Phase('addBootNodeSSHKeys',self.addBootNodeSSHKeys,dependsOn=['configureSSH']))
+    
+    phases.append(Phase('loadInstallMap',self._loadInstallMapPhase,outputs=['installMap'],
+                        restore=self._restoreInstallMap))
+    # Each install artifact is fetched by its own phase, e.g., fetchDockerBinary, so the 
+    # downloads run at the same time and a phase waits only for the artifacts it uses.
+    # With streamImages the ICP install archive is downloaded by the loadICPImages phase.
+    artifactNames = self.getInstallArtifactNames()
+    # The PKI key and certificate go in the cluster directory of the inception image, so they 
+    # are fetched once the cluster directory has been extracted.
+    for name in artifactNames:
+      dependsOn = ['extractInceptionCluster'] if name in ('PKIKey','PKICert') else None
+      phases.append(Phase('fetch%s' % name,
+                          lambda installMap, name=name: self.fetchInstallArtifact(name,installMap),
+                          inputs=['installMap'],dependsOn=dependsOn,
+                          isValid=lambda outputs, name=name: self._installArtifactPresent(name)))
+    #endFor
+
+    # The artifact server only lives as long as this process, so the phase runs again on a resume.
+    # The cluster nodes only get the Docker binary, so the serving does not wait for the ICP archive.
+    if (self.peerDistribution):
+      phases.append(Phase('serveInstallImages',self.serveInstallImages,inputs=['installMap'],
+                          dependsOn=['fetchDockerBinary'],isValid=lambda outputs: False))
+    #endIf
+
+    # Wait for cluster nodes to be ready for the installation to proceed.
+    # Waiting to make sure all cluster nodes have added the boot node
+    # SSH public key to their SSH authorized_keys file.
+    phases.append(Phase('syncClusterNodesReady',lambda: self.syncWithClusterNodes(desiredState='READY'),
+                        dependsOn=['configureSSH']))
+    phases.append(Phase('sshKeyScan',self._sshKeyScanPhase,dependsOn=['syncClusterNodesReady']))
+    
+    # set vm.max_map_count on all cluster members
+    phases.append(Phase('setVMMaxMapCount',
+                        lambda: self._runPlaybookPhase("set-vm-max-mapcount"),
+                        dependsOn=['sshKeyScan','createAnsibleHostsFile']))
+    
+    phases.append(Phase('installDocker',
+                        lambda: self._runPlaybookPhase("install-docker"),
+                        dependsOn=['sshKeyScan','createAnsibleHostsFile','fetchDockerBinary']))
+    
+    # Notify all cluster nodes that docker installation has completed.
+    phases.append(Phase('publishDockerInstalled',
+                        lambda: self.putSSMParameter("/%s/docker-installation" % self.rootStackName,"COMPLETED",description="Docker installation status."),
+                        dependsOn=['installDocker']))
+
+    # Create the config.yaml file for the inception install
+    phases.append(Phase('createConfigFile',self.createConfigFile))
+    
+    if (self.streamImages):
+      phases.append(Phase('loadICPImages',self.streamICPImages,inputs=['installMap'],
+                          dependsOn=['installDocker']))
+    else:
+      phases.append(Phase('loadICPImages',lambda: self.loadICPImages(self.imageArchivePath),
+                          dependsOn=['installDocker','fetchICPArchive']))
+    #endIf
+    
+    # The inception image is in the ICP install archive so the cluster directory is extracted 
+    # once the ICP images are loaded.
+    phases.append(Phase('extractInceptionCluster',self.extractInceptionCluster,inputs=['installMap'],
+                        dependsOn=['loadICPImages'],
+                        isValid=lambda outputs: os.path.isdir(os.path.join(self.icpHome,"cluster"))))
+    
+    if ('PKIKey' in artifactNames):
+      phases.append(Phase('configurePKI',self.configurePKI,dependsOn=['extractInceptionCluster','fetchPKIKey','fetchPKICert']))
+    else:
+      phases.append(Phase('configurePKI',self.configurePKI,dependsOn=['extractInceptionCluster']))
+    #endIf
+    
+    phases.append(Phase('configureInception',self.configureInception,inputs=['installMap'],
+                        dependsOn=['extractInceptionCluster','createConfigFile','createICPHostsFile','configureSSH','configurePKI'],
+                        idempotent=False,invalidate=self._invalidateInception,
+                        isValid=lambda outputs: os.path.exists(os.path.join(self.icpHome,"cluster","config.yaml"))))
+
+    # Wait for notification from all nodes that the local ICP image load has completed.
+    phases.append(Phase('syncClusterNodesImagesLoaded',lambda: self.syncWithClusterNodes(desiredState='READY'),
+                        dependsOn=['publishDockerInstalled']))
+    
+    installDependencies = ['configureInception','syncClusterNodesImagesLoaded','setVMMaxMapCount','addBootNodeSSHKeys']
+    if (self.securityPath):
+      installDependencies.append('configureSecurity')
+    #endIf
+    
+    if (self.preInstallPath):
+      phases.append(Phase('processPreInstall',lambda: self.processPreInstall(self.preInstallPath),
+                          dependsOn=installDependencies))
+      installDependencies = ['processPreInstall']
+    #endIf
+    
+    phases.append(Phase('installICP',self.installICP,inputs=['installMap'],dependsOn=installDependencies))
+
+    # Install kubectl includes configuration of a permanent login context so this
+    # needs to happen after the installation of ICP to get configuration artifacts.
+    phases.append(Phase('installKubectl',self.installKubectl,dependsOn=['installICP']))
+    
+    # Configuring EFS and the EFS provisioner needs to happen after kubectl is configured. 
+    phases.append(Phase('configureEFS',self.configureEFS,dependsOn=['installKubectl']))
+    
+    # Install of Cloudctl needs to happen after ICP is installed and running. 
+    phases.append(Phase('installCloudctl',self.installCloudctl,dependsOn=['installICP']))
+    
+    phases.append(Phase('getClusterCACert',self._getClusterCACertPhase,dependsOn=['installICP'],
+                        outputs=['clusterCertPath'],restore=self._restoreClusterCACert,
+                        isValid=lambda outputs: os.path.exists(outputs.get('clusterCertPath',""))))
+    
+    # Install and configure Helm
+    phases.append(Phase('installHelm',self.installHelm,dependsOn=['installKubectl','getClusterCACert']))
+    
+    postInstallDependencies = ['installHelm','configureEFS','installCloudctl']
+    if (self.postInstallPath):
+      phases.append(Phase('processPostInstall',lambda: self.processPostInstall(self.postInstallPath),
+                          dependsOn=postInstallDependencies))
+      postInstallDependencies = ['processPostInstall']
+    #endIf
+    
+    # Run all the commands in the commandsets directory
+    if (self.commandSetsPath):
+      phases.append(Phase('processCommandSets',lambda: self.processCommandSets(self.commandSetsPath),
+                          dependsOn=postInstallDependencies))
+    #endIf
+    
+    return phases
+  #endDef
+  
+  
+  def _configureSecurityPhase(self):
+    """
+      Configure the security artifacts defined in the security configuration.
+    """
+    securityHelper = SecurityHelper(stackId=self.SecurityStackId, intrinsicVariables=IntrinsicVariables)
+    securityHelper.configureSecurity(configPath=self.securityPath)
+  #endDef
+  
+  
+  def _loadInstallMapPhase(self):
+    """
+      Load the install map for the ICP version being installed. 
+      
+      Returns a dictionary with the installMap output of the loadInstallMap phase.
+    """
+    installMapPath = os.path.join(self.home,"maps","icp-install-artifact-map.yaml")
+    self.installMap = self.loadInstallMap(mapPath=installMapPath, version=self.ICPVersion, region=self.region)
+    return {'installMap': self.installMap}
+  #endDef
+  
+  
+  def _restoreInstallMap(self, outputs):
+    """
+      Restore the installMap from the outputs of a loadInstallMap phase in the phase journal.
+    """
+    self.installMap = outputs.get('installMap')
+  #endDef
+  
+  
+  def _installArtifactPresent(self, name):
+    """
+      Return True if the install artifact with the given name fetched by fetchInstallArtifact()
+      is still in place.
+      
+      The ICP install archive is either in /tmp or it has been moved into the inception 
+      cluster/images directory by configureInception().
+    """
+    artifact = self.getInstallArtifact(name,self.installMap)
+    if (os.path.exists(artifact['destPath'])):
+      return True
+    #endIf
+    
+    if (name == 'ICPArchive'):
+      imageTarBallName = self.installMap.get('icp-base-install-archive')
+      return os.path.exists(os.path.join(self.icpHome,"cluster","images",imageTarBallName))
+    #endIf
+    return False
+  #endDef
+  
+  
+  def _invalidateInception(self):
+    """
+      Undo the file moves of an earlier run of configureInception() so that it can be run again.
+      
+      The ICP install archive is moved back to /tmp, the config.yaml file is moved back to
+      the home directory and the cluster/images directory is removed.
+    """
+    methodName = "_invalidateInception"
+    
+    imagesDirectory = os.path.join(self.icpHome,"cluster","images")
+    imageTarBallName = self.installMap.get('icp-base-install-archive')
+    archivePath = os.path.join(imagesDirectory,imageTarBallName)
+    if (os.path.exists(archivePath) and not os.path.exists(self.imageArchivePath)):
+      TR.info(methodName,"Moving: %s back to: %s" % (archivePath,self.imageArchivePath))
+      shutil.move(archivePath,self.imageArchivePath)
+    #endIf
+    
+    configPath = os.path.join(self.icpHome,"cluster","config.yaml")
+    homeConfigPath = os.path.join(self.home,"config.yaml")
+    if (os.path.exists(configPath) and not os.path.exists(homeConfigPath)):
+      TR.info(methodName,"Moving: %s back to: %s" % (configPath,homeConfigPath))
+      shutil.move(configPath,homeConfigPath)
+    #endIf
+    
+    if (os.path.exists(imagesDirectory)):
+      shutil.rmtree(imagesDirectory)
+    #endIf
+  #endDef
+  
+  
+  def _sshKeyScanPhase(self):
+    """
+      Add the cluster node host keys to the boot node known_hosts file.
+    """
+    self.createSSHKeyScanHostsFile()
+    self.sshKeyScan()
+  #endDef
+  
+  
+  def _runPlaybookPhase(self, playbookName):
+    """
+      Run the given playbook from the playbooks directory on all cluster nodes.
+      
+      The playbook log file has the same name as the playbook in the logs directory.
+    """
+    playbookPath = os.path.join(self.home,"playbooks","%s.yaml" % playbookName)
+    logFilePath = os.path.join(self.logsHome,"%s.log" % playbookName)
+    self.runAnsiblePlaybook(playbookPath=playbookPath,targetNodes="all",logFilePath=logFilePath)
+  #endDef
+  
+  
+  def _getClusterCACertPhase(self):
+    """
+      Get the cluster CA certificate and make its path available as an intrinsic variable.
+      
+      Returns a dictionary with the clusterCertPath output of the getClusterCACert phase.
+    """
+    clusterCertPath = os.path.join(self.home,"cluster-ca.crt")
+    self.getClusterCACert(clusterCertPath,self.ClusterDNSName)
+    IntrinsicVariables['ClusterCertPath'] = clusterCertPath
+    return {'clusterCertPath': clusterCertPath}
+  #endDef
+  
+  
+  def _restoreClusterCACert(self, outputs):
+    """
+      Restore the ClusterCertPath intrinsic variable from the outputs of a getClusterCACert
+      phase in the phase journal.
+    """
+    IntrinsicVariables['ClusterCertPath'] = outputs.get('clusterCertPath')
+  #endDef
+  
+  
   def main(self,argv):
     """
       Main does command line argument processing, sets up trace and then kicks off the methods to
@@ -2385,9 +3385,67 @@ class Bootstrap(object):
       
       self.role = role
       TR.info(methodName,"Node role: %s" % role)
-            
+      
+      # With --reuse-discovery a valid discovery snapshot from a previous run is used.
+      if (cmdLineArgs.get('reuse-discovery')):
+        self.reuseDiscovery = True
+        TR.info(methodName,"Reusing the discovery snapshot: %s, if it is valid." % self.discoverySnapshotPath)
+      #endIf
+      
+      coordinationBackend = cmdLineArgs.get('coordination-backend')
+      if (coordinationBackend):
+        self.coordinationBackend = coordinationBackend
+      #endIf
+      self.coordinationPath = cmdLineArgs.get('coordination-path')
+      
+      self.artifactCacheDirectory = cmdLineArgs.get('artifact-cache')
+      if (self.artifactCacheDirectory):
+        TR.info(methodName,"Artifact cache directory: %s" % self.artifactCacheDirectory)
+      #endIf
+      
+      # With --log-compression gzip or zstd the logs are compressed as they are exported.
+      self.logCompression = cmdLineArgs.get('log-compression')
+      if (self.logCompression):
+        TR.info(methodName,"Log compression: %s" % self.logCompression)
+      #endIf
+      
+      # With --incremental-log-export a log export skips the logs that did not change since the previous export.
+      if (cmdLineArgs.get('incremental-log-export')):
+        self.incrementalLogExport = True
+        TR.info(methodName,"Incremental log export, the export manifest is kept in the logs directory.")
+      #endIf
+      
+      # With --ship-logs <seconds> the new content of the logs is exported every <seconds> while the bootstrap runs.
+      logShipInterval = cmdLineArgs.get('ship-logs')
+      if (logShipInterval):
+        self.logShipInterval = int(logShipInterval)
+        self.incrementalLogExport = True
+        TR.info(methodName,"Shipping the logs every %d seconds." % self.logShipInterval)
+      #endIf
+      TR.info(methodName,"Coordination backend: %s" % self.coordinationBackend)
+      
+      # With --resume the phases that completed in a previous run are skipped.
+      if (cmdLineArgs.get('resume')):
+        self.resume = True
+        TR.info(methodName,"Resuming from the phase journal: %s, if it exists." % self.phaseJournalPath)
+      #endIf
+      
+      # With --peer-distribution the cluster nodes get the install images from the boot node.
+      if (cmdLineArgs.get('peer-distribution')):
+        self.peerDistribution = True
+        TR.info(methodName,"The install images are served to the cluster nodes on port: %d" % ArtifactServerPort)
+      #endIf
+      
+      # With --stream-images the ICP images are loaded as the install archive is downloaded.
+      if (cmdLineArgs.get('stream-images')):
+        self.streamImages = True
+        TR.info(methodName,"The ICP images are loaded into docker as the install archive is downloaded.")
+      #endIf
+      
       # Finish off the initialization of the bootstrap class instance
-      self.__init(rootStackName,bootStackId)
+      with self.timeline.span('init'):
+        self.__init(rootStackName,bootStackId)
+      #endWith
       
       # Using Route53 DNS server rather than /etc/hosts
       # WARNING - Discovered the hard way that the installation overwrites the /etc/hosts file
@@ -2395,17 +3453,6 @@ class Bootstrap(object):
       #self.createEtcHostsFile()
       #self.propagateEtcHostsFile()
       
-      self.createICPHostsFile()
-      self.createAnsibleHostsFile()
-
-      if (self.securityPath):
-        securityHelper = SecurityHelper(stackId=self.SecurityStackId, intrinsicVariables=IntrinsicVariables)
-        securityHelper.configureSecurity(configPath=self.securityPath)
-      #endIf
-            
-      self.configureSSH()
-      self.addBootNodeSSHKeys()
- 
       # Turn off source/dest check on all cluster EC2 instances
       # (TBD) - I'm not convinced disabling the source/dest check is necessary
       # (PVS 31-DEC-2018:
@@ -2414,77 +3461,14 @@ class Bootstrap(object):
       # PVS 25-JAN-2019: Haven't seen any problems. Disabling source/dest check is not needed.
       #self._disableSourceDestCheck()    
 
-      installMapPath = os.path.join(self.home,"maps","icp-install-artifact-map.yaml")
-     
-      self.installMap = self.loadInstallMap(mapPath=installMapPath, version=self.ICPVersion, region=self.region)
-      self.getInstallImages(self.installMap)
-      
-      # Wait for cluster nodes to be ready for the installation to proceed.
-      # Waiting to make sure all cluster nodes have added the boot node
-      # SSH public key to their SSH authorized_keys file.
-      self.syncWithClusterNodes(desiredState='READY')
-      
-      self.createSSHKeyScanHostsFile()
-      self.sshKeyScan()
-      
       # Add Route53 DNS aliases for the proxy ELB
       # TODO: Leave this commented out until we figure out how to delete the entry when the stack is deleted.
       #self.addRoute53Aliases(self.ApplicationDomains, self.ProxyNodeLoadBalancerName, self.ProxyELBHostedZoneID)
       
-      # set vm.max_map_count on all cluster members
-      setMaxMapCountPlaybookPath = os.path.join(self.home,"playbooks", "set-vm-max-mapcount.yaml")
-      logFilePath = os.path.join(self.logsHome,"set-vm-max-mapcount.log")
-      self.runAnsiblePlaybook(playbookPath=setMaxMapCountPlaybookPath,targetNodes="all",logFilePath=logFilePath)
-      
-      installDockerPlaybookPath = os.path.join(self.home,"playbooks", "install-docker.yaml")
-      logFilePath = os.path.join(self.logsHome,"install-docker.log")
-      self.runAnsiblePlaybook(playbookPath=installDockerPlaybookPath,targetNodes="all",logFilePath=logFilePath)
-      
-      # Notify all cluster nodes that docker installation has completed.
-      # Cluster nodes will proceed with loading ICP installation images locally from the ICP install archive. 
-      self.putSSMParameter("/%s/docker-installation" % self.rootStackName,"COMPLETED",description="Docker installation status.")
-
-      # Create the config.yaml file for the inception install
-      self.createConfigFile()
-      
-      self.loadICPImages(self.imageArchivePath)
-
-      self.configureInception(self.installMap)
-
-      # Wait for notification from all nodes that the local ICP image load has completed.
-      self.syncWithClusterNodes(desiredState='READY')
-      
-      if (self.preInstallPath):
-        self.processPreInstall(self.preInstallPath)
-      #endIf
-            
-      self.installICP(self.installMap) 
-
-      # Install kubectl includes configuration of a permanent login context so this
-      # needs to happen after the installation of ICP to get configuration artifacts.
-      self.installKubectl()
-      
-      # Configuring EFS and the EFS provisioner needs to happen after kubectl is configured. 
-      self.configureEFS()
-      
-      # Install of Cloudctl needs to happen after ICP is installed and running. 
-      self.installCloudctl()
-      
-      clusterCertPath = os.path.join(self.home,"cluster-ca.crt")
-      self.getClusterCACert(clusterCertPath,self.ClusterDNSName)
-      IntrinsicVariables['ClusterCertPath'] = clusterCertPath
-      
-      # Install and configure Helm
-      self.installHelm()
-      
-      if (self.postInstallPath):
-        self.processPostInstall(self.postInstallPath)
-      #endIf
-      
-      # Run all the commands in the commandsets directory
-      if (self.commandSetsPath):
-        self.processCommandSets(self.commandSetsPath)
-      #endIf
+      journal = PhaseJournal(self.phaseJournalPath,bootStackId)
+      scheduler = PhaseScheduler(self.getBootstrapPhases(),maxWorkers=BootstrapPhaseMaxWorkers,
+                                 journal=journal,resume=self.resume,timeline=self.timeline)
+      scheduler.run()
     
     except ExitException:
       pass # ExitException is used as a "goto" end of program after emitting help info
@@ -2499,11 +3483,23 @@ class Bootstrap(object):
 
     finally:
       
+      # Stop the shipper before the final export, the final export exports what it did not ship.
+      if (self.logShipper):
+        self.logShipper.stop(LogShipperStopTimeout)
+      #endIf
+      
+      if (self.artifactServer):
+        self.artifactServer.stop()
+      #endIf
+      
       try:
         self._deleteSSMParameters()
       
         # Copy icpHome/logs to the S3 bucket for logs.
-        self.logExporter.exportLogs("%s/cluster/logs" % self.icpHome)
+        report = self.logExporter.exportLogs("%s/cluster/logs" % self.icpHome)
+        if ([result for result in report if result['error']]):
+          self.rc = 1
+        #endIf
       except Exception, e:
         TR.error(methodName,"ERROR: %s" % e, e)
         self.rc = 1
@@ -2521,9 +3517,26 @@ class Bootstrap(object):
         TR.info(methodName,"BOOT0104I FAILED END Boostrap AWS ICP Quickstart.  Elapsed time (hh:mm:ss): %d:%02d:%02d" % (eth,etm,ets))
       #endIf
       
+      try:
+        # The timeline files are written to the logs directory so they get exported with the logs.
+        self.timeline.write(self.logsHome)
+      except Exception, e:
+        TR.warning(methodName,"Failed to write the timeline to: %s, Exception: %s" % (self.logsHome,e))
+      #endTry
+      
+      try:
+        # The summary of each download, bytes, seconds, MB/s and retries, goes with the logs too.
+        DeploymentTransfers.write(self.logsHome,'bootstrap')
+      except Exception, e:
+        TR.warning(methodName,"Failed to write the transfer metrics to: %s, Exception: %s" % (self.logsHome,e))
+      #endTry
+      
       try:
         # Copy the bootstrap logs to the S3 bucket for logs.
-        self.logExporter.exportLogs(self.logsHome)
+        report = self.logExporter.exportLogs(self.logsHome)
+        if ([result for result in report if result['error']]):
+          self.rc = 1
+        #endIf
       except Exception, e:
         TR.error(methodName,"ERROR: %s" % e, e)
         self.rc = 1
@@ -27,7 +27,16 @@ import docker
 import requests
 import yaml
 from yapl.utilities.Trace import Trace, Level
+from yapl.utilities.Timeline import Timeline
 import yapl.utilities.Utilities as Utilities
+from yapl.utilities.RangedDownloader import RangedDownloader
+from yapl.utilities.TransferProgress import TransferProgress, DeploymentTransfers
+from yapl.utilities.ArtifactCache import ArtifactCache
+from yapl.aws.LogExporter import LogExporter
+from yapl.aws.LogExporter import LogShipper
+from yapl.coordination.CoordinatorFactory import createCoordinator
+from yapl.distribution.ArtifactServer import ArtifactServer
+from yapl.distribution.ArtifactDistribution import ArtifactDistribution
 from yapl.exceptions.Exceptions import ExitException
 from yapl.exceptions.Exceptions import MissingArgumentException
 from yapl.exceptions.ICPExceptions import ICPInstallationException
@@ -35,8 +44,27 @@ from yapl.exceptions.AWSExceptions import AWSStackResourceException
 
 GetParameterSleepTime = 60 # seconds
 GetParameterMaxTryCount = 100
+GetParameterMinSleepTime = 5 # seconds, the wait for a parameter backs off to GetParameterSleepTime
 HelpFile = "nodeinit.txt"
 
+# Byte range size and number of connections of the download of the installation images.
+DownloadChunkSize = 64 * 1024 * 1024
+DownloadMaxConnections = 8
+
+# Seconds between the progress reports of a download.
+TransferProgressInterval = 10
+
+# Seconds to wait for a log shipment in progress to complete before the final log export.
+LogShipperStopTimeout = 300
+
+# Size cap in bytes of the artifact cache of downloaded install images.
+ArtifactCacheMaxSize = 40 * 1024 * 1024 * 1024
+
+# Port of the artifact servers, the same port the boot node uses, and the time in seconds
+# a node waits for its artifact source before it gets the install images from S3.
+ArtifactServerPort = 8089
+ArtifactSourceTimeout = 1800
+
 TR = Trace(__name__)
 
 """
@@ -76,7 +104,14 @@ class NodeInit(object):
                     '--role':       'string',
                     '--logfile':    'string',
                     '--loglevel':   'string',
-                    '--trace':      'string'
+                    '--trace':      'string',
+                    '--coordination-backend': 'string',
+                    '--coordination-path':    'string',
+                    '--peer-distribution':    'switch',
+                    '--artifact-cache':       'string',
+                    '--log-compression':      'string',
+                    '--incremental-log-export': 'switch',
+                    '--ship-logs':            'string'
                    }
 
 
@@ -94,6 +129,34 @@ class NodeInit(object):
     self.sshHome = "%s/.ssh" % self.home
     self.fqdn = socket.getfqdn()
     self.rc = 0
+    self.logExporter = None
+    
+    # The coordination with the boot node uses SSM parameters unless some other backend is configured.
+    self.coordinationBackend = 'ssm'
+    self.coordinationPath = None
+    self.coordinator = None
+    
+    # With --artifact-cache downloaded install images are kept in the artifact cache, the same cache bootstrap 
+    # uses, so one AMI serves both.  The cache is off by default, it costs a HEAD of each object.
+    self.artifactCacheDirectory = None
+    self.artifactCache = None
+    
+    # When peerDistribution is True the install images are gotten from the artifact distribution tree.
+    self.peerDistribution = False
+    
+    # The exported logs are compressed with gzip or zstd if a log compression is given.
+    self.logCompression = None
+    
+    # When incrementalLogExport is True only the logs, and the parts of logs, that changed since the previous export are exported.
+    self.incrementalLogExport = False
+    
+    # When logShipInterval is set the logs are exported by a LogShipper every logShipInterval seconds.
+    self.logShipInterval = None
+    self.logShipper = None
+    self.artifactServer = None
+    
+    # Timing spans of the node initialization phases, written to the logs directory at the end of main().
+    self.timeline = Timeline('nodeinit')
   #endDef
 
 
@@ -143,10 +206,18 @@ class NodeInit(object):
 
     # Use belt and suspenders to nail down the region.
     boto3.setup_default_session(region_name=self.region)
-    self.ssm = boto3.client('ssm', region_name=self.region)
     self.s3  = boto3.client('s3', region_name=self.region)
+    if (self.artifactCacheDirectory):
+      self.artifactCache = ArtifactCache(self.artifactCacheDirectory,maxSize=ArtifactCacheMaxSize)
+    #endIf
     self.cfnClient = boto3.client('cloudformation', region_name=self.region)
     self.cfnResource = boto3.resource('cloudformation')    
+    self.coordinator = createCoordinator(self.coordinationBackend,
+                                         region=self.region,
+                                         path=self.coordinationPath,
+                                         minSleepTime=GetParameterMinSleepTime,
+                                         maxSleepTime=GetParameterSleepTime,
+                                         timeout=GetParameterMaxTryCount*GetParameterSleepTime)
     
     StackParameters = self._getStackParameters(stackId)
     StackParameterNames = StackParameters.keys()
@@ -155,6 +226,22 @@ class NodeInit(object):
       TR.finest(methodName,"StackParameterNames: %s" % StackParameterNames)
     #endIf
     
+    # NOTE: The stackName is the root stack name, the same key prefix the boot node uses.
+    self.logExporter = LogExporter(region=self.region,
+                                   bucket=self.ICPDeploymentLogsBucketName,
+                                   keyPrefix='logs/%s' % self.stackName,
+                                   role=self.role,
+                                   fqdn=self.fqdn,
+                                   compression=self.logCompression,
+                                   incremental=self.incrementalLogExport
+                                   )
+
+    # The live logs are shipped to the S3 bucket for logs while the deployment runs.
+    if (self.logShipInterval):
+      self.logShipper = LogShipper(self.logExporter,[self.logsHome],interval=self.logShipInterval)
+      self.logShipper.start()
+    #endIf
+    
     # On the cluster nodes the default timeout is sufficient.
     self.dockerClient = docker.from_env()
             
@@ -346,81 +433,23 @@ class NodeInit(object):
     """
       Return the value from the given SSM parameter key.
       
-      If an expectedValue is provided, then the wait loop for the SSM get_parameter()
-      will continue until the expected value is seen or the try count is exceeded.
+      If an expectedValue is provided, then the wait continues until the expected value 
+      is seen, otherwise until the parameter exists.  The wait is done by the cluster 
+      coordinator so the parameter is read from the configured coordination backend.
+      A CoordinationTimeoutException is raised if the wait times out.
       
-      NOTE: It is possible that the parameter is not  present in the SSM parameter
-      cache when this method is invoked.   When that happens a ParameterNotFound 
-      exception is raised by ssm.get_parameter().  Depending on the trace level,
-      that  exception is reported in the log, but ignored.
+      NOTE: It is possible that the parameter is not present when this method is invoked.
+      That is not an error, the coordinator keeps waiting for it.
     """
     methodName = "getSSMParameterValue"
     
-    parameterValue = None
-
-    tryCount = 1
-    gotit = False
-    while (not gotit and tryCount <= GetParameterMaxTryCount):
-      if (expectedValue == None):
-        TR.info(methodName,"Try: %d for getting parameter: %s" % (tryCount,parameterKey))
-      else:
-        TR.info(methodName,"Try: %d for getting parameter: %s with expected value: %s" % (tryCount,parameterKey,expectedValue))
-      #endIf
-      try: 
-        response = self.ssm.get_parameter(Name=parameterKey)
-        
-        if (not response):
-          if (TR.isLoggable(Level.FINEST)):
-            TR.finest(methodName, "Failed to get a response for SSM get_parameter(): %s" % parameterKey)
-          #endIf
-        else:
-          if (TR.isLoggable(Level.FINEST)):
-            TR.finest(methodName,"Response: %s" % response)
-          #endIf
-        
-          parameter = response.get('Parameter')
-          if (not parameter):
-            raise Exception("SSM get_parameter() response returned an empty Parameter.")
-          #endIf
-          
-          parameterValue = parameter.get('Value')
-          if (expectedValue == None):
-            gotit = True
-            break
-          else:
-            if (parameterValue == expectedValue):
-              gotit = True
-              break
-            else:
-              if (TR.isLoggable(Level.FINER)):
-                TR.finer(methodName,"For key: %s ignoring value: %s waiting on value: %s" % (parameterKey,parameterValue,expectedValue))
-              #endIf
-            #endIf
-          #endIf
-        #endIf
-      except ClientError as e:
-        etext = "%s" % e
-        if (etext.find('ParameterNotFound') >= 0):
-          if (TR.isLoggable(Level.FINEST)):
-            TR.finest(methodName,"Ignoring ParameterNotFound ClientError on ssm.get_parameter() invocation")
-          #endIf
-        else:
-          raise ICPInstallationException("Unexpected ClientError on ssm.get_parameter() invocation: %s" % etext)
-        #endIf
-      #endTry
-      time.sleep(GetParameterSleepTime)
-      tryCount += 1
-    #endWhile
-    
-    if (not gotit):
-      if (expectedValue == None):
-        raise ICPInstallationException("Failed to get parameter: %s " % parameterKey)
-      else:
-        raise ICPInstallationException("Failed to get parameter: %s with expected value: %s" % (parameterKey,expectedValue))
-      #endIf
+    if (expectedValue == None):
+      TR.info(methodName,"Waiting for parameter: %s" % parameterKey)
+    else:
+      TR.info(methodName,"Waiting for parameter: %s with expected value: %s" % (parameterKey,expectedValue))
     #endIf
-      
-    return parameterValue
+    
+    return self.coordinator.waitForValue(parameterKey,expectedValue=expectedValue)
   #endDef
  
     
@@ -432,54 +461,23 @@ class NodeInit(object):
       authorized_keys file.
       
       NOTE: It is possible that the a given cluster node may be checking for the authorized
-      key from the boot node, before the boot node has published it in its parameter.  When
-      that happens a ParameterNotFound exception is raised by ssm.get_parameter().  That 
-      exception is reported in the log, but ignored.
+      key from the boot node, before the boot node has published it.  The wait for the key
+      continues until the boot node publishes it.
     """
     methodName = "getBootNodePublicKey"
     
-    authorizedKeyEntry = ""
     parameterKey = "/%s/boot-public-key" % self.stackName
-    tryCount = 1
-    response = None
-    
-    while not response and tryCount <= 100:
-      time.sleep(GetParameterSleepTime)
-      TR.info(methodName,"Try: %d for getting parameter: %s" % (tryCount,parameterKey))
-      try: 
-        response = self.ssm.get_parameter(Name=parameterKey)
-      except ClientError as e:
-        etext = "%s" % e
-        if (etext.find('ParameterNotFound') >= 0):
-          if (TR.isLoggable(Level.FINEST)):
-            TR.finest(methodName,"Ignoring ParameterNotFound ClientError on ssm.get_parameter() invocation")
-          #endIf
-        else:
-          raise ICPInstallationException("Unexpected ClientError on ssm.get_parameter() invocation: %s" % etext)
-        #endIf
-      #endTry
-      tryCount += 1
-    #endWhile
+    authorizedKeyEntry = self.getSSMParameterValue(parameterKey)
     
-    if (response and TR.isLoggable(Level.FINEST)):
-      TR.finest(methodName,"Response: %s" % response)
-    #endIf
-    
-    if (not response):
-      TR.warning(methodName, "Failed to get a response for get_parameter: %s" % parameterKey)
-    else:
-      parameter = response.get('Parameter')
-      if (not parameter):
-        raise Exception("get_parameter response returned an empty Parameter.")
-      #endIf
-      authorizedKeyEntry = parameter.get('Value')
+    if (TR.isLoggable(Level.FINEST)):
+      TR.finest(methodName,"Authorized key entry: %s" % authorizedKeyEntry)
     #endIf
     
     return authorizedKeyEntry
   #endDef
  
  
-  def getS3Object(self, bucket=None, s3Path=None, destPath=None):
+  def getS3Object(self, bucket=None, s3Path=None, destPath=None, chunkSize=DownloadChunkSize, maxConnections=DownloadMaxConnections, sha256=None):
     """
       Return destPath which is the local file path provided as the destination of the download.
       
@@ -490,10 +488,14 @@ class NodeInit(object):
       the object. 
       
       If the directory of the destPath does not exist it is created.
-      It is assumed the objects to be gotten are large binary objects.
+      It is assumed the objects to be gotten are large binary objects.  The object is 
+      downloaded in byte ranges of chunkSize bytes over maxConnections connections.
+      See yapl.utilities.RangedDownloader.  The progress of the download is reported every
+      TransferProgressInterval seconds and its summary is added to the deployment transfer
+      metrics.  See yapl.utilities.TransferProgress.
       
-      For details on how to download a large file with the requests package see:
-      https://stackoverflow.com/questions/16694907/how-to-download-large-file-in-python-with-requests-py
+      If a sha256 hex digest is provided, the object is hashed as it is downloaded and
+      a download with a different SHA-256 is rejected.
     """
     methodName = "getS3Object"
     
@@ -522,16 +524,56 @@ class NodeInit(object):
       TR.info(methodName,"Created object destination directory: %s" % destDir)
     #endIf
     
-    r = requests.get(s3url, stream=True)
-    with open(destPath, 'wb') as destFile:
-      shutil.copyfileobj(r.raw, destFile)
-    #endWith
+    hit, etag = self.getCachedObject(bucket,s3Path,destPath,sha256=sha256)
+    if (hit):
+      TR.info(methodName, "COMPLETED object: %s from bucket: %s, to: %s from the artifact cache." % (s3Path,bucket,destPath))
+      return destPath
+    #endIf
+    
+    progress = TransferProgress(s3Path,interval=TransferProgressInterval)
+    downloader = RangedDownloader(chunkSize=chunkSize,maxConnections=maxConnections)
+    try:
+      byteCount = downloader.download(s3url,destPath,sha256=sha256,progress=progress)
+    except:
+      progress.finish(retries=downloader.retryCount,failed=True)
+      raise
+    #endTry
+    progress.finish(retries=downloader.retryCount)
+    
+    if (self.artifactCache):
+      self.artifactCache.put(bucket,s3Path,etag,destPath,sha256=sha256)
+    #endIf
 
-    TR.info(methodName, "COMPLETED download from bucket: %s, object: %s, to: %s" % (bucket,s3Path,destPath))
+    TR.info(methodName, "COMPLETED download of %d bytes from bucket: %s, object: %s, to: %s" % (byteCount,bucket,s3Path,destPath))
     
     return destPath
   #endDef
   
+  
+  def getCachedObject(self, bucket, s3Path, destPath, sha256=None):
+    """
+      Return a tuple with True if the given S3 object was linked from the artifact cache 
+      to the given destination path and the ETag of the object.
+      
+      The ETag comes from a HEAD of the object, so a changed object is not a cache hit.
+      If the HEAD fails the ETag is None and only a SHA-256 can be a hit.
+    """
+    methodName = "getCachedObject"
+    
+    if (not self.artifactCache):
+      return (False,None)
+    #endIf
+    
+    etag = None
+    try:
+      etag = self.s3.head_object(Bucket=bucket,Key=s3Path).get('ETag')
+    except ClientError as e:
+      TR.warning(methodName,"Unable to get the ETag of object: %s in bucket: %s: %s" % (s3Path,bucket,e))
+    #endTry
+    
+    return (self.artifactCache.get(bucket,s3Path,etag,destPath,sha256=sha256),etag)
+  #endDef
+  
  
   def loadInstallMap(self, version=None, region=None):
     """
@@ -593,14 +635,113 @@ class NodeInit(object):
         
       Using a pre-signed URL is needed when the deployer does not have access to the installation
       image bucket.
+      
+      With peerDistribution the Docker image is gotten from the artifact source of this node,
+      the boot node or another cluster node, and S3 is used if that fails.  The Docker image
+      is then served to the children of this node.  See yapl.distribution.ArtifactDistribution.
+      If this node can not get or serve the Docker image, its children are told there is no
+      source, so they get the image from S3 right away.  A node with the Docker image in its
+      artifact cache does not wait for its source, but it waits for the distribution tree to
+      be published so it knows its children and serves them.
+      
+      If the install map has a docker-install-binary-sha256 entry, the Docker image is checked
+      against it as it is downloaded.
     """
     methodName = "getInstallImages"
     
     dockerLocalPath = "/root/docker/icp-install-docker.bin"
     dockerS3Path = "%s/%s" % (installMap['version'],installMap['docker-install-binary'])
     bucket = installMap['s3bucket']
-    TR.info(methodName,"Getting object: %s from bucket: %s using a pre-signed URL." % (dockerS3Path,bucket))
-    self.getS3Object(bucket=bucket, s3Path=dockerS3Path, destPath=dockerLocalPath)
+    sha256 = installMap.get('docker-install-binary-sha256')
+    
+    distribution = None
+    gotten = False
+    # The source and the tree are waited for ArtifactSourceTimeout in all.
+    deadline = time.time() + ArtifactSourceTimeout
+    if (self.peerDistribution):
+      distribution = ArtifactDistribution(self.coordinator,self.stackName)
+      # A cache hit is not gotten from the peers, but it is still served to the children.
+      gotten, etag = self.getCachedObject(bucket,dockerS3Path,dockerLocalPath,sha256=sha256)
+      if (not gotten):
+        gotten = self.getPeerObject(distribution,dockerS3Path,dockerLocalPath,sha256=sha256)
+        if (gotten and self.artifactCache):
+          self.artifactCache.put(bucket,dockerS3Path,etag,dockerLocalPath,sha256=sha256)
+        #endIf
+      #endIf
+    #endIf
+    
+    # On a cache hit the tree may not be published yet, so the children are waited for.
+    children = []
+    if (distribution):
+      children = distribution.getChildren(self.fqdn,timeout=max(0,deadline - time.time()))
+    #endIf
+    
+    if (not gotten):
+      TR.info(methodName,"Getting object: %s from bucket: %s using a pre-signed URL." % (dockerS3Path,bucket))
+      try:
+        self.getS3Object(bucket=bucket, s3Path=dockerS3Path, destPath=dockerLocalPath, sha256=sha256)
+      except:
+        if (children):
+          distribution.publishNoSource(children)
+        #endIf
+        raise
+      #endTry
+    #endIf
+    
+    if (children):
+      try:
+        self.artifactServer = ArtifactServer({dockerS3Path: dockerLocalPath},port=ArtifactServerPort)
+        self.artifactServer.start()
+        distribution.publishSource(self.artifactServer.getURL(self.fqdn),children)
+      except Exception as e:
+        TR.warning(methodName,"Not serving the Docker image, the children of this node get it from S3: %s" % e)
+        if (self.artifactServer):
+          self.artifactServer.stop()
+          self.artifactServer = None
+        #endIf
+        distribution.publishNoSource(children)
+      #endTry
+    #endIf
+  #endDef
+  
+  
+  def getPeerObject(self, distribution, objectPath, destPath, sha256=None):
+    """
+      Return True if the object with the given path, the S3 key of the object, was gotten 
+      from the artifact source of this node to the given destination path.
+      
+      Return False if no artifact source was published for this node within the 
+      ArtifactSourceTimeout or the download from the source failed, including a 
+      download rejected because it did not match the given sha256 hex digest.
+    """
+    methodName = "getPeerObject"
+    
+    source = distribution.waitForSource(self.fqdn,ArtifactSourceTimeout)
+    if (not source):
+      return False
+    #endIf
+    
+    url = "%s/%s" % (source,objectPath)
+    TR.info(methodName,"STARTED download of: %s to: %s" % (url,destPath))
+    
+    destDir = os.path.dirname(destPath)
+    if (not os.path.exists(destDir)):
+      os.makedirs(destDir)
+    #endIf
+    
+    progress = TransferProgress(url,interval=TransferProgressInterval)
+    downloader = RangedDownloader(chunkSize=DownloadChunkSize,maxConnections=DownloadMaxConnections)
+    try:
+      byteCount = downloader.download(url,destPath,sha256=sha256,progress=progress)
+      progress.finish(retries=downloader.retryCount)
+    except Exception as e:
+      progress.finish(retries=downloader.retryCount,failed=True)
+      TR.warning(methodName,"Download of: %s failed, falling back to S3: %s" % (url,e))
+      return False
+    #endTry
+    
+    TR.info(methodName,"COMPLETED download of %d bytes from: %s to: %s" % (byteCount,url,destPath))
+    return True
   #endDef
   
   
@@ -665,11 +806,7 @@ class NodeInit(object):
     methodName = "putSSMParameterValue"
     
     TR.info(methodName,"Putting value: %s to SSM parameter: %s" % (parameterValue,parameterKey))
-    self.ssm.put_parameter(Name=parameterKey,
-                           Description=description,
-                           Value=parameterValue,
-                           Type='String',
-                           Overwrite=True)
+    self.coordinator.publishState(parameterKey,parameterValue,description=description)
     TR.info(methodName,"Value: %s put to: %s." % (parameterValue,parameterKey))
     
   #endDef
@@ -692,11 +829,7 @@ class NodeInit(object):
     parameterKey = "/%s/%s" % (stackName,fqdn)
     
     TR.info(methodName,"Putting READY to SSM parameter: %s" % parameterKey)
-    self.ssm.put_parameter(Name=parameterKey,
-                           Description="Cluster node: %s is READY" % fqdn,
-                           Value="READY",
-                           Type='String',
-                           Overwrite=True)
+    self.coordinator.publishState(parameterKey,"READY",description="Cluster node: %s is READY" % fqdn)
     TR.info(methodName,"Node: %s is READY has been published." % fqdn)
 
   #endDef
@@ -779,42 +912,6 @@ class NodeInit(object):
   #endDef
   
   
-  def exportLogs(self, bucketName, stackName, logsDirectoryPath):
-    """
-      Export the deployment logs to the given S3 bucket for the given stack.
-      
-      Each log will be exported using a path with the stackName at the root and the 
-      log file name as the next element of the path.
-      
-      NOTE: Prefer not to use trace in this method as the bootstrap log file has 
-      already had the "END" message emitted to it.
-    """
-    methodName = "exportLogs"
-    
-    if (not os.path.exists(logsDirectoryPath)):
-      if (TR.isLoggable(Level.FINE)):
-        TR.fine(methodName, "Logs directory: %s does not exist." % logsDirectoryPath)
-      #endIf
-    else:
-      logFileNames = os.listdir(logsDirectoryPath)
-      if (not logFileNames):
-        if (TR.isLoggable(Level.FINE)):
-          TR.fine(methodName,"No log files in %s" % logsDirectoryPath)
-        #endIf
-      else:
-        for fileName in logFileNames:
-          s3Key = "%s/%s/%s/%s" %(stackName,self.role,self.fqdn,fileName)
-          bodyPath = os.path.join(logsDirectoryPath,fileName)
-          if (TR.isLoggable(Level.FINE)):
-            TR.fine(methodName,"Exporting log: %s to S3: %s:%s" % (bodyPath,bucketName,s3Key))
-          #endIf
-          self.s3.put_object(Bucket=bucketName, Key=s3Key, Body=bodyPath)
-        #endFor
-      #endIf
-    #endIf
-  #endDef
-
-
   def main(self,argv):
     """
       Main does command line argument processing, sets up trace and then kicks off the methods to
@@ -876,12 +973,56 @@ class NodeInit(object):
       self.role = role
       TR.info(methodName,"Node role: %s" % role)
       
+      coordinationBackend = cmdLineArgs.get('coordination-backend')
+      if (coordinationBackend):
+        self.coordinationBackend = coordinationBackend
+      #endIf
+      self.coordinationPath = cmdLineArgs.get('coordination-path')
+      
+      self.artifactCacheDirectory = cmdLineArgs.get('artifact-cache')
+      if (self.artifactCacheDirectory):
+        TR.info(methodName,"Artifact cache directory: %s" % self.artifactCacheDirectory)
+      #endIf
+      
+      # With --log-compression gzip or zstd the logs are compressed as they are exported.
+      self.logCompression = cmdLineArgs.get('log-compression')
+      if (self.logCompression):
+        TR.info(methodName,"Log compression: %s" % self.logCompression)
+      #endIf
+      
+      # With --incremental-log-export a log export skips the logs that did not change since the previous export.
+      if (cmdLineArgs.get('incremental-log-export')):
+        self.incrementalLogExport = True
+        TR.info(methodName,"Incremental log export, the export manifest is kept in the logs directory.")
+      #endIf
+      
+      # With --ship-logs <seconds> the new content of the logs is exported every <seconds> while nodeinit runs.
+      logShipInterval = cmdLineArgs.get('ship-logs')
+      if (logShipInterval):
+        self.logShipInterval = int(logShipInterval)
+        self.incrementalLogExport = True
+        TR.info(methodName,"Shipping the logs every %d seconds." % self.logShipInterval)
+      #endIf
+      TR.info(methodName,"Coordination backend: %s" % self.coordinationBackend)
+      
+      if (cmdLineArgs.get('peer-distribution')):
+        self.peerDistribution = True
+        TR.info(methodName,"Getting the install images from the artifact distribution tree.")
+      #endIf
+      
       # Additional initialization of the instance.
-      self._init(stackId)
+      with self.timeline.span('init'):
+        self._init(stackId)
+      #endWith
 
       # Get the appropriate docker image
-      self.installMap = self.loadInstallMap(version=self.ICPVersion, region=self.region)
-      self.getInstallImages(self.installMap)
+      with self.timeline.span('loadInstallMap'):
+        self.installMap = self.loadInstallMap(version=self.ICPVersion, region=self.region)
+      #endWith
+      
+      with self.timeline.span('getInstallImages'):
+        self.getInstallImages(self.installMap)
+      #endWith
           
       # The sleep() is a hack to give bootnode time to do get its act together.
       # PVS: I've run into rare cases where it appears that the the cluster nodes
@@ -889,27 +1030,39 @@ class NodeInit(object):
       # an ssm parameter.  Don't have time to troubleshoot, now.  I'm thinking 
       # if the boot node gets to it first, it will overwrite anything old that 
       # may be there.
-      time.sleep(30)
+      with self.timeline.span('bootNodeGracePeriod'):
+        time.sleep(30)
+      #endWith
       
-      authorizedKeyEntry = self.getBootNodePublicKey()
-      self.addAuthorizedKey(authorizedKeyEntry)
+      with self.timeline.span('addBootNodePublicKey'):
+        authorizedKeyEntry = self.getBootNodePublicKey()
+        self.addAuthorizedKey(authorizedKeyEntry)
+      #endWith
 
       # NOTE: All CFN outputs, parameters are strings even when the Type is Number.
       # Hence, the conversion of MasterNodeCount to an int.
       if (self.role == 'master' and int(self.MasterNodeCount) > 1):
         efsServer = self.EFSDNSName # An input to the master stack
         efsVolumes = [EFSVolume(efsServer,mountPoint) for mountPoint in ['/var/lib/registry','/var/lib/icp/audit','/var/log/audit']]
-        self.mountEFSVolumes(efsVolumes)
+        with self.timeline.span('mountEFSVolumes'):
+          self.mountEFSVolumes(efsVolumes)
+        #endWith
       #endIf
             
-      self.publishReadiness(self.stackName,self.fqdn)
+      with self.timeline.span('publishReadiness'):
+        self.publishReadiness(self.stackName,self.fqdn)
+      #endWith
 
       # Wait until boot node completes the Docker installation
-      self.getSSMParameterValue("/%s/docker-installation" % self.stackName,expectedValue="COMPLETED")
+      with self.timeline.span('waitForDockerInstallation'):
+        self.getSSMParameterValue("/%s/docker-installation" % self.stackName,expectedValue="COMPLETED")
+      #endWith
       
       # NOTE: It looks like kubectl gets installed on the master node as part of the ICP install, at least as of ICP 3.1.0.
       
-      self.publishReadiness(self.stackName,self.fqdn)
+      with self.timeline.span('publishReadinessDockerInstalled'):
+        self.publishReadiness(self.stackName,self.fqdn)
+      #endWith
           
 
     except ExitException:
@@ -920,9 +1073,37 @@ class NodeInit(object):
       self.rc = 1
     finally:
       
+      # Stop the shipper before the final export, the final export exports what it did not ship.
+      if (self.logShipper):
+        self.logShipper.stop(LogShipperStopTimeout)
+      #endIf
+      
+      if (self.artifactServer):
+        self.artifactServer.stop()
+      #endIf
+      
+      try:
+        # The timeline files are written to the logs directory so they get exported with the logs.
+        self.timeline.write(self.logsHome)
+      except Exception, e:
+        TR.warning(methodName,"Failed to write the timeline to: %s, Exception: %s" % (self.logsHome,e))
+      #endTry
+      
+      try:
+        # The summary of each download, bytes, seconds, MB/s and retries, goes with the logs too.
+        DeploymentTransfers.write(self.logsHome,'nodeinit')
+      except Exception, e:
+        TR.warning(methodName,"Failed to write the transfer metrics to: %s, Exception: %s" % (self.logsHome,e))
+      #endTry
+      
       try:
         # Copy the deployment logs in logsHome to the S3 bucket for logs.
-        self.exportLogs(self.ICPDeploymentLogsBucketName,self.stackName,self.logsHome)
+        if (self.logExporter):
+          report = self.logExporter.exportLogs(self.logsHome)
+          if ([result for result in report if result['error']]):
+            self.rc = 1
+          #endIf
+        #endIf
       except Exception, e:
         TR.error(methodName,"Exception: %s" % e, e)
         self.rc = 1